@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'game.metrics.MetricsMiddleware',
+    'game.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -81,6 +83,10 @@ TEMPLATES = [
 ]
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'game.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
@@ -147,3 +153,104 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Chain indexer (see game/indexer.py)
+STACKS_API_URL = os.environ.get('STACKS_API_URL', 'https://api.testnet.hiro.so')
+BREEVS_CONTRACT_ID = os.environ.get(
+    'BREEVS_CONTRACT_ID', 'ST168JS95Y70CV8T7T63GF8V420FG2VCBZ5TXP2DA.Breevs-v2'
+)
+# Seconds since the indexer last caught up after which predictions, which
+# depend on its game-counter, report lower confidence
+INDEXER_MAX_LAG = int(os.environ.get('INDEXER_MAX_LAG', 60))
+
+
+# Background AI jobs (see game/jobs.py); the timeout and the interval between
+# sweeps for jobs of dead workers are in seconds
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 4))
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 300))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_REQUEUE_INTERVAL = int(os.environ.get('JOB_REQUEUE_INTERVAL', 60))
+
+# Cross-worker deduplication of slow AI calls (see game/singleflight.py)
+SINGLE_FLIGHT_LEASE = int(os.environ.get('SINGLE_FLIGHT_LEASE', 180))
+SINGLE_FLIGHT_WAIT = int(os.environ.get('SINGLE_FLIGHT_WAIT', 120))
+SINGLE_FLIGHT_RESULT_TTL = int(os.environ.get('SINGLE_FLIGHT_RESULT_TTL', 30))
+
+# Gemini response cache (see game/llm.py). TTLs are in seconds per action;
+# 0 disables caching for that action.
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1024))
+LLM_CACHE_TTLS = {
+    'default': 300,
+    'generate_live_commentary': 30,
+    'predict_outcome': 300,
+    'compare_strategies': 3600,
+    'generate_summary': 86400,
+}
+
+# Upper bound on wallets per compare_strategies request
+COMPARE_STRATEGIES_MAX_WALLETS = int(os.environ.get('COMPARE_STRATEGIES_MAX_WALLETS', 100))
+
+# Server-sent event streams (see game/streams.py), intervals in seconds
+STREAM_POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 1.0))
+STREAM_KEEPALIVE = 15
+STREAM_BATCH_SIZE = 200
+STREAM_QUEUE_SIZE = 1000
+
+# Long-poll ("?wait=") on the events and commentaries actions, in seconds
+# (see game/views.py)
+LONG_POLL_MAX_WAIT = 30
+LONG_POLL_INTERVAL = 0.5
+
+# /api/games/batch/: ids per request and per-game cache lifetime in seconds
+GAME_BATCH_MAX_IDS = 500
+GAME_BATCH_CACHE_TTL = int(os.environ.get('GAME_BATCH_CACHE_TTL', 5))
+
+# Read-only call proxy (see game/clarity.py); timeouts and TTLs in seconds
+CLARITY_NODE_URL = os.environ.get('CLARITY_NODE_URL', STACKS_API_URL)
+CLARITY_MAX_CONCURRENCY = int(os.environ.get('CLARITY_MAX_CONCURRENCY', 8))
+CLARITY_TIP_TTL = float(os.environ.get('CLARITY_TIP_TTL', 5))
+CLARITY_TIMEOUT = 10
+CLARITY_CACHE_MAX_ENTRIES = 10000
+CLARITY_BATCH_MAX_CALLS = 200
+
+# Model provider for the AI actions (see game/providers.py): "gemini" or
+# "fake" (deterministic offline answers for tests and benchmarks)
+LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'gemini')
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+LLM_FAKE_LATENCY = float(os.environ.get('LLM_FAKE_LATENCY', 0))
+LLM_FAKE_ERROR_RATE = float(os.environ.get('LLM_FAKE_ERROR_RATE', 0))
+
+# Model call deadlines, latency budgets before falling back to a cheaper
+# model, circuit breaker and stale-response retention (see game/llm.py),
+# all in seconds
+LLM_TIMEOUTS = {
+    'default': 30,
+    'generate_live_commentary': 15,
+    'predict_outcome': 15,
+    'compare_strategies': 30,
+    'generate_summary': 120,
+}
+LLM_FALLBACK_MODELS = {'gemini-2.5-pro': 'gemini-2.5-flash'}
+LLM_LATENCY_BUDGETS = {'gemini-2.5-pro': int(os.environ.get('LLM_PRO_LATENCY_BUDGET', 60))}
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_COOLDOWN = int(os.environ.get('LLM_BREAKER_COOLDOWN', 30))
+LLM_STALE_TTL = 7 * 24 * 3600
+
+# Summaries of completed games are queued as soon as they complete (see
+# game/signals.py); backfill_summaries defaults, rate in summaries per minute
+SUMMARY_ON_COMPLETION = os.environ.get('SUMMARY_ON_COMPLETION', 'true').lower() in ('1', 'true', 'yes')
+SUMMARY_BACKFILL_CONCURRENCY = int(os.environ.get('SUMMARY_BACKFILL_CONCURRENCY', 2))
+SUMMARY_BACKFILL_RATE = float(os.environ.get('SUMMARY_BACKFILL_RATE', 30))
+
+# Per-request SQL/model/serialization metrics: Prometheus histograms at
+# /metrics and a Server-Timing header on every response (see game/metrics.py)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Opt-in cProfile runs of single requests (see game/profiling.py): requests
+# carrying PROFILING_TOKEN in an X-Profile header or ?profile= are profiled
+# into a ring of the newest PROFILE_RING_SIZE runs
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_RING_SIZE = int(os.environ.get('PROFILE_RING_SIZE', 50))
+PROFILE_SQL_TOP = 10
@@ -0,0 +1,71 @@
+"""
+Async actions for DRF viewsets.
+
+DRF dispatches every request synchronously. `AsyncActionsMixin` lets a
+viewset write an action as `async def`: the route serving it becomes an
+async view, and its requests go through the same DRF steps as the sync
+actions (authentication, permissions, throttling, parsing, exception
+handling and content negotiation), with only the steps that may touch the
+database run as one thread hop.
+
+`generate_live_commentary`, `generate_summary`, `predict_outcome` and
+`compare_strategies` spend nearly all their time waiting on Gemini. Served
+by the ASGI application (see gunicorn.conf.py), they await the model call
+on the worker's event loop instead of holding a thread for it, so one
+process can keep hundreds of model calls pending. `events` and
+`commentaries` are async too, so a long-polling client (`?wait=`) sleeps on
+the event loop. Under WSGI Django runs the same views to completion on the
+request's thread.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+
+class AsyncActionsMixin:
+    """Serve the viewset's `async def` actions from async views"""
+
+    # Set per route by as_view
+    async_dispatch = False
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        handlers = [getattr(cls, name, None) for name in (actions or {}).values()]
+        is_async = bool(handlers) and all(iscoroutinefunction(handler) for handler in handlers)
+        if is_async:
+            initkwargs['async_dispatch'] = True
+        view = super().as_view(actions, **initkwargs)
+        if is_async:
+            # dispatch() then returns a coroutine for Django to await
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.async_dispatch:
+            return super().dispatch(request, *args, **kwargs)
+        return self._adispatch(request, *args, **kwargs)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch, awaiting the handler"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,424 @@
+"""
+Endpoint benchmarks over a seeded fixture (`manage.py benchmark_api`).
+
+`seed_fixture` writes realistic volumes straight into the tables with bulk
+inserts: games of 5-6 players (the contract's MAX-PLAYERS is 6), most of
+them played to the end under the contract's elimination rule, with the
+same GameEvent rows, participants, counters and per-wallet projections
+the indexer would have produced, plus summaries and commentary. It is the
+one fixture for both benchmarks: `manage.py benchmark_events` times the
+per-game queries the API issues (the events endpoint's and GameContext's)
+against the same rows.
+
+`run_benchmarks` requests every API action through the full Django stack
+with Gemini replaced by the deterministic fake provider, and reports
+latency and SQL query counts per endpoint. Each endpoint has a query
+budget (`ENDPOINTS`); a run that exceeds one fails. Requests that create
+or cache something use a different game per run, so every run measures
+the uncached path.
+"""
+
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.core.cache import cache
+from django.db import connection, reset_queries, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import context, llm, projections, simulation
+from .indexer import MICRO_STX
+from .models import (
+    Game, GameCommentary, GameEvent, GameParticipant, GameSummary, Job, LeaderboardEntry, Player, PlayerStats,
+)
+
+GAME_PREFIX = 'fixture-'
+WALLET_PREFIX = 'STFIXTURE'
+# MAX-PLAYERS in Breevs.clar is 6 (host + 5); games start with 5 or 6
+PLAYER_COUNTS = (5, 6)
+STATUS_MIX = [
+    (Game.STATUS_COMPLETED, 70),
+    (Game.STATUS_IN_PROGRESS, 20),
+    (Game.STATUS_CREATED, 10),
+]
+# Average games joined per wallet, which sizes the wallet pool
+GAMES_PER_WALLET = 10
+SHIELD_CHANCE = 0.1
+STAKE = Decimal(5)
+
+
+def _play(rng, number, status, wallets, block):
+    """
+    One fixture game as (game fields, participants, events, next block).
+
+    Events are (event_type, address, round, block) in the indexer's
+    shapes: each spin writes player_survived for every survivor and
+    player_eliminated for the victim, who is
+    active[(block + game counter) mod active] as in `spin`.
+    """
+    if status == Game.STATUS_CREATED:
+        count = rng.randint(1, max(PLAYER_COUNTS) - 1)
+    else:
+        count = rng.choice(PLAYER_COUNTS)
+    players = rng.sample(wallets, count)
+    participants = {address: {'eliminated_round': None, 'used_risk_mode': False} for address in players}
+    events = [('game_created', players[0], 0, block)]
+    for address in players[1:]:
+        block += 1
+        events.append(('player_joined', address, 0, block))
+
+    fields = {'current_round': 0, 'winner_address': None}
+    counters = Counter(total_players=count, active_players=count, total_spins=0, shield_uses=0, eliminations=0)
+    if status != Game.STATUS_CREATED:
+        block += 1
+        events.append(('game_started', None, 1, block))
+        fields['current_round'] = 1
+        spins = count - 1 if status == Game.STATUS_COMPLETED else rng.randint(0, count - 2)
+        active = list(players)
+        for spin in range(spins):
+            block += rng.randint(1, 10)
+            current_round = fields['current_round']
+            if rng.random() < SHIELD_CHANCE:
+                shielded = rng.choice(active)
+                participants[shielded]['used_risk_mode'] = True
+                counters['shield_uses'] += 1
+                events.append(('shield_used', shielded, current_round, block))
+            victim = active[(block + number) % len(active)]
+            active.remove(victim)
+            for survivor in active:
+                events.append(('player_survived', survivor, current_round, block))
+            events.append(('player_eliminated', victim, current_round, block))
+            participants[victim]['eliminated_round'] = current_round
+            counters['total_spins'] += len(active) + 1
+            counters['eliminations'] += 1
+            counters['active_players'] -= 1
+            if len(active) > 1:
+                events.append(('round_advanced', None, current_round, block))
+                fields['current_round'] += 1
+        if status == Game.STATUS_COMPLETED:
+            fields['winner_address'] = active[0]
+            events.append(('game_completed', active[0], fields['current_round'], block))
+            if rng.random() < 0.5:
+                block += 1
+                events.append(('prize_claimed', active[0], fields['current_round'], block))
+
+    fields.update(counters)
+    return fields, participants, events, block + 1
+
+
+def seed_fixture(games=100_000, batch_size=1000, seed=0, progress=None):
+    """Add `games` fixture games (appending to any already seeded); returns the event count"""
+    rng = random.Random(seed)
+    offset = Game.objects.filter(game_id__startswith=GAME_PREFIX).count()
+    wallet_count = max(max(PLAYER_COUNTS) * 2, games * max(PLAYER_COUNTS) // GAMES_PER_WALLET)
+    wallets = [f'{WALLET_PREFIX}{i:08d}' for i in range(wallet_count)]
+    Player.objects.bulk_create(
+        [Player(wallet_address=address) for address in wallets], batch_size=5000, ignore_conflicts=True
+    )
+    player_pks = dict(
+        Player.objects.filter(wallet_address__startswith=WALLET_PREFIX).values_list('wallet_address', 'pk')
+    )
+
+    statuses = [status for status, weight in STATUS_MIX for _ in range(weight)]
+    block = 1000 + offset * 50
+    started_at = timezone.now() - timedelta(minutes=games + offset)
+    stats, leaderboard = defaultdict(Counter), defaultdict(Counter)
+    event_count = 0
+
+    for start in range(offset, offset + games, batch_size):
+        numbers = range(start, min(start + batch_size, offset + games))
+        played = []
+        for number in numbers:
+            status = rng.choice(statuses)
+            fields, participants, events, block = _play(rng, number, status, wallets, block)
+            played.append((number, status, fields, participants, events))
+
+        with transaction.atomic():
+            game_rows = Game.objects.bulk_create([
+                Game(
+                    game_id=f'{GAME_PREFIX}{number}',
+                    stake_amount=STAKE,
+                    prize_pool=STAKE * len(participants),
+                    is_completed=status == Game.STATUS_COMPLETED,
+                    status=status,
+                    **fields,
+                )
+                for number, status, fields, participants, events in played
+            ])
+            if game_rows[0].pk is None:
+                by_id = Game.objects.in_bulk([game.game_id for game in game_rows], field_name='game_id')
+                game_rows = [by_id[game.game_id] for game in game_rows]
+            # auto_now_add stamps every row alike; spread them a minute apart
+            for game, (number, *_) in zip(game_rows, played):
+                game.created_at = started_at + timedelta(minutes=number - offset)
+            Game.objects.bulk_update(game_rows, ['created_at'])
+
+            participant_rows, event_rows, summary_rows, commentary_rows = [], [], [], []
+            for game, (number, status, fields, participants, events) in zip(game_rows, played):
+                for position, (address, state) in enumerate(participants.items(), start=1):
+                    participant_rows.append(GameParticipant(
+                        game=game,
+                        player_id=player_pks[address],
+                        join_position=position,
+                        eliminated=state['eliminated_round'] is not None,
+                        eliminated_round=state['eliminated_round'],
+                        used_risk_mode=state['used_risk_mode'],
+                    ))
+                    leaderboard[address]['games_played'] += 1
+                    leaderboard[address]['total_staked'] += int(STAKE * MICRO_STX)
+                event_rows.extend(
+                    GameEvent(
+                        game=game,
+                        event_type=event_type,
+                        player_address=address,
+                        event_data={'block': height, 'round': event_round},
+                        block_height=height,
+                    )
+                    for event_type, address, event_round, height in events
+                )
+                if status == Game.STATUS_COMPLETED:
+                    eliminated = {
+                        address: state['eliminated_round']
+                        for address, state in participants.items() if state['eliminated_round'] is not None
+                    }
+                    projections.merge_deltas(stats, projections.completed_game_deltas(
+                        fields['winner_address'], fields['current_round'], list(participants), eliminated,
+                        {address for address, state in participants.items() if state['used_risk_mode']},
+                    ))
+                    if any(event[0] == 'prize_claimed' for event in events):
+                        leaderboard[fields['winner_address']]['games_won'] += 1
+                        leaderboard[fields['winner_address']]['total_winnings'] += int(game.prize_pool * MICRO_STX)
+                    if number % 2:
+                        summary_rows.append(GameSummary(
+                            game=game,
+                            ai_summary=f'Fixture summary of game {game.game_id}.',
+                            total_rounds=fields['current_round'],
+                            total_spins=fields['total_spins'],
+                            elimination_order=[
+                                {'address': address, 'round': rnd}
+                                for address, rnd in sorted(eliminated.items(), key=lambda item: item[1])
+                            ],
+                            statistics={'shield_uses': fields['shield_uses']},
+                            excitement_rating=rng.randint(1, 10),
+                        ))
+                elif status == Game.STATUS_IN_PROGRESS:
+                    commentary_rows.extend(
+                        GameCommentary(
+                            game=game,
+                            round_number=fields['current_round'],
+                            commentary_text=f'Fixture commentary {i} for game {game.game_id}.',
+                            tension_level=rng.randint(1, 10),
+                        )
+                        for i in range(3)
+                    )
+
+            GameParticipant.objects.bulk_create(participant_rows, batch_size=5000)
+            GameEvent.objects.bulk_create(event_rows, batch_size=5000)
+            GameSummary.objects.bulk_create(summary_rows, batch_size=1000)
+            GameCommentary.objects.bulk_create(commentary_rows, batch_size=1000)
+        event_count += len(event_rows)
+        if progress:
+            progress(numbers.stop - offset, games, event_count)
+
+    with transaction.atomic():
+        projections.apply_deltas(PlayerStats, stats)
+        projections.apply_leaderboard_deltas(leaderboard)
+    return event_count
+
+
+def clear_fixture():
+    """Delete every fixture row; returns the number of games removed"""
+    games = Game.objects.filter(game_id__startswith=GAME_PREFIX)
+    count = games.count()
+    with transaction.atomic():
+        games.delete()
+        Player.objects.filter(wallet_address__startswith=WALLET_PREFIX).delete()
+        PlayerStats.objects.filter(wallet_address__startswith=WALLET_PREFIX).delete()
+        LeaderboardEntry.objects.filter(wallet_address__startswith=WALLET_PREFIX).delete()
+    return count
+
+
+def pick_targets(runs):
+    """Fixture rows the endpoint requests point at, `runs` distinct ones where a run consumes one"""
+    games = Game.objects.filter(game_id__startswith=GAME_PREFIX)
+    live = list(games.filter(status=Game.STATUS_IN_PROGRESS).order_by('?').values_list('pk', flat=True)[:runs])
+    summarized = games.filter(summary__isnull=False).order_by('?').values_list('pk', flat=True).first()
+    unsummarized = list(
+        games.filter(is_completed=True, summary__isnull=True).order_by('?').values_list('pk', flat=True)[:runs]
+    )
+    if len(live) < runs or len(unsummarized) < runs or summarized is None:
+        raise ValueError(f'The fixture is too small for {runs} runs per endpoint; seed more games')
+
+    wallet = (
+        LeaderboardEntry.objects.filter(wallet_address__startswith=WALLET_PREFIX)
+        .order_by('-games_played').values_list('wallet_address', flat=True).first()
+    )
+    wallets = list(
+        PlayerStats.objects.filter(wallet_address__startswith=WALLET_PREFIX)
+        .order_by('?').values_list('wallet_address', flat=True)[:runs * 2]
+    )
+    job = Job.objects.filter(game__game_id__startswith=GAME_PREFIX).first() or Job.objects.create(
+        kind='predict_outcome', game_id=live[0], status='succeeded', result={}
+    )
+    return {
+        'game': live[0],
+        'live': live,
+        'summarized': summarized,
+        'unsummarized': unsummarized,
+        'batch_ids': ','.join(games.order_by('?').values_list('game_id', flat=True)[:100]),
+        'wallet': wallet,
+        'wallet_pairs': [wallets[i:i + 2] for i in range(0, len(wallets), 2)],
+        'job': job.pk,
+    }
+
+
+def _get(path):
+    return lambda targets, run: ('get', path.format(**targets), None)
+
+
+def _post_live(action, query=''):
+    return lambda targets, run: ('post', f"/api/games/{targets['live'][run]}/{action}/{query}", None)
+
+
+# (name, query budget, expected status, request for run n: (method, path, JSON body))
+#
+# Each budget is the exact count measured on the uncached path, so one extra
+# query fails the run. On SQLite the LLMResponse upsert, the single-flight
+# claim and the job insert each count BEGIN, the statement and COMMIT. The
+# endpoints that write:
+#
+# - live commentary (9): game, GameContext players + events, recent
+#   commentary for the same prompt, LLMResponse lookup, upsert (3),
+#   GameCommentary insert;
+# - summary (15): game, existing summary, single-flight claim (3), summary
+#   re-check as leader, GameContext players + events, LLMResponse lookup,
+#   upsert (3), GameSummary insert, single-flight release, summary re-read
+#   for the response;
+# - prediction, fast (9): game, single-flight claim (3), GameContext players
+#   + events, indexer game counter, elimination gaps, single-flight release;
+# - prediction, full (13): fast plus LLMResponse lookup and upsert (3);
+# - ?async (5): game, job insert (3, a no-op if one is live), job lookup.
+ENDPOINTS = [
+    ('games.list', 1, 200, _get('/api/games/')),
+    ('games.list?status', 1, 200, _get('/api/games/?status=1')),
+    ('games.list?wallet', 1, 200, _get('/api/games/?wallet={wallet}')),
+    ('games.retrieve', 2, 200, _get('/api/games/{game}/')),
+    ('games.batch', 2, 200, _get('/api/games/batch/?ids={batch_ids}')),
+    ('games.events', 2, 200, _get('/api/games/{game}/events/')),
+    ('games.events?since_id', 2, 200, _get('/api/games/{game}/events/?since_id=0')),
+    ('games.commentaries', 2, 200, _get('/api/games/{game}/commentaries/')),
+    ('games.summary', 2, 200, _get('/api/games/{summarized}/summary/')),
+    ('games.generate_live_commentary', 9, 201, _post_live('generate_live_commentary')),
+    ('games.generate_live_commentary?async', 5, 202, _post_live('generate_live_commentary', '?async=1')),
+    (
+        'games.generate_summary', 15, 201,
+        lambda targets, run: ('post', f"/api/games/{targets['unsummarized'][run]}/generate_summary/", None),
+    ),
+    ('games.predict_outcome', 13, 200, _post_live('predict_outcome')),
+    ('games.predict_outcome?mode=fast', 9, 200, _post_live('predict_outcome', '?mode=fast')),
+    (
+        'games.compare_strategies', 5, 200,
+        lambda targets, run: (
+            'post', '/api/games/compare_strategies/', {'wallets': targets['wallet_pairs'][run]}
+        ),
+    ),
+    ('summaries.list', 1, 200, _get('/api/summaries/')),
+    ('leaderboard.list', 1, 200, _get('/api/leaderboard/')),
+    ('leaderboard.retrieve', 2, 200, _get('/api/leaderboard/{wallet}/')),
+    ('jobs.retrieve', 2, 200, _get('/api/jobs/{job}/')),
+    ('llm_cache.stats', 1, 200, _get('/api/llm-cache/')),
+]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(runs=20, only=None):
+    """
+    Time every endpoint `runs` times after one warm-up request.
+
+    Returns the report: run metadata plus, per endpoint, latency
+    percentiles in milliseconds, the largest query count seen, its budget
+    and whether the endpoint stayed within it with the expected status.
+    """
+    targets = pick_targets(runs + 1)
+    client = Client()
+    results = []
+    with override_settings(LLM_PROVIDER='fake', LLM_FAKE_LATENCY=0, LLM_FAKE_ERROR_RATE=0):
+        for name, budget, expected_status, build in ENDPOINTS:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            timings, query_counts, statuses = [], [], Counter()
+            for run in range(runs + 1):
+                method, path, body = build(targets, run)
+                cache.clear()
+                llm.clear_memory_cache()
+                context.clear_memo()
+                simulation.clear_gap_cache()
+                # CaptureQueriesContext counts by position in the bounded debug log
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    if body is None:
+                        response = getattr(client, method)(path)
+                    else:
+                        response = getattr(client, method)(path, body, content_type='application/json')
+                    elapsed = (time.perf_counter() - started) * 1000
+                if run == 0:
+                    continue
+                timings.append(elapsed)
+                query_counts.append(len(queries))
+                statuses[response.status_code] += 1
+
+            queries = max(query_counts)
+            results.append({
+                'name': name,
+                'method': method.upper(),
+                'path': path,
+                'runs': runs,
+                'statuses': {str(code): count for code, count in statuses.items()},
+                'queries': queries,
+                'query_budget': budget,
+                'median_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(_percentile(timings, 0.95), 3),
+                'min_ms': round(min(timings), 3),
+                'max_ms': round(max(timings), 3),
+                'ok': queries <= budget and set(statuses) == {expected_status},
+            })
+
+    games = Game.objects.filter(game_id__startswith=GAME_PREFIX)
+    return {
+        'meta': {
+            'generated_at': timezone.now().isoformat(),
+            'revision': _revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'fixture': {
+                'games': games.count(),
+                'participants': GameParticipant.objects.filter(game__in=games).count(),
+                'events': GameEvent.objects.filter(game__in=games).count(),
+            },
+            'runs': runs,
+        },
+        'results': results,
+    }
@@ -0,0 +1,67 @@
+"""
+In-process circuit breaker for an unreliable upstream.
+
+Closed, calls go through and `failures` consecutive failures open it.
+Open, calls fail fast without touching the upstream until `cooldown`
+seconds have passed; then a single probe call is let through (half-open).
+A successful probe closes the breaker, a failed one opens it again. A probe
+that never reports back (e.g. its request was cancelled) is given up on
+after another cooldown.
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe"""
+
+    def __init__(self, failures=5, cooldown=30, clock=time.monotonic):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if self.clock() - self.opened_at >= self.cooldown:
+                return 'half-open'
+            return 'open'
+
+    def retry_after(self):
+        """Seconds until the next call may go through"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0
+            return max(0, self.cooldown - (self.clock() - self.opened_at))
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = self.clock()
+            if now - self.opened_at < self.cooldown:
+                return False
+            if self.probe_at is not None and now - self.probe_at < self.cooldown:
+                return False
+            self.probe_at = now
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_at = None
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probe_at is not None or self.failures >= self.max_failures:
+                self.opened_at = self.clock()
+            self.probe_at = None
@@ -0,0 +1,192 @@
+"""
+Read-through proxy for the Breevs contract's read-only functions.
+
+The frontend's `fetchCallReadOnlyFunction` calls can be pointed at
+`/api/clarity` instead of the node: the proxy answers
+`/v2/contracts/call-read/...` with the node's own response shape, so only
+the network base URL changes. Behind it:
+
+- identical calls already in flight share one upstream request;
+- every upstream request runs on one bounded thread pool, so a spike of
+  players (or a large batch) never has more than CLARITY_MAX_CONCURRENCY
+  requests open against the node;
+- results are cached per chain tip. Read-only functions only depend on
+  chain state, so a cached answer stays valid until the tip height moves;
+  the tip itself is re-read at most every CLARITY_TIP_TTL seconds.
+
+The node is any Stacks API (`CLARITY_NODE_URL`), e.g. a Clarinet devnet on
+localhost instead of Hiro's public API.
+"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from cachetools import LRUCache
+from django.conf import settings
+
+READ_ONLY_FUNCTIONS = frozenset([
+    'is-player-eliminated',
+    'get-active-players-count',
+    'get-game-info',
+    'is-prize-claimed',
+    'get-user-stats',
+    'get-player-game-data',
+    'get-total-games',
+    'is-game-creator',
+    'is-user-in-game',
+    'is-game-active',
+])
+
+
+class ClarityError(Exception):
+    """The node could not answer a read-only call"""
+
+
+class HttpClarityNode:
+    """Stacks API node answering `/v2/info` and `/v2/contracts/call-read`"""
+
+    def __init__(self, base_url, contract_id, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.contract_address, self.contract_name = contract_id.split('.')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def tip_height(self):
+        response = self.session.get(f'{self.base_url}/v2/info', timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['stacks_tip_height']
+
+    def call_read(self, function_name, arguments):
+        response = self.session.post(
+            f'{self.base_url}/v2/contracts/call-read/'
+            f'{self.contract_address}/{self.contract_name}/{function_name}',
+            json={'sender': self.contract_address, 'arguments': list(arguments)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class ReadOnlyProxy:
+    """Coalescing, bounded, tip-aware cache in front of a Clarity node"""
+
+    def __init__(self, node, max_concurrency=8, tip_ttl=5, max_entries=10000):
+        self.node = node
+        self.tip_ttl = tip_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='clarity')
+        self.lock = threading.Lock()
+        # (function, arguments) -> (tip height, node response)
+        self.cache = LRUCache(maxsize=max_entries)
+        self.in_flight = {}
+        self.tip = None
+        self.tip_checked = 0.0
+        self.counters = Counter()
+
+    def _submit(self, key, fn, *args):
+        """Run `fn` on the pool unless the same `key` is already running"""
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return future
+            future = self.in_flight[key] = self.executor.submit(fn, *args)
+            self.counters['upstream'] += 1
+
+        def done(_):
+            with self.lock:
+                self.in_flight.pop(key, None)
+        future.add_done_callback(done)
+        return future
+
+    def tip_height(self):
+        with self.lock:
+            if self.tip is not None and time.monotonic() - self.tip_checked < self.tip_ttl:
+                return self.tip
+        tip = self._submit(('tip',), self.node.tip_height).result()
+        with self.lock:
+            self.tip, self.tip_checked = tip, time.monotonic()
+        return tip
+
+    def _fetch(self, key, tip):
+        result = self.node.call_read(*key)
+        with self.lock:
+            self.cache[key] = (tip, result)
+        return result
+
+    def call_many(self, calls):
+        """
+        Answer [(function, arguments), ...] in order.
+
+        Each item is the node's response dict, or a ClarityError for calls
+        the node failed on (other calls in the batch are unaffected).
+        """
+        keys = [(function_name, tuple(arguments)) for function_name, arguments in calls]
+        for function_name, _ in keys:
+            if function_name not in READ_ONLY_FUNCTIONS:
+                raise ValueError(f'Unknown read-only function: {function_name}')
+
+        try:
+            tip = self.tip_height()
+        except Exception as e:
+            raise ClarityError(f'Chain tip unavailable: {e}')
+
+        answers, futures = {}, {}
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                entry = self.cache.get(key)
+                if entry is not None and entry[0] == tip:
+                    self.counters['hits'] += 1
+                    answers[key] = entry[1]
+                else:
+                    self.counters['misses'] += 1
+        for key in dict.fromkeys(keys):
+            if key not in answers:
+                futures[key] = self._submit(('call', tip) + key, self._fetch, key, tip)
+
+        wait(futures.values())
+        for key, future in futures.items():
+            error = future.exception()
+            answers[key] = ClarityError(str(error)) if error else future.result()
+        return [answers[key] for key in keys]
+
+    def call(self, function_name, arguments):
+        answer = self.call_many([(function_name, arguments)])[0]
+        if isinstance(answer, ClarityError):
+            raise answer
+        return answer
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            entries = len(self.cache)
+        lookups = counters.get('hits', 0) + counters.get('misses', 0)
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'coalesced': counters.get('coalesced', 0),
+            'upstream_requests': counters.get('upstream', 0),
+            'hit_rate': round(counters.get('hits', 0) / lookups * 100, 2) if lookups else 0,
+            'entries': entries,
+            'tip_height': self.tip,
+        }
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def get_proxy():
+    """The process-wide proxy for the configured node"""
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = ReadOnlyProxy(
+                HttpClarityNode(settings.CLARITY_NODE_URL, settings.BREEVS_CONTRACT_ID, settings.CLARITY_TIMEOUT),
+                max_concurrency=settings.CLARITY_MAX_CONCURRENCY,
+                tip_ttl=settings.CLARITY_TIP_TTL,
+                max_entries=settings.CLARITY_CACHE_MAX_ENTRIES,
+            )
+        return _proxy
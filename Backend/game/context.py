@@ -0,0 +1,120 @@
+"""
+One read of a game shared by the AI actions.
+
+`GameContext.load` reads a game's participants and events with one query
+each into compact slotted rows. The commentary, summary and prediction
+prompt builders and the tension, excitement and key-moment calculators
+all work from the same snapshot instead of each re-querying the game.
+
+Nothing about a game changes without a new block, so results derived from
+a snapshot (`memo`) are kept per game and latest block height, and reused
+by later requests until the game moves on.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from cachetools import LRUCache
+
+from .models import Game, GameEvent, GameParticipant
+
+EVENT_LABELS = dict(GameEvent.EVENT_TYPES)
+MEMO_MAX_ENTRIES = 1024
+
+_memo = LRUCache(maxsize=MEMO_MAX_ENTRIES)
+_memo_lock = threading.Lock()
+
+
+@dataclass(slots=True, frozen=True)
+class PlayerRow:
+    address: str
+    join_position: int
+    eliminated: bool
+    eliminated_round: int | None
+    used_risk_mode: bool
+
+
+@dataclass(slots=True, frozen=True)
+class EventRow:
+    event_type: str
+    player_address: str | None
+    # event_data["round"]; None when the event has none
+    round: int | None
+    block_height: int
+
+    @property
+    def label(self):
+        return EVENT_LABELS.get(self.event_type, self.event_type)
+
+
+@dataclass(slots=True)
+class GameContext:
+    game: Game
+    # Join order
+    players: list
+    # Chain order
+    events: list
+
+    @staticmethod
+    def players_query(game):
+        return (
+            GameParticipant.objects
+            .filter(game=game)
+            .order_by('join_position')
+            .values_list('player__wallet_address', 'join_position', 'eliminated', 'eliminated_round', 'used_risk_mode')
+        )
+
+    @staticmethod
+    def events_query(game):
+        return (
+            GameEvent.objects
+            .filter(game=game)
+            .order_by('block_height', 'id')
+            .values_list('event_type', 'player_address', 'event_data__round', 'block_height')
+        )
+
+    @classmethod
+    def load(cls, game):
+        """Snapshot `game`: one participants query, one events query"""
+        return cls(
+            game=game,
+            players=[PlayerRow(*row) for row in cls.players_query(game)],
+            events=[EventRow(*row) for row in cls.events_query(game)],
+        )
+
+    @property
+    def active(self):
+        """Players still in, in join order"""
+        return [player for player in self.players if not player.eliminated]
+
+    @property
+    def latest_block(self):
+        return self.events[-1].block_height if self.events else 0
+
+    def recent_events(self, count):
+        """The last `count` events, newest first"""
+        return self.events[-count:][::-1]
+
+    def of_type(self, *event_types):
+        return [event for event in self.events if event.event_type in event_types]
+
+    def survivals(self):
+        """Spins survived per address"""
+        return Counter(event.player_address for event in self.of_type('player_survived'))
+
+    def memo(self, key, compute):
+        """`compute()`, kept for this game until its next block"""
+        memo_key = (self.game.pk, self.latest_block, key)
+        with _memo_lock:
+            if memo_key in _memo:
+                return _memo[memo_key]
+        value = compute()
+        with _memo_lock:
+            _memo[memo_key] = value
+        return value
+
+
+def clear_memo():
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,466 @@
+"""
+Chain indexer for the Breevs contract.
+
+Follows the `emit-event` prints of `Breevs.clar` and mirrors them into
+`Game`, `Player`, `GameParticipant` and `GameEvent`, keeping the `LeaderboardEntry` and
+`PlayerStats` projections up to date. Transactions are consumed in ascending
+block order and written in block-sized batches: every flush loads the state
+it needs with a handful of bulk queries, applies the whole batch in memory
+and writes it back with `bulk_create` / `bulk_update` inside one transaction
+together with the checkpoint, so a crash never leaves a half-ingested block.
+"""
+
+import json
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+from . import jobs, projections
+from .models import Game, GameEvent, GameParticipant, IndexerCheckpoint, Player, PlayerStats
+
+
+MICRO_STX = Decimal(1_000_000)
+
+# (key value) pairs inside a Clarity tuple repr, e.g.
+# (tuple (block u812) (event "game-created") (game-id u3))
+_TUPLE_FIELD = re.compile(r'\(([\w-]+) ([^()\s]+)\)')
+
+
+def parse_clarity_value(repr_value):
+    """Convert a scalar Clarity repr (u12, "text", 'SP..., true) to Python"""
+    if repr_value.startswith('u') and repr_value[1:].isdigit():
+        return int(repr_value[1:])
+    if repr_value.lstrip('-').isdigit():
+        return int(repr_value)
+    if repr_value.startswith('"') and repr_value.endswith('"'):
+        return repr_value[1:-1]
+    if repr_value.startswith("'"):
+        return repr_value[1:]
+    if repr_value in ('true', 'false'):
+        return repr_value == 'true'
+    return repr_value
+
+
+def parse_print_event(repr_value):
+    """Parse an `emit-event` print tuple into a dict, or None if it is not one"""
+    fields = {key: parse_clarity_value(value) for key, value in _TUPLE_FIELD.findall(repr_value)}
+    if 'event' not in fields or 'game-id' not in fields:
+        return None
+    return fields
+
+
+def parse_ok_principal(repr_value):
+    """Extract the principal from an `(ok 'SP...)` response repr"""
+    match = re.match(r"\(ok '([\w.-]+)\)", repr_value or '')
+    return match.group(1) if match else None
+
+
+# ============================================
+# CHAIN SOURCES
+# ============================================
+
+class FixtureChainSource:
+    """
+    Chain source backed by a recorded JSON file of Stacks API transactions.
+
+    The file holds a list of transaction objects (or {"results": [...]}) in
+    the shape returned by `/extended/v1/tx/{tx_id}`, events included.
+    """
+
+    def __init__(self, path):
+        data = json.loads(Path(path).read_text())
+        if isinstance(data, dict):
+            data = data.get('results', [])
+        self.transactions = sorted(data, key=lambda tx: (tx['block_height'], tx.get('tx_index', 0)))
+        self.scanned_to = None
+
+    def transactions_after(self, block_height):
+        for tx in self.transactions:
+            if tx['block_height'] > block_height:
+                yield tx
+        if self.transactions:
+            self.scanned_to = self.transactions[-1]['block_height']
+
+
+class HttpChainSource:
+    """
+    Chain source that reads a Stacks API node (Hiro API or a local stand-in
+    such as `manage.py serve_chain_fixture`).
+
+    The contract's transactions are listed newest first, so the chain from
+    the checkpoint to the tip is walked in ranges of `block_range` blocks:
+    each range is listed with `until_block` pinned to its end (new blocks
+    arriving meanwhile cannot shift the pages), deduplicated by tx_id,
+    sorted into chain order and yielded before the next range is read.
+    Events are fetched `tx_batch_size` transactions per request through
+    `/extended/v1/tx/multiple`, with up to `max_concurrency` requests in
+    flight.
+    """
+
+    page_size = 50
+    block_range = 1000
+    tx_batch_size = 50
+    max_concurrency = 4
+
+    def __init__(self, base_url, contract_id, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.contract_id = contract_id
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Last block every contract transaction up to has been yielded for
+        self.scanned_to = None
+
+    def _get(self, path, **params):
+        response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _list(self, until_block, limit, offset):
+        return self._get(
+            f'/extended/v1/address/{self.contract_id}/transactions',
+            limit=limit, offset=offset, until_block=until_block,
+        )
+
+    def tip_height(self):
+        return self._get('/extended/v1/block', limit=1)['results'][0]['height']
+
+    def first_height(self, until_block):
+        """Block of the contract's oldest transaction, or None without any"""
+        total = self._list(until_block, 1, 0).get('total', 0)
+        if not total:
+            return None
+        return self._list(until_block, 1, total - 1)['results'][0]['block_height']
+
+    def _range(self, after, until):
+        """The contract's transactions in blocks (after, until], in chain order"""
+        by_id = {}
+        offset = 0
+        while True:
+            results = self._list(until, self.page_size, offset).get('results', [])
+            for tx in results:
+                if after < tx['block_height'] <= until:
+                    by_id.setdefault(tx['tx_id'], tx)
+            if len(results) < self.page_size or results[-1]['block_height'] <= after:
+                break
+            offset += len(results)
+        return sorted(by_id.values(), key=lambda tx: (tx['block_height'], tx.get('tx_index', 0)))
+
+    def _events(self, batch):
+        found = self._get(
+            '/extended/v1/tx/multiple',
+            tx_id=[tx['tx_id'] for tx in batch],
+            event_limit=max(max(tx.get('event_count', 0) for tx in batch), 1),
+        )
+        return {
+            tx_id: entry['result'].get('events', [])
+            for tx_id, entry in found.items() if entry.get('found')
+        }
+
+    def _attach_events(self, transactions, pool):
+        missing = [
+            tx for tx in transactions
+            if 'events' not in tx or len(tx['events']) < tx.get('event_count', 0)
+        ]
+        batches = [missing[i:i + self.tx_batch_size] for i in range(0, len(missing), self.tx_batch_size)]
+        for batch, events in zip(batches, pool.map(self._events, batches)):
+            for tx in batch:
+                tx['events'] = events.get(tx['tx_id'], [])
+
+    def transactions_after(self, block_height):
+        tip = self.tip_height()
+        start = block_height
+        if start == 0:
+            # Skip the blocks before the contract was deployed
+            first = self.first_height(tip)
+            start = tip if first is None else first - 1
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while start < tip:
+                end = min(start + self.block_range, tip)
+                transactions = self._range(start, end)
+                self._attach_events(transactions, pool)
+                yield from transactions
+                self.scanned_to = start = end
+
+
+def get_chain_source(source=None):
+    """Build a chain source from a fixture path, an URL or the settings"""
+    source = source or settings.STACKS_API_URL
+    if source.startswith(('http://', 'https://')):
+        return HttpChainSource(source, settings.BREEVS_CONTRACT_ID)
+    return FixtureChainSource(source)
+
+
+# ============================================
+# INGESTION
+# ============================================
+
+@dataclass
+class _GameState:
+    game: Game
+    players: list = field(default_factory=list)
+    # Eliminated address -> round it was eliminated in
+    eliminated: dict = field(default_factory=dict)
+    risk_mode: set = field(default_factory=set)
+
+    @property
+    def active_players(self):
+        return [address for address in self.players if address not in self.eliminated]
+
+
+class ChainIndexer:
+    """Applies contract transactions to the database in block-sized batches"""
+
+    def __init__(self, source, contract_id=None, name='breevs', batch_blocks=100):
+        self.source = source
+        self.contract_id = contract_id or settings.BREEVS_CONTRACT_ID
+        self.name = name
+        self.batch_blocks = batch_blocks
+
+    def get_checkpoint(self):
+        checkpoint, _ = IndexerCheckpoint.objects.get_or_create(name=self.name)
+        return checkpoint.block_height
+
+    def run_once(self):
+        """Ingest everything after the checkpoint. Returns (blocks, events) written"""
+        checkpoint = self.get_checkpoint()
+        transactions = self.source.transactions_after(checkpoint)
+
+        blocks_written = events_written = 0
+        batch, batch_blocks = [], set()
+        seen = set()
+        for tx in transactions:
+            # A transaction listed twice would create its game twice
+            if tx['tx_id'] in seen:
+                continue
+            seen.add(tx['tx_id'])
+            if tx['block_height'] not in batch_blocks and len(batch_blocks) >= self.batch_blocks:
+                events_written += self.flush(batch, max(batch_blocks))
+                blocks_written += len(batch_blocks)
+                batch, batch_blocks = [], set()
+            batch.append(tx)
+            batch_blocks.add(tx['block_height'])
+
+        if batch:
+            events_written += self.flush(batch, max(batch_blocks))
+            blocks_written += len(batch_blocks)
+        # Caught up with the source: blocks with no contract transactions
+        # need not be listed again, and updated_at records when the
+        # checkpoint (and its game-counter) was last current
+        IndexerCheckpoint.objects.update_or_create(
+            name=self.name,
+            defaults={'block_height': max(self.source.scanned_to or 0, max(batch_blocks, default=0), checkpoint)},
+        )
+        return blocks_written, events_written
+
+    def _contract_prints(self, tx):
+        for event in tx.get('events', []):
+            log = event.get('contract_log')
+            if event.get('event_type') != 'smart_contract_log' or not log:
+                continue
+            if log.get('contract_id') != self.contract_id or log.get('topic') != 'print':
+                continue
+            parsed = parse_print_event(log['value']['repr'])
+            if parsed:
+                yield parsed
+
+    def _load_state(self, game_ids):
+        games = Game.objects.in_bulk(game_ids, field_name='game_id')
+        states = {game_id: _GameState(game) for game_id, game in games.items()}
+
+        participants = (
+            GameParticipant.objects
+            .filter(game__game_id__in=games.keys())
+            .order_by('join_position')
+            .values_list('game__game_id', 'player__wallet_address', 'eliminated', 'eliminated_round', 'used_risk_mode')
+        )
+        for game_id, address, eliminated, eliminated_round, used_risk_mode in participants:
+            state = states[game_id]
+            state.players.append(address)
+            if eliminated:
+                state.eliminated[address] = eliminated_round or 0
+            if used_risk_mode:
+                state.risk_mode.add(address)
+
+        return states
+
+    def flush(self, transactions, last_block):
+        """Apply one batch of transactions and advance the checkpoint to `last_block`"""
+        prints = []
+        for tx in transactions:
+            if tx.get('tx_status') != 'success':
+                continue
+            for event in self._contract_prints(tx):
+                prints.append((tx, event))
+
+        with transaction.atomic():
+            states = self._load_state({str(event['game-id']) for _, event in prints})
+            new_games = []
+            new_members = []
+            # (game id, address) -> elimination round
+            eliminated_players = {}
+            events = []
+            completed = []
+            # Deltas to the contract's user-stats map, keyed by wallet
+            user_stats = defaultdict(Counter)
+            checkpoint = {'block_height': last_block}
+
+            for tx, event in prints:
+                game_id = str(event['game-id'])
+                name = event['event']
+                sender = tx.get('sender_address')
+                state = states.get(game_id)
+                event_data = {'tx_id': tx.get('tx_id'), 'block': event.get('block')}
+
+                if name == 'game-created':
+                    stake = Decimal(parse_clarity_value(tx['contract_call']['function_args'][0]['repr'])) / MICRO_STX
+                    state = states[game_id] = _GameState(Game(
+                        game_id=game_id,
+                        prize_pool=stake,
+                        stake_amount=stake,
+                        current_round=0,
+                    ))
+                    new_games.append(state.game)
+                    # create-game prints the incremented game-counter
+                    checkpoint['game_counter'] = event['game-id']
+                if state is None:
+                    continue
+
+                game = state.game
+                player_address = None
+
+                if name in ('game-created', 'player-joined'):
+                    if name == 'player-joined':
+                        game.prize_pool += game.stake_amount
+                    user_stats[sender]['games_played'] += 1
+                    user_stats[sender]['total_staked'] += int(game.stake_amount * MICRO_STX)
+                    state.players.append(sender)
+                    new_members.append((game_id, sender))
+                    player_address = sender
+                elif name == 'game-started':
+                    game.current_round = 1
+                    game.status = Game.STATUS_IN_PROGRESS
+                elif name == 'player-eliminated':
+                    victim = parse_ok_principal(tx.get('tx_result', {}).get('repr'))
+                    for survivor in state.active_players:
+                        if survivor != victim:
+                            events.append(GameEvent(
+                                game=game,
+                                event_type='player_survived',
+                                player_address=survivor,
+                                event_data={**event_data, 'round': game.current_round},
+                                block_height=tx['block_height'],
+                            ))
+                    state.eliminated[victim] = game.current_round
+                    eliminated_players[(game_id, victim)] = game.current_round
+                    player_address = victim
+                elif name == 'round-advanced':
+                    game.current_round += 1
+                elif name == 'game-completed':
+                    # The final spin prints game-completed before its own
+                    # player-eliminated, so its victim is still "active" here.
+                    victim = parse_ok_principal(tx.get('tx_result', {}).get('repr'))
+                    active = [address for address in state.active_players if address != victim]
+                    game.is_completed = True
+                    game.status = Game.STATUS_COMPLETED
+                    game.winner_address = active[0] if len(active) == 1 else None
+                    player_address = game.winner_address
+                    completed.append(state)
+                elif name == 'prize-claimed':
+                    user_stats[sender]['games_won'] += 1
+                    user_stats[sender]['total_winnings'] += int(game.prize_pool * MICRO_STX)
+                    player_address = sender
+
+                events.append(GameEvent(
+                    game=game,
+                    event_type=name.replace('-', '_'),
+                    player_address=player_address,
+                    event_data={**event_data, 'round': game.current_round},
+                    block_height=tx['block_height'],
+                ))
+
+            self._write(states, new_games, new_members, eliminated_players, events)
+            projections.apply_game_counter_deltas(projections.game_counter_deltas(
+                events, [states[game_id].game.pk for game_id, _ in new_members]
+            ))
+            projections.apply_leaderboard_deltas(user_stats)
+            self._write_player_stats(completed)
+            if completed and settings.SUMMARY_ON_COMPLETION:
+                # bulk_update sends no post_save, so queue the summaries here
+                transaction.on_commit(partial(
+                    jobs.enqueue_summaries, [state.game for state in completed]
+                ))
+            IndexerCheckpoint.objects.update_or_create(name=self.name, defaults=checkpoint)
+        return len(events)
+
+    def _write(self, states, new_games, new_members, eliminated_players, events):
+        Game.objects.bulk_create(new_games)
+        existing_games = [state.game for state in states.values() if state.game not in new_games]
+        if existing_games:
+            Game.objects.bulk_update(
+                existing_games,
+                ['current_round', 'prize_pool', 'winner_address', 'is_completed', 'status'],
+            )
+
+        addresses = {address for _, address in new_members}
+        Player.objects.bulk_create(
+            [Player(wallet_address=address) for address in addresses],
+            ignore_conflicts=True,
+        )
+        players = Player.objects.in_bulk(addresses, field_name='wallet_address')
+
+        participants = {
+            (game_id, address): GameParticipant(
+                game=states[game_id].game,
+                player=players[address],
+                join_position=states[game_id].players.index(address) + 1,
+            )
+            for game_id, address in new_members
+        }
+        # Eliminations of players who joined in an earlier batch
+        earlier = {}
+        for key, round_number in eliminated_players.items():
+            participant = participants.get(key)
+            if participant is None:
+                earlier[key] = round_number
+            else:
+                participant.eliminated = True
+                participant.eliminated_round = round_number
+        GameParticipant.objects.bulk_create(participants.values(), ignore_conflicts=True)
+
+        if earlier:
+            eliminated = []
+            candidates = GameParticipant.objects.filter(
+                game__game_id__in={game_id for game_id, _ in earlier},
+                player__wallet_address__in={address for _, address in earlier},
+            ).select_related('game', 'player')
+            for participant in candidates:
+                key = (participant.game.game_id, participant.player.wallet_address)
+                if key in earlier:
+                    participant.eliminated = True
+                    participant.eliminated_round = earlier[key]
+                    eliminated.append(participant)
+            GameParticipant.objects.bulk_update(eliminated, ['eliminated', 'eliminated_round'])
+
+        GameEvent.objects.bulk_create(events, batch_size=1000)
+
+    def _write_player_stats(self, completed):
+        if not completed:
+            return
+        deltas = defaultdict(Counter)
+        for state in completed:
+            projections.merge_deltas(deltas, projections.completed_game_deltas(
+                state.game.winner_address,
+                state.game.current_round,
+                state.players,
+                state.eliminated,
+                state.risk_mode,
+            ))
+        projections.apply_deltas(PlayerStats, deltas)
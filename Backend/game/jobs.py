@@ -0,0 +1,216 @@
+"""
+Database-backed job queue for the slow, LLM-bound actions.
+
+API views enqueue a `Job` row and return 202 straight away; `manage.py
+run_jobs` runs a bounded pool of worker threads that claim queued rows with
+a conditional UPDATE (so several worker processes can share one queue
+without a broker or row locks) and store the serialized result on the job.
+Every JOB_REQUEUE_INTERVAL seconds one worker thread returns jobs that have
+been running longer than JOB_TIMEOUT (their worker died) to the queue.
+
+A game has at most one queued or running job of each kind (a partial
+unique constraint on Job), so repeated requests and concurrent completions
+share one job. A worker only records its outcome while the job is still
+its own: if the job was requeued and claimed again meanwhile, the late
+result is dropped.
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from . import services
+from .models import GameSummary, Job
+from .serializers import GameCommentarySerializer, GameSummarySerializer
+
+
+def _run_live_commentary(job):
+    commentary, _ = services.generate_live_commentary(job.game)
+    return GameCommentarySerializer(commentary).data
+
+
+def _run_summary(job):
+    summary, _ = services.generate_summary_once(job.game)
+    return GameSummarySerializer(summary).data
+
+
+def _run_prediction(job):
+    return services.predict_outcome_once(job.game)
+
+
+def _run_comparison(job):
+    return services.compare_strategies(job.params.get('wallets', []))
+
+
+HANDLERS = {
+    'generate_live_commentary': _run_live_commentary,
+    'generate_summary': _run_summary,
+    'predict_outcome': _run_prediction,
+    'compare_strategies': _run_comparison,
+}
+
+
+ACTIVE = ['queued', 'running']
+
+
+def active_job(kind, game):
+    """The game's queued or running job of `kind`, or None"""
+    return Job.objects.filter(kind=kind, game=game, status__in=ACTIVE).first()
+
+
+def enqueue(kind, game=None, **params):
+    """
+    Queue a job for the worker pool. For a game that already has a queued or
+    running job of this kind, that job is returned instead.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    if game is None:
+        return Job.objects.create(kind=kind, params=params)
+    while True:
+        # A no-op when the game already has a live job of this kind
+        Job.objects.bulk_create([Job(kind=kind, game=game, params=params)], ignore_conflicts=True)
+        job = active_job(kind, game)
+        if job is not None:
+            return job
+        # That job finished in between; queue a new one
+
+
+def enqueue_summaries(games):
+    """
+    Queue `generate_summary` for the completed games among `games` that have
+    neither a summary nor a queued/running summary job yet.
+
+    Called when games complete, so the first GET of a summary finds it
+    already written instead of waiting on Gemini Pro. Games that already
+    have a live summary job are skipped by the unique constraint, so
+    completions processed concurrently queue one job per game.
+    """
+    pks = {game.pk for game in games if game.is_completed}
+    if not pks:
+        return
+    pks -= set(GameSummary.objects.filter(game_id__in=pks).values_list('game_id', flat=True))
+    Job.objects.bulk_create(
+        [Job(kind='generate_summary', game_id=pk, params={}) for pk in sorted(pks)],
+        ignore_conflicts=True,
+    )
+
+
+def claim_next(worker_name):
+    """Atomically take the oldest queued job, or return None"""
+    while True:
+        job_id = (
+            Job.objects.filter(status='queued')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            worker=worker_name,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.select_related('game').get(pk=job_id)
+        # Another worker won the race for this row; try the next one.
+
+
+def run_job(job):
+    """
+    Execute a claimed job and persist its outcome. Returns whether it was
+    recorded: not if the job was requeued for another attempt meanwhile.
+    """
+    try:
+        result = HANDLERS[job.kind](job)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'succeeded'
+        job.result = result
+        job.error = ''
+    job.finished_at = timezone.now()
+    return bool(Job.objects.filter(
+        pk=job.pk, worker=job.worker, attempts=job.attempts, status='running',
+    ).update(status=job.status, result=job.result, error=job.error, finished_at=job.finished_at))
+
+
+def requeue_stale(timeout=None, max_attempts=None):
+    """Return jobs whose worker died mid-run to the queue (or fail them)"""
+    timeout = timeout or settings.JOB_TIMEOUT
+    max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+    stale = Job.objects.filter(
+        status='running',
+        started_at__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    stale.filter(attempts__gte=max_attempts).update(
+        status='failed', error='Job timed out', finished_at=timezone.now()
+    )
+    return stale.filter(attempts__lt=max_attempts).update(status='queued', worker='')
+
+
+class WorkerPool:
+    """Fixed number of threads that each claim and run one job at a time"""
+
+    def __init__(self, concurrency=None, poll_interval=1.0, requeue_interval=None):
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval
+        self.requeue_interval = requeue_interval or settings.JOB_REQUEUE_INTERVAL
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.next_requeue = 0
+
+    def _requeue_due(self):
+        """True for one thread of the pool once every requeue_interval"""
+        now = time.monotonic()
+        with self.lock:
+            if now < self.next_requeue:
+                return False
+            self.next_requeue = now + self.requeue_interval
+            return True
+
+    def _work(self, index):
+        worker_name = f'{self.name}:{index}'
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                # Jobs of workers that died while this pool keeps running
+                if self._requeue_due():
+                    requeue_stale()
+                job = claim_next(worker_name)
+                if job is None:
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                run_job(job)
+        finally:
+            connection.close()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._work, args=(i,), daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        self.stopping.set()
@@ -0,0 +1,347 @@
+"""
+Gemini access with a two-tier response cache.
+
+Every model call goes through `generate_content`, which keys responses on
+a hash of (model name, generation_config, prompt). Lookups try a bounded
+in-process LRU first, then the `LLMResponse` table shared by all workers,
+and only then call the model. TTLs are per action (`LLM_CACHE_TTLS`), so
+polling an unchanged game costs no model calls at all. The model itself is
+whichever provider `LLM_PROVIDER` names (see providers.py).
+
+Model calls are guarded so a slow or failing upstream cannot stall the
+workers:
+
+- every call has a deadline per action (`LLM_TIMEOUTS`);
+- a model with a fallback (`LLM_FALLBACK_MODELS`, gemini-2.5-pro ->
+  gemini-2.5-flash) only gets its latency budget (`LLM_LATENCY_BUDGETS`)
+  before the rest of the deadline goes to the fallback;
+- each model has a circuit breaker (breaker.py) that opens after
+  `LLM_BREAKER_FAILURES` consecutive failures and skips the model for
+  `LLM_BREAKER_COOLDOWN` seconds.
+
+When no model answers, the last stored response is served instead: the
+same prompt's, even if expired, or else the latest one for the caller's
+`scope` (e.g. one game's commentary). Expired rows are kept
+`LLM_STALE_TTL` seconds for this. Only without any of those does the call
+raise LLMUnavailable.
+
+`agenerate_content` can also stream the answer to an `on_text` callback as
+the model writes it. Falling back to another model or a stored response is
+only possible until the first chunk has been passed on; a model failing
+after that raises LLMError.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import aclosing
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from cachetools import TLRUCache
+from django.conf import settings
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from . import metrics, providers
+from .breaker import CircuitBreaker
+from .providers import LLMError, LLMTimeout
+from .models import LLMResponse
+
+# Purge expired rows from the shared tier every this many writes
+PURGE_EVERY = 100
+
+_memory = TLRUCache(
+    maxsize=settings.LLM_CACHE_MAX_ENTRIES,
+    ttu=lambda key, value, now: value[1],
+    timer=time.time,
+)
+_lock = threading.Lock()
+_counters = Counter()
+# Model name -> CircuitBreaker
+_breakers = {}
+
+
+class LLMUnavailable(LLMError):
+    """No model answered in time and there is no stored response to fall back to"""
+
+    def __init__(self, message, retry_after=0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    payload = json.dumps([model_name, generation_config or {}, prompt], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _ttl(action):
+    return settings.LLM_CACHE_TTLS.get(action, settings.LLM_CACHE_TTLS['default'])
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+        return _counters[name]
+
+
+def _remember(key, text, expires_at):
+    with _lock:
+        _memory[key] = (text, expires_at)
+
+
+def _from_memory(key):
+    with _lock:
+        cached = _memory.get(key)
+    if cached is None:
+        return None
+    _count('memory_hits')
+    return cached[0]
+
+
+def _from_db(key):
+    stored = LLMResponse.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+    if stored is None:
+        _count('misses')
+        return None
+    _count('db_hits')
+    LLMResponse.objects.filter(pk=stored.pk).update(hits=F('hits') + 1)
+    _remember(key, stored.response_text, stored.expires_at.timestamp())
+    return stored.response_text
+
+
+def _scope_key(scope):
+    return cache_key('scope', scope)
+
+
+def _stale(key, scope):
+    """The stored response for `key`, expired or not, else the latest for `scope`"""
+    keys = [key] + ([_scope_key(scope)] if scope else [])
+    stored = dict(LLMResponse.objects.filter(key__in=keys).values_list('key', 'response_text'))
+    for candidate in keys:
+        if candidate in stored:
+            _count('stale_served')
+            return stored[candidate]
+    return None
+
+
+def _store(key, model_name, action, text, scope=None):
+    now = timezone.now()
+    rows = []
+    ttl = _ttl(action)
+    if ttl > 0:
+        rows.append((key, now + timedelta(seconds=ttl)))
+    if scope:
+        # Only ever read as a stale fallback, so it is born expired
+        rows.append((_scope_key(scope), now))
+    # One upsert for both rows
+    LLMResponse.objects.bulk_create(
+        [
+            LLMResponse(
+                key=row_key, model_name=model_name, action=action,
+                response_text=text, expires_at=expires_at,
+            )
+            for row_key, expires_at in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['key'],
+        update_fields=['model_name', 'action', 'response_text', 'expires_at'],
+    )
+    if ttl <= 0:
+        return
+    _remember(key, text, (now + timedelta(seconds=ttl)).timestamp())
+
+    if _count('writes') % PURGE_EVERY == 0:
+        LLMResponse.objects.filter(expires_at__lte=now - timedelta(seconds=settings.LLM_STALE_TTL)).delete()
+
+
+def get_breaker(model_name):
+    with _lock:
+        if model_name not in _breakers:
+            _breakers[model_name] = CircuitBreaker(
+                failures=settings.LLM_BREAKER_FAILURES,
+                cooldown=settings.LLM_BREAKER_COOLDOWN,
+            )
+        return _breakers[model_name]
+
+
+def _attempts(model_name, action):
+    """
+    Yield (model, timeout) for each model to try, in order, within the
+    action's deadline, skipping models whose breaker is open.
+    """
+    deadline = time.monotonic() + settings.LLM_TIMEOUTS.get(action, settings.LLM_TIMEOUTS['default'])
+    fallback = settings.LLM_FALLBACK_MODELS.get(model_name)
+    for name in [model_name] + ([fallback] if fallback else []):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if not get_breaker(name).allow():
+            _count('breaker_rejections')
+            continue
+        budget = settings.LLM_LATENCY_BUDGETS.get(name) if fallback and name == model_name else None
+        yield name, min(remaining, budget) if budget else remaining
+
+
+def _record(model_name, requested, error=None):
+    if error is None:
+        get_breaker(model_name).success()
+        if model_name != requested:
+            _count('fallbacks')
+        return
+    get_breaker(model_name).failure()
+    _count('timeouts' if isinstance(error, LLMTimeout) else 'errors')
+
+
+def _unavailable(model_name, error):
+    message = f'{model_name} unavailable: {error}' if error else f'{model_name} unavailable (circuit open)'
+    return LLMUnavailable(message, retry_after=round(get_breaker(model_name).retry_after()))
+
+
+def _call_model(model_name, prompt, generation_config, action):
+    error = None
+    for name, timeout in _attempts(model_name, action):
+        try:
+            with metrics.llm_call(name, action, prompt) as call:
+                text = call.response = providers.get_provider().generate(
+                    name, prompt, generation_config, timeout=timeout
+                )
+        except Exception as e:
+            _record(name, model_name, e)
+            error = e
+            continue
+        _record(name, model_name)
+        return text
+    raise _unavailable(model_name, error)
+
+
+async def _relay(stream, chunks, on_text):
+    async with aclosing(stream):
+        async for chunk in stream:
+            chunks.append(chunk)
+            on_text(chunk)
+    return ''.join(chunks)
+
+
+async def _acall_model(model_name, prompt, generation_config, action, on_text=None):
+    error = None
+    for name, timeout in _attempts(model_name, action):
+        provider = providers.get_provider()
+        chunks = []
+        try:
+            with metrics.llm_call(name, action, prompt) as call:
+                if on_text is None:
+                    answer = provider.agenerate(name, prompt, generation_config, timeout=timeout)
+                else:
+                    stream = provider.astream(name, prompt, generation_config, timeout=timeout)
+                    answer = _relay(stream, chunks, on_text)
+                text = call.response = await asyncio.wait_for(answer, timeout)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = LLMTimeout(f'{name} did not answer within {timeout:.1f}s')
+            _record(name, model_name, e)
+            if chunks:
+                # Part of this answer is out already; no other can finish it
+                raise LLMError(f'{name} failed mid-answer: {e}') from e
+            error = e
+            continue
+        _record(name, model_name)
+        return text
+    raise _unavailable(model_name, error)
+
+
+def generate_content(model_name, prompt, generation_config=None, action='', scope=None):
+    """
+    Return the model's response text for `prompt`, from cache when possible.
+
+    `scope` names what the prompt is about (e.g. "live_commentary:12"); the
+    latest response for it is the fallback when the model is unavailable.
+    """
+    key = cache_key(model_name, prompt, generation_config)
+    text = _from_memory(key)
+    if text is None:
+        text = _from_db(key)
+    if text is None:
+        try:
+            text = _call_model(model_name, prompt, generation_config, action)
+        except LLMUnavailable:
+            text = _stale(key, scope)
+            if text is None:
+                raise
+            return text
+        _store(key, model_name, action, text, scope)
+    return text
+
+
+async def agenerate_content(model_name, prompt, generation_config=None, action='', scope=None, on_text=None):
+    """
+    Async generate_content for the ASGI views: the model call is awaited
+    instead of holding a thread, only the shared-tier reads and writes hop
+    to a thread.
+
+    With `on_text`, the model streams its answer and each chunk is passed
+    to `on_text` as it arrives (a cached or stored answer as one chunk);
+    the full text is still returned and cached.
+    """
+    key = cache_key(model_name, prompt, generation_config)
+    text = _from_memory(key)
+    if text is None:
+        text = await sync_to_async(_from_db)(key)
+    if text is None:
+        try:
+            text = await _acall_model(model_name, prompt, generation_config, action, on_text)
+        except LLMUnavailable:
+            text = await sync_to_async(_stale)(key, scope)
+            if text is None:
+                raise
+            if on_text is not None:
+                on_text(text)
+            return text
+        await sync_to_async(_store)(key, model_name, action, text, scope)
+    elif on_text is not None:
+        on_text(text)
+    return text
+
+
+def cache_stats():
+    """Hit/miss counters for this process plus the shared tier's totals"""
+    with _lock:
+        memory_entries = len(_memory)
+        counters = dict(_counters)
+    memory_hits = counters.get('memory_hits', 0)
+    db_hits = counters.get('db_hits', 0)
+    misses = counters.get('misses', 0)
+    lookups = memory_hits + db_hits + misses
+    hits = memory_hits + db_hits
+    live = LLMResponse.objects.filter(expires_at__gt=timezone.now())
+    shared = live.aggregate(entries=Count('id'), hits=Sum('hits'))
+    return {
+        'process': {
+            'memory_hits': memory_hits,
+            'db_hits': db_hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+            'memory_entries': memory_entries,
+            'memory_max_entries': _memory.maxsize,
+        },
+        'shared': {
+            'entries': shared['entries'],
+            'hits': shared['hits'] or 0,
+        },
+        'resilience': {
+            'timeouts': counters.get('timeouts', 0),
+            'errors': counters.get('errors', 0),
+            'fallbacks': counters.get('fallbacks', 0),
+            'breaker_rejections': counters.get('breaker_rejections', 0),
+            'stale_served': counters.get('stale_served', 0),
+            'breakers': {name: circuit.state for name, circuit in list(_breakers.items())},
+        },
+    }
+
+
+def clear_memory_cache():
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from game import services
+from game.models import Game
+
+
+class RateLimiter:
+    """Spaces calls to `acquire` at least 60 / per_minute seconds apart, across threads"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+        time.sleep(start - now)
+
+
+class Command(BaseCommand):
+    help = 'Generate AI summaries for completed games that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.SUMMARY_BACKFILL_CONCURRENCY,
+            help='Summaries generated at the same time',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=settings.SUMMARY_BACKFILL_RATE,
+            help='Maximum summaries started per minute (0 for no limit)',
+        )
+        parser.add_argument('--limit', type=int, help='Stop after this many games')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the games missing a summary')
+
+    def handle(self, *args, **options):
+        pending = (
+            Game.objects
+            .filter(is_completed=True, summary__isnull=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        total = pending.count()
+        if options['limit'] is not None:
+            total = min(total, options['limit'])
+        if options['dry_run'] or not total:
+            self.stdout.write(f'{total} completed games without a summary')
+            return
+
+        limiter = RateLimiter(options['rate'])
+        concurrency = max(1, options['concurrency'])
+        counts = {'created': 0, 'existing': 0, 'failed': 0}
+        started = time.monotonic()
+
+        def summarize(pk):
+            limiter.acquire()
+            try:
+                _, created = services.generate_summary_once(Game.objects.get(pk=pk))
+                return created
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='summary') as executor:
+            # Keep only a couple of games per thread queued, so an interrupted
+            # run has not pulled the whole backlog into the pool.
+            futures = {}
+            for pk in list(pending[:total]):
+                futures[executor.submit(summarize, pk)] = pk
+                if len(futures) >= concurrency * 2:
+                    self._collect(futures, counts, started, total)
+            while futures:
+                self._collect(futures, counts, started, total)
+
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['created']} summaries ({counts['existing']} already existed, "
+            f"{counts['failed']} failed) in {time.monotonic() - started:.0f}s"
+        ))
+
+    def _collect(self, futures, counts, started, total):
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            pk = futures.pop(future)
+            error = future.exception()
+            if error is not None:
+                counts['failed'] += 1
+                self.stderr.write(f'Game {pk}: {error}')
+            else:
+                counts['created' if future.result() else 'existing'] += 1
+        finished = sum(counts.values())
+        self.stdout.write(
+            f'{finished}/{total} games, {finished / max(time.monotonic() - started, 1e-9) * 60:.1f}/min',
+            ending='\r',
+        )
+        self.stdout.flush()
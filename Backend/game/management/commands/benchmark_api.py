@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.benchmark import clear_fixture, run_benchmarks, seed_fixture
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint against a seeded fixture, with query budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Seed fixture games before measuring')
+        parser.add_argument('--games', type=int, default=100_000, help='Games to seed (default: 100k)')
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--only', nargs='*', help='Only endpoints whose name starts with one of these')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Earlier JSON report to print changes against')
+        parser.add_argument('--clear', action='store_true', help='Delete the fixture and exit')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {clear_fixture()} fixture games')
+            return
+        if options['seed']:
+            events = seed_fixture(options['games'], progress=self.progress)
+            self.stdout.write(f"\nSeeded {options['games']} games with {events} events")
+
+        try:
+            report = run_benchmarks(options['runs'], options['only'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = {result['name']: result for result in json.load(f)['results']}
+
+        self.stdout.write(f"{'endpoint':<40} {'median':>9} {'p95':>9} {'queries':>9}")
+        for result in report['results']:
+            line = (
+                f"{result['name']:<40} {result['median_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+                f"{result['queries']:>4}/{result['query_budget']:<4}"
+            )
+            before = baseline.get(result['name'])
+            if before:
+                change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+                line += f"  {change:+.0f}% median, {result['queries'] - before['queries']:+d} queries"
+            if not result['ok']:
+                line = self.style.ERROR(f"{line}  statuses {result['statuses']}")
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        failed = [result['name'] for result in report['results'] if not result['ok']]
+        if failed:
+            raise CommandError(f"Over query budget or wrong status: {', '.join(failed)}")
+
+    def progress(self, done, total, events):
+        self.stdout.write(f'Seeded {done}/{total} games, {events} events', ending='\r')
+        self.stdout.flush()
@@ -0,0 +1,70 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.benchmark import GAME_PREFIX, clear_fixture, seed_fixture
+from game.context import GameContext
+from game.models import Game, GameEvent
+
+
+def hot_queries(game):
+    """The per-game queries behind the game endpoints, keyed by caller"""
+    events = GameEvent.objects.filter(game=game).order_by('id')
+    # A client 20 events behind
+    behind = list(events.order_by('-id').values_list('id', 'block_height')[20:21])
+    since_id, since_block = behind[0] if behind else (0, 0)
+    return {
+        'events?type=': events.filter(event_type='player_eliminated'),
+        'events?since_id=': events.filter(id__gt=since_id),
+        'events?since_block=': events.filter(block_height__gt=since_block),
+        # What the commentary, summary and prediction actions read
+        'GameContext: players': GameContext.players_query(game),
+        'GameContext: events': GameContext.events_query(game),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time the hot per-game queries against the seeded benchmark fixture'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Seed fixture games before measuring')
+        parser.add_argument(
+            '--games', type=int, default=300_000, help='Games to seed (default: 300k, about 10M events)'
+        )
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query')
+        parser.add_argument('--clear', action='store_true', help='Delete the fixture and exit')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {clear_fixture()} fixture games')
+            return
+        if options['seed']:
+            events = seed_fixture(options['games'], progress=self.progress)
+            self.stdout.write(f"\nSeeded {options['games']} games with {events} events")
+
+        # The newest finished game: a full set of players and spins
+        game = (
+            Game.objects.filter(game_id__startswith=GAME_PREFIX, status=Game.STATUS_COMPLETED)
+            .order_by('-pk').first()
+        )
+        if game is None:
+            raise CommandError('No fixture games found; run with --seed first')
+
+        self.stdout.write(f'{GameEvent.objects.count()} events in table, measuring game {game.game_id}')
+        for name, queryset in hot_queries(game).items():
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{name}: median {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms'
+            ))
+            self.stdout.write(queryset.explain())
+
+    def progress(self, done, total, events):
+        self.stdout.write(f'Seeded {done}/{total} games, {events} events', ending='\r')
+        self.stdout.flush()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from game.projections import check_game_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized Game counters and report (or fix) any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Overwrite drifted counters with recomputed values')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Games read and written per batch')
+
+    def handle(self, *args, **options):
+        report = check_game_counters(fix=options['fix'], batch_size=options['batch_size'])
+        for game_id, fields in report.items():
+            changes = ', '.join(f'{name} {stored} != {expected}' for name, (stored, expected) in fields.items())
+            self.stdout.write(f'Game {game_id}: {changes}')
+
+        if not report:
+            self.stdout.write(self.style.SUCCESS('All game counters are consistent'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Fixed counters on {len(report)} games'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(report)} games have drifted; rerun with --fix to correct'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from game.indexer import ChainIndexer, get_chain_source
+
+
+class Command(BaseCommand):
+    help = 'Ingest Breevs contract events from a Stacks API node or a recorded JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            help='Stacks API base URL or path to a recorded JSON file (default: STACKS_API_URL)',
+        )
+        parser.add_argument('--batch-blocks', type=int, default=100, help='Blocks written per transaction')
+        parser.add_argument('--follow', action='store_true', help='Keep polling for new blocks')
+        parser.add_argument('--poll-interval', type=float, default=10, help='Seconds between polls with --follow')
+
+    def handle(self, *args, **options):
+        indexer = ChainIndexer(get_chain_source(options['source']), batch_blocks=options['batch_blocks'])
+
+        while True:
+            started = time.monotonic()
+            blocks, events = indexer.run_once()
+            elapsed = time.monotonic() - started
+            if blocks:
+                self.stdout.write(
+                    f'Indexed {events} events from {blocks} blocks in {elapsed:.2f}s '
+                    f'({events / elapsed if elapsed else events:.0f} events/s), '
+                    f'checkpoint at block {indexer.get_checkpoint()}'
+                )
+            if not options['follow']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from game.projections import rebuild_player_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the PlayerStats table from all completed games'
+
+    def handle(self, *args, **options):
+        wallets = rebuild_player_stats()
+        self.stdout.write(f'Rebuilt stats for {wallets} wallets')
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from game.jobs import WorkerPool
+
+
+class Command(BaseCommand):
+    help = 'Run the background worker pool for queued AI jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_WORKER_CONCURRENCY,
+            help='Number of jobs run at the same time',
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue polls when idle')
+
+    def handle(self, *args, **options):
+        pool = WorkerPool(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"Worker {pool.name} running {pool.concurrency} job slots")
+        pool.run()
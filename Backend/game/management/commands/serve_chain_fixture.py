@@ -0,0 +1,75 @@
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from game.indexer import FixtureChainSource
+
+
+class Command(BaseCommand):
+    help = 'Serve a recorded JSON file of contract transactions as a local stand-in Stacks API node'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Path to the recorded transactions JSON file')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3999)
+
+    def handle(self, *args, **options):
+        source = FixtureChainSource(options['fixture'])
+        newest_first = list(reversed(source.transactions))
+        by_id = {tx['tx_id']: tx for tx in source.transactions}
+        tip = newest_first[0]['block_height'] if newest_first else 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+
+                if re.fullmatch(r'/extended/v1/address/[^/]+/transactions', url.path):
+                    limit = int(params.get('limit', ['50'])[0])
+                    offset = int(params.get('offset', ['0'])[0])
+                    until = int(params.get('until_block', [str(tip)])[0])
+                    listed = [tx for tx in newest_first if tx['block_height'] <= until]
+                    body = {
+                        'limit': limit,
+                        'offset': offset,
+                        'total': len(listed),
+                        # Like the real listing, events are fetched separately
+                        'results': [
+                            {key: value for key, value in tx.items() if key != 'events'}
+                            for tx in listed[offset:offset + limit]
+                        ],
+                    }
+                elif url.path == '/extended/v1/block':
+                    body = {'limit': 1, 'offset': 0, 'total': tip, 'results': [{'height': tip}]}
+                elif url.path == '/extended/v1/tx/multiple':
+                    body = {
+                        tx_id: {'found': True, 'result': by_id[tx_id]} if tx_id in by_id else {'found': False}
+                        for tx_id in params.get('tx_id', [])
+                    }
+                elif url.path.startswith('/extended/v1/tx/') and url.path[16:] in by_id:
+                    body = by_id[url.path[16:]]
+                else:
+                    self.send_error(404)
+                    return
+
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(
+            f"Serving {len(by_id)} transactions on http://{options['host']}:{options['port']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
@@ -0,0 +1,250 @@
+"""
+Per-request metrics: SQL, model calls and serialization.
+
+`MetricsMiddleware` opens a `RequestMetrics` for every request in a context
+variable (which asgiref carries into sync_to_async threads), and the code
+doing the work adds to it:
+
+- every database connection gets an execute wrapper (signals.py) that
+  counts queries and their time;
+- llm.py wraps each model call in `llm_call`: model, latency, outcome and
+  prompt/response sizes in characters;
+- `TimedJSONRenderer` (DRF) times encoding the response.
+
+When the response leaves, the totals go into Prometheus histograms labelled
+by the route's view name, exported in the text format at /metrics, and are
+sent back in a Server-Timing header, e.g.
+
+    Server-Timing: db;dur=4.1;desc="9 queries", llm;dur=812.0;desc="gemini-2.5-flash 2210/480 chars",
+                   serialize;dur=0.3, app;dur=6.2, total;dur=822.6
+
+so `curl -sI` on a slow endpoint shows where its time went. "app" is the
+rest: Python in the view, middleware and serializers.
+
+Each worker process keeps its own histograms. With several workers set
+PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) and /metrics aggregates
+all of them.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from rest_framework.renderers import JSONRenderer
+
+from .providers import LLMTimeout
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+REQUEST_SECONDS = Histogram(
+    'breevs_request_duration_seconds', 'Request latency', ['endpoint', 'method', 'status'],
+    buckets=REQUEST_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    'breevs_request_db_seconds', 'Time in SQL queries per request', ['endpoint'], buckets=REQUEST_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    'breevs_request_db_queries', 'SQL queries per request', ['endpoint'], buckets=QUERY_BUCKETS,
+)
+REQUEST_LLM_SECONDS = Histogram(
+    'breevs_request_llm_seconds', 'Time in model calls per request', ['endpoint'], buckets=LLM_BUCKETS,
+)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    'breevs_request_serialize_seconds', 'Response encoding time per request', ['endpoint'],
+    buckets=REQUEST_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    'breevs_llm_call_duration_seconds', 'Model call latency', ['model', 'action', 'outcome'], buckets=LLM_BUCKETS,
+)
+LLM_PROMPT_CHARS = Histogram(
+    'breevs_llm_prompt_chars', 'Prompt size in characters', ['model'], buckets=SIZE_BUCKETS,
+)
+LLM_RESPONSE_CHARS = Histogram(
+    'breevs_llm_response_chars', 'Response size in characters', ['model'], buckets=SIZE_BUCKETS,
+)
+
+
+class RequestMetrics:
+    """What one request spent, filled in while it runs"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.llm_calls = []
+
+
+class LLMCall:
+    def __init__(self, model_name, action, prompt):
+        self.model_name = model_name
+        self.action = action
+        self.prompt_chars = len(prompt)
+        self.response = None
+        self.outcome = 'ok'
+        self.seconds = 0.0
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def current():
+    """The running request's RequestMetrics, or None outside a request"""
+    return _current.get()
+
+
+def timed_execute(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def instrument_connection(connection):
+    if timed_execute not in connection.execute_wrappers:
+        # First, so `connection.execute_wrapper()` blocks that were open when
+        # the connection was made still pop their own wrapper
+        connection.execute_wrappers.insert(0, timed_execute)
+
+
+@contextmanager
+def timer(name):
+    """Add the block's duration to the current request's `<name>_seconds`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            setattr(metrics, f'{name}_seconds', getattr(metrics, f'{name}_seconds') + time.perf_counter() - started)
+
+
+@contextmanager
+def llm_call(model_name, action, prompt):
+    """
+    Time one model call; set `.response` on the yielded LLMCall to record
+    the answer's size.
+    """
+    call = LLMCall(model_name, action or 'default', prompt)
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        call.outcome = 'timeout' if isinstance(e, (LLMTimeout, TimeoutError)) else 'error'
+        raise
+    finally:
+        call.seconds = time.perf_counter() - started
+        LLM_SECONDS.labels(model_name, call.action, call.outcome).observe(call.seconds)
+        LLM_PROMPT_CHARS.labels(model_name).observe(call.prompt_chars)
+        if call.response is not None:
+            LLM_RESPONSE_CHARS.labels(model_name).observe(len(call.response))
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.llm_calls.append(call)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timer('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    # Unresolved paths share one label so scanners can't grow the series
+    return match.view_name if match else 'unmatched'
+
+
+def server_timing(metrics, total):
+    """Server-Timing header value for a finished request"""
+    llm_seconds = sum(call.seconds for call in metrics.llm_calls)
+    entries = [f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"']
+    if metrics.llm_calls:
+        models = ', '.join(
+            f'{call.model_name} {call.prompt_chars}/{len(call.response or "")} chars'
+            + ('' if call.outcome == 'ok' else f' {call.outcome}')
+            for call in metrics.llm_calls
+        )
+        entries.append(f'llm;dur={llm_seconds * 1000:.1f};desc="{models}"')
+    app = total - metrics.db_seconds - llm_seconds - metrics.serialize_seconds
+    entries += [
+        f'serialize;dur={metrics.serialize_seconds * 1000:.1f}',
+        f'app;dur={max(app, 0) * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    return ', '.join(entries)
+
+
+def record(request, response, metrics):
+    total = time.perf_counter() - metrics.started
+    endpoint = _endpoint(request)
+    REQUEST_SECONDS.labels(endpoint, request.method, f'{response.status_code // 100}xx').observe(total)
+    REQUEST_DB_SECONDS.labels(endpoint).observe(metrics.db_seconds)
+    REQUEST_DB_QUERIES.labels(endpoint).observe(metrics.queries)
+    REQUEST_SERIALIZE_SECONDS.labels(endpoint).observe(metrics.serialize_seconds)
+    if metrics.llm_calls:
+        REQUEST_LLM_SECONDS.labels(endpoint).observe(sum(call.seconds for call in metrics.llm_calls))
+    response['Server-Timing'] = server_timing(metrics, total)
+    return response
+
+
+class MetricsMiddleware:
+    """Collects RequestMetrics for each request; first in MIDDLEWARE so it sees the whole request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return record(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return record(request, response, metrics)
+
+
+def export(request):
+    """GET /metrics: the histograms in the Prometheus text format"""
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
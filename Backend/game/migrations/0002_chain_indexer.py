@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('block_height', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='gameevent',
+            name='event_type',
+            field=models.CharField(choices=[('game_created', 'Game Created'), ('player_joined', 'Player Joined'), ('game_started', 'Game Started'), ('player_survived', 'Player Survived'), ('player_eliminated', 'Player Eliminated'), ('shield_used', 'Shield Used'), ('round_advanced', 'Round Advanced'), ('game_completed', 'Game Completed'), ('prize_claimed', 'Prize Claimed')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_chain_indexer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet_address', models.CharField(max_length=100, unique=True)),
+                ('games_played', models.IntegerField(default=0)),
+                ('games_won', models.IntegerField(default=0)),
+                ('total_winnings', models.BigIntegerField(default=0, help_text='Micro-STX won')),
+                ('total_staked', models.BigIntegerField(default=0, help_text='Micro-STX staked')),
+                ('win_rate', models.FloatField(default=0, help_text='games_won / games_played as a percentage')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'ordering': ['-win_rate', '-total_winnings', 'id'],
+                'indexes': [models.Index(fields=['-win_rate', '-total_winnings', 'id'], name='game_leader_win_rat_60f082_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_llm_response_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet_address', models.CharField(max_length=100, unique=True)),
+                ('games_played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('total_rounds_survived', models.IntegerField(default=0, help_text='Elimination round, or the final round for the winner, summed over games')),
+                ('risk_mode_uses', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Player stats',
+            },
+        ),
+    ]
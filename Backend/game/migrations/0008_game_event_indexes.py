@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_player_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameevent',
+            index=models.Index(fields=['game', 'event_type', 'block_height'], name='event_game_type_block_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameevent',
+            index=models.Index(fields=['game', 'player_address', 'event_type'], name='event_game_player_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameevent',
+            index=models.Index(fields=['game', 'block_height'], name='event_game_block_idx'),
+        ),
+    ]
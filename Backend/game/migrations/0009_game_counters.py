@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:28
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Game = apps.get_model('game', 'Game')
+    GameEvent = apps.get_model('game', 'GameEvent')
+
+    def count(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(game=OuterRef('pk'))
+            .order_by()
+            .values('game')
+            .annotate(total=Count('id'))
+            .values('total')
+        ), Value(0), output_field=IntegerField())
+
+    Game.objects.update(
+        total_players=count(Game.players.through.objects.all()),
+        total_spins=count(GameEvent.objects.filter(event_type__in=['player_survived', 'player_eliminated'])),
+        shield_uses=count(GameEvent.objects.filter(event_type='shield_used')),
+        eliminations=count(GameEvent.objects.filter(event_type='player_eliminated')),
+    )
+    Game.objects.update(active_players=F('total_players') - F('eliminations'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_game_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='active_players',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='eliminations',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='shield_uses',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='total_players',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='total_spins',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
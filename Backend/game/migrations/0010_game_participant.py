@@ -0,0 +1,144 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_memberships(apps, schema_editor):
+    """
+    Move Game.players rows into GameParticipant.
+
+    Elimination rounds come from the game's own player_eliminated events
+    where there are any; otherwise the old global Player flags are copied.
+    """
+    Game = apps.get_model('game', 'Game')
+    GameEvent = apps.get_model('game', 'GameEvent')
+    GameParticipant = apps.get_model('game', 'GameParticipant')
+
+    eliminated_rounds = {
+        (game_id, address): event_data.get('round')
+        for game_id, address, event_data in (
+            GameEvent.objects
+            .filter(event_type='player_eliminated')
+            .values_list('game_id', 'player_address', 'event_data')
+            .iterator()
+        )
+    }
+    memberships = (
+        Game.players.through.objects
+        .order_by('game_id', 'id')
+        .values_list(
+            'game_id', 'player_id', 'player__wallet_address',
+            'player__eliminated', 'player__eliminated_round', 'player__used_risk_mode',
+        )
+        .iterator()
+    )
+
+    batch, positions = [], {}
+    for game_id, player_id, address, eliminated, eliminated_round, used_risk_mode in memberships:
+        positions[game_id] = positions.get(game_id, 0) + 1
+        if (game_id, address) in eliminated_rounds:
+            eliminated, eliminated_round = True, eliminated_rounds[(game_id, address)]
+        batch.append(GameParticipant(
+            game_id=game_id,
+            player_id=player_id,
+            join_position=positions[game_id],
+            eliminated=eliminated,
+            eliminated_round=eliminated_round,
+            used_risk_mode=used_risk_mode,
+        ))
+        if len(batch) >= 1000:
+            GameParticipant.objects.bulk_create(batch)
+            batch = []
+    GameParticipant.objects.bulk_create(batch)
+
+
+def copy_memberships_back(apps, schema_editor):
+    """
+    Move GameParticipant rows back into Game.players and the Player flags.
+
+    The old flags are per player, not per game, so each player gets those of
+    their latest game, as the code before this migration left them.
+    """
+    Game = apps.get_model('game', 'Game')
+    Player = apps.get_model('game', 'Player')
+    GameParticipant = apps.get_model('game', 'GameParticipant')
+    Membership = Game.players.through
+
+    participants = (
+        GameParticipant.objects
+        .order_by('game_id', 'join_position')
+        .values_list('game_id', 'player_id', 'eliminated', 'eliminated_round', 'used_risk_mode')
+        .iterator()
+    )
+    batch, flags = [], {}
+    for game_id, player_id, eliminated, eliminated_round, used_risk_mode in participants:
+        batch.append(Membership(game_id=game_id, player_id=player_id))
+        flags[player_id] = (eliminated, eliminated_round, used_risk_mode)
+        if len(batch) >= 1000:
+            Membership.objects.bulk_create(batch)
+            batch = []
+    Membership.objects.bulk_create(batch)
+
+    players = list(Player.objects.filter(pk__in=flags))
+    for player in players:
+        player.eliminated, player.eliminated_round, player.used_risk_mode = flags[player.pk]
+    Player.objects.bulk_update(players, ['eliminated', 'eliminated_round', 'used_risk_mode'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_game_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('join_position', models.IntegerField()),
+                ('eliminated', models.BooleanField(default=False)),
+                ('eliminated_round', models.IntegerField(blank=True, null=True)),
+                ('used_risk_mode', models.BooleanField(default=False)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='game.game')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to='game.player')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='gameparticipant',
+            index=models.Index(fields=['player', 'game'], name='participant_player_game_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameparticipant',
+            index=models.Index(fields=['game', 'eliminated'], name='participant_game_elim_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gameparticipant',
+            constraint=models.UniqueConstraint(fields=('game', 'player'), name='unique_game_participant'),
+        ),
+        migrations.RunPython(copy_memberships, copy_memberships_back),
+        # Django cannot alter an M2M field to add `through`, so the old
+        # auto-created table is dropped and the field re-added.
+        migrations.RemoveField(
+            model_name='game',
+            name='players',
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='players',
+            field=models.ManyToManyField(related_name='games', through='game.GameParticipant', to='game.player'),
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='eliminated',
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='eliminated_round',
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='used_risk_mode',
+        ),
+    ]
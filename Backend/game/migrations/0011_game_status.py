@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:32
+
+from django.db import migrations, models
+
+
+def backfill_status(apps, schema_editor):
+    Game = apps.get_model('game', 'Game')
+    # The indexer keeps current_round at 0 until game-started
+    Game.objects.filter(is_completed=False, current_round__gte=1).update(status=1)
+    Game.objects.filter(is_completed=True).update(status=2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0010_game_participant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='status',
+            field=models.IntegerField(choices=[(0, 'Created'), (1, 'In Progress'), (2, 'Completed')], default=0),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['-created_at', 'id'], name='game_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['status', '-created_at', 'id'], name='game_status_created_idx'),
+        ),
+    ]
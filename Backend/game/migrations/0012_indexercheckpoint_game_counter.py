@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+
+def backfill_game_counter(apps, schema_editor):
+    IndexerCheckpoint = apps.get_model('game', 'IndexerCheckpoint')
+    GameEvent = apps.get_model('game', 'GameEvent')
+    # Only indexed games have a game_created event; their ids are the
+    # contract's counter values
+    game_ids = (
+        GameEvent.objects
+        .filter(event_type='game_created')
+        .values_list('game__game_id', flat=True)
+    )
+    counter = max((int(game_id) for game_id in game_ids if game_id.isdigit()), default=0)
+    IndexerCheckpoint.objects.filter(name='breevs').update(game_counter=counter)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0011_game_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexercheckpoint',
+            name='game_counter',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_game_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    Job = apps.get_model('game', 'Job')
+    # Keep the oldest live job of each kind per game, as the constraint will
+    kept = set()
+    duplicates = []
+    active = (
+        Job.objects
+        .filter(status__in=['queued', 'running'], game__isnull=False)
+        .order_by('id')
+        .values_list('id', 'kind', 'game_id')
+    )
+    for pk, kind, game_id in active:
+        if (kind, game_id) in kept:
+            duplicates.append(pk)
+        else:
+            kept.add((kind, game_id))
+    Job.objects.filter(pk__in=duplicates).update(status='failed', error='Duplicate of an earlier job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0012_indexercheckpoint_game_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('kind', 'game'), name='unique_active_game_job'),
+        ),
+    ]
@@ -5,14 +5,20 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 class Player(models.Model):
     wallet_address = models.CharField(max_length=100, unique=True)
     joined_at = models.DateTimeField(auto_now_add=True)
-    eliminated = models.BooleanField(default=False)
-    eliminated_round = models.IntegerField(null=True, blank=True)
-    used_risk_mode = models.BooleanField(default=False)
 
     def __str__(self):
         return self.wallet_address
 
 class Game(models.Model):
+    # Mirrors the contract's STATUS-* constants
+    STATUS_CREATED = 0
+    STATUS_IN_PROGRESS = 1
+    STATUS_COMPLETED = 2
+    STATUS_CHOICES = [
+        (STATUS_CREATED, 'Created'),
+        (STATUS_IN_PROGRESS, 'In Progress'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
     game_id = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     current_round = models.IntegerField(default=1)
@@ -20,15 +26,56 @@ class Game(models.Model):
     stake_amount = models.DecimalField(max_digits=20, decimal_places=2)
     winner_address = models.CharField(max_length=100, null=True, blank=True)
     is_completed = models.BooleanField(default=False)
-    players = models.ManyToManyField(Player, related_name='games')
+    status = models.IntegerField(choices=STATUS_CHOICES, default=STATUS_CREATED)
+    players = models.ManyToManyField(Player, related_name='games', through='GameParticipant')
+    # Maintained by the indexer as events are written (see game/projections.py)
+    total_players = models.IntegerField(default=0)
+    active_players = models.IntegerField(default=0)
+    total_spins = models.IntegerField(default=0)
+    shield_uses = models.IntegerField(default=0)
+    eliminations = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the games list, unfiltered and by status
+            models.Index(fields=['-created_at', 'id'], name='game_created_idx'),
+            models.Index(fields=['status', '-created_at', 'id'], name='game_status_created_idx'),
+        ]
 
 
+class GameParticipant(models.Model):
+    """A player's seat in one game, with their per-game state"""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='participants')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='participations')
+    join_position = models.IntegerField()
+    eliminated = models.BooleanField(default=False)
+    eliminated_round = models.IntegerField(null=True, blank=True)
+    used_risk_mode = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'player'], name='unique_game_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['player', 'game'], name='participant_player_game_idx'),
+            models.Index(fields=['game', 'eliminated'], name='participant_game_elim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.player.wallet_address} in game {self.game.game_id}"
+
 
 class GameEvent(models.Model):
     EVENT_TYPES = [
+        ('game_created', 'Game Created'),
+        ('player_joined', 'Player Joined'),
+        ('game_started', 'Game Started'),
         ('player_survived', 'Player Survived'),
         ('player_eliminated', 'Player Eliminated'),
         ('shield_used', 'Shield Used'),
+        ('round_advanced', 'Round Advanced'),
+        ('game_completed', 'Game Completed'),
+        ('prize_claimed', 'Prize Claimed'),
     ]
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='events')
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
@@ -36,10 +83,171 @@ class GameEvent(models.Model):
     event_data = models.JSONField(default=dict)
     block_height = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            # events?type=, eliminations/shields in summaries and tension
+            models.Index(fields=['game', 'event_type', 'block_height'], name='event_game_type_block_idx'),
+            # per-player survival counts in predict_outcome
+            models.Index(fields=['game', 'player_address', 'event_type'], name='event_game_player_type_idx'),
+            # latest events, since_block deltas and summary ordering
+            models.Index(fields=['game', 'block_height'], name='event_game_block_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_event_type_display()} - Game {self.game.game_id}"
 
 
+class LeaderboardEntry(models.Model):
+    """Per-wallet mirror of the contract's `user-stats` map, maintained by the indexer"""
+    wallet_address = models.CharField(max_length=100, unique=True)
+    games_played = models.IntegerField(default=0)
+    games_won = models.IntegerField(default=0)
+    total_winnings = models.BigIntegerField(default=0, help_text="Micro-STX won")
+    total_staked = models.BigIntegerField(default=0, help_text="Micro-STX staked")
+    win_rate = models.FloatField(default=0, help_text="games_won / games_played as a percentage")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-win_rate', '-total_winnings', 'id']
+        verbose_name_plural = 'Leaderboard entries'
+        indexes = [
+            models.Index(fields=['-win_rate', '-total_winnings', 'id']),
+        ]
+
+    def refresh_win_rate(self):
+        self.win_rate = round(self.games_won / self.games_played * 100, 2) if self.games_played else 0
+
+    def __str__(self):
+        return f"{self.wallet_address}: {self.games_won}/{self.games_played}"
+
+
+class PlayerStats(models.Model):
+    """Per-wallet totals over completed games, updated as games complete"""
+    wallet_address = models.CharField(max_length=100, unique=True)
+    games_played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    total_rounds_survived = models.IntegerField(
+        default=0, help_text="Elimination round, or the final round for the winner, summed over games"
+    )
+    risk_mode_uses = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Player stats'
+
+    @property
+    def win_rate(self):
+        return round(self.wins / self.games_played * 100, 2) if self.games_played else 0
+
+    @property
+    def average_survival_rounds(self):
+        return round(self.total_rounds_survived / self.games_played, 2) if self.games_played else 0
+
+    def __str__(self):
+        return f"{self.wallet_address}: {self.wins}/{self.games_played}"
+
+
+class Job(models.Model):
+    """Queued run of a slow (LLM-bound) action, processed by `manage.py run_jobs`"""
+
+    KINDS = [
+        ('generate_live_commentary', 'Generate Live Commentary'),
+        ('generate_summary', 'Generate Summary'),
+        ('predict_outcome', 'Predict Outcome'),
+        ('compare_strategies', 'Compare Strategies'),
+    ]
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KINDS)
+    game = models.ForeignKey('Game', on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # At most one live job of each kind per game
+            models.UniqueConstraint(
+                fields=['kind', 'game'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_game_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job #{self.pk} ({self.status})"
+
+
+class SingleFlight(models.Model):
+    """
+    Cross-process lock and result slot for one in-flight computation.
+
+    The row's unique key is the lock: whoever inserts it computes, everyone
+    else waits for `status` to leave 'running' and reuses `result`.
+    """
+
+    STATUSES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    key = models.CharField(max_length=200, unique=True)
+    owner = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUSES, default='running')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
+
+
+class LLMResponse(models.Model):
+    """Cached model response, keyed by a hash of (model, generation_config, prompt)"""
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=50)
+    action = models.CharField(max_length=50, blank=True)
+    response_text = models.TextField()
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.model_name} {self.action} {self.key[:12]}"
+
+
+class IndexerCheckpoint(models.Model):
+    """Last chain block fully ingested by a named indexer"""
+    name = models.CharField(max_length=100, unique=True)
+    block_height = models.IntegerField(default=0)
+    # The contract's game-counter at block_height: the id printed by the
+    # latest game-created event
+    game_counter = models.IntegerField(default=0)
+    # Last time the indexer caught up with the chain
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ block {self.block_height}"
+
+
 class GameCommentary(models.Model):
     """Real-time AI commentary for games in progress"""
     
@@ -0,0 +1,137 @@
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which DjangoJSONEncoder truncates"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def keyset_filter(ordering, values):
+    """
+    Build a Q matching rows that sort strictly after `values` under `ordering`.
+
+    For ordering ('-a', 'b') and values (1, 2) this is
+    (a < 1) OR (a = 1 AND b > 2), i.e. a lexicographic row comparison that
+    respects mixed sort directions. The redundant a <= 1 bound in front lets
+    the database start an index range scan at the cursor instead of
+    filtering every row before it.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+def keyset_before(ordering, values):
+    """
+    Build a Q matching rows that sort strictly before `values` under `ordering`.
+
+    This is keyset_filter over the reversed ordering, so counting it walks
+    the same index from the start up to `values` rather than the table.
+    """
+    reversed_ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+    return keyset_filter(reversed_ordering, values)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, unique ordering.
+
+    Unlike DRF's CursorPagination (which seeks on the first ordering field and
+    uses an offset for ties) the cursor stores the full sort key of the last
+    row, so every page is a single indexed range scan regardless of depth.
+    The cursor also carries how many rows precede the page, which views can
+    use to number results.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['key'])
+            ]
+            return values, int(payload['position'])
+        except (ValueError, KeyError, TypeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, values, position):
+        payload = json.dumps({'key': values, 'position': position}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        key, self.position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if key is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, key))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        cursor = self.encode_cursor(values, self.position + len(self.page))
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class LeaderboardPagination(KeysetPagination):
+    ordering = ('-win_rate', '-total_winnings', 'id')
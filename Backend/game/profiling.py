@@ -0,0 +1,257 @@
+"""
+Opt-in cProfile runs of single API requests.
+
+With PROFILING_ENABLED on, a request carrying PROFILING_TOKEN in an
+`X-Profile` header or a `?profile=` query parameter runs under cProfile,
+with every SQL statement it issues timed and traced back to the project
+code that issued it. Everything else passes straight through.
+
+Each run is written to PROFILE_DIR as `<id>.prof` (load it with pstats or
+snakeviz) plus `<id>.json`: the request, its status and duration, the
+slowest functions and the top PROFILE_SQL_TOP statements by total time,
+each with its call sites, so an N+1 shows up as one statement with a large
+count from a single line. The directory is a ring: only the newest
+PROFILE_RING_SIZE runs (across all workers) are kept. The response carries
+the run's id in `X-Profile-Id`; /api/profiles/ lists the runs, given the
+same token in `X-Profile-Token` (see ProfileViewSet).
+
+cProfile sees one thread. A profiled request therefore runs its sync work
+(DRF views, the ORM, anything behind sync_to_async) on a single thread
+under the profiler; for the async views that is everything except the
+awaits on the model, which show up only as wall time.
+"""
+
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import pstats
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import BasePermission
+
+from . import metrics
+
+TOKEN_HEADER = 'X-Profile'
+TOKEN_PARAM = 'profile'
+# Reading the ring takes the token in its own header, so browsing the runs
+# does not profile (and rotate out) more of them
+INDEX_TOKEN_HEADER = 'X-Profile-Token'
+TOP_FUNCTIONS = 25
+CALL_SITE_DEPTH = 4
+CALL_SITES_PER_QUERY = 3
+
+_sequence = itertools.count()
+# Wrappers and middleware on every query's stack, not call sites
+_INSTRUMENTATION = {__file__, metrics.__file__}
+
+
+def token_matches(value):
+    token = settings.PROFILING_TOKEN
+    return bool(token and value) and hmac.compare_digest(value.encode(), token.encode())
+
+
+def requested(request):
+    return token_matches(request.headers.get(TOKEN_HEADER) or request.GET.get(TOKEN_PARAM))
+
+
+def _call_site():
+    """The innermost project frames of the current stack, outermost first"""
+    root = str(settings.BASE_DIR)
+    frames = [
+        f'{os.path.relpath(frame.filename, root)}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(root) and 'site-packages' not in frame.filename
+        and frame.filename not in _INSTRUMENTATION
+    ]
+    return tuple(frames[-CALL_SITE_DEPTH:])
+
+
+class SQLCapture:
+    """Execute wrapper timing every statement and where it came from"""
+
+    def __init__(self):
+        self.statements = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'max': 0.0, 'call_sites': Counter()})
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            statement = self.statements[sql]
+            statement['count'] += 1
+            statement['seconds'] += elapsed
+            statement['max'] = max(statement['max'], elapsed)
+            statement['call_sites'][_call_site()] += 1
+
+    @property
+    def queries(self):
+        return sum(statement['count'] for statement in self.statements.values())
+
+    @property
+    def seconds(self):
+        return sum(statement['seconds'] for statement in self.statements.values())
+
+    def top(self, limit):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        return [
+            {
+                'sql': sql,
+                'count': statement['count'],
+                'total_ms': round(statement['seconds'] * 1000, 3),
+                'max_ms': round(statement['max'] * 1000, 3),
+                'call_sites': [
+                    {'stack': list(stack), 'count': count}
+                    for stack, count in statement['call_sites'].most_common(CALL_SITES_PER_QUERY)
+                ],
+            }
+            for sql, statement in ranked[:limit]
+        ]
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler).sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:TOP_FUNCTIONS]:
+        primitive_calls, calls, own, cumulative, callers = stats.stats[func]
+        filename, line, name = func
+        functions.append({
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    return functions
+
+
+def _directory():
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def entries():
+    """Stored runs' metadata, newest first"""
+    found = []
+    for path in sorted(_directory().glob('*.json'), reverse=True):
+        try:
+            found.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # Pruned by another worker, or still being written
+            continue
+    return found
+
+
+def entry(entry_id):
+    try:
+        return json.loads((_directory() / f'{Path(entry_id).name}.json').read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def profile_path(entry_id):
+    path = _directory() / f'{Path(entry_id).name}.prof'
+    return path if path.exists() else None
+
+
+def _prune(directory):
+    runs = sorted(directory.glob('*.json'), reverse=True)
+    for stale in runs[settings.PROFILE_RING_SIZE:]:
+        for path in (stale, stale.with_suffix('.prof')):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _store(request, response, profiler, capture, elapsed):
+    directory = _directory()
+    # Sorts by time; the pid and sequence keep concurrent runs apart
+    entry_id = f'{timezone.now():%Y%m%dT%H%M%S%f}-{os.getpid()}-{next(_sequence)}'
+    profiler.dump_stats(directory / f'{entry_id}.prof')
+
+    query = urlencode([(key, value) for key, value in request.GET.items() if key != TOKEN_PARAM])
+    match = getattr(request, 'resolver_match', None)
+    meta = {
+        'id': entry_id,
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.path + (f'?{query}' if query else ''),
+        'endpoint': match.view_name if match else None,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 3),
+        'queries': capture.queries,
+        'db_ms': round(capture.seconds * 1000, 3),
+        'top_functions': _top_functions(profiler),
+        'slow_sql': capture.top(settings.PROFILE_SQL_TOP),
+    }
+    pending = directory / f'{entry_id}.json.tmp'
+    pending.write_text(json.dumps(meta, indent=2))
+    pending.replace(directory / f'{entry_id}.json')
+    _prune(directory)
+    return entry_id
+
+
+def profile(request, get_response):
+    """Run `get_response(request)` under cProfile and the SQL capture"""
+    profiler = cProfile.Profile()
+    capture = SQLCapture()
+    started = time.perf_counter()
+    with connection.execute_wrapper(capture):
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    elapsed = time.perf_counter() - started
+    response['X-Profile-Id'] = _store(request, response, profiler, capture, elapsed)
+    return response
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry the profiling token"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not requested(request):
+            return self.get_response(request)
+        return profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not requested(request):
+            return await self.get_response(request)
+        # Sync work under the async_to_sync call returns to this thread
+        return await sync_to_async(profile)(request, async_to_sync(self.get_response))
+
+
+class HasProfilingToken(BasePermission):
+    """The profiling token in the X-Profile-Token header; 404 while profiling is off"""
+
+    def has_permission(self, request, view):
+        if not settings.PROFILING_ENABLED:
+            raise NotFound()
+        return token_matches(request.headers.get(INDEX_TOKEN_HEADER))
@@ -0,0 +1,202 @@
+"""
+Incrementally maintained per-wallet tables and per-game counters.
+
+Writers collect deltas per wallet (`{address: Counter(field=delta)}`) for a
+whole batch and apply them with one bulk read and one bulk write per table,
+instead of an UPDATE per event. Game counters are applied with `F()`
+updates, one per game touched by the batch.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Game, GameEvent, GameParticipant, LeaderboardEntry, PlayerStats
+
+
+def apply_deltas(model, deltas, on_change=None):
+    """Add per-wallet `deltas` to `model` rows, creating missing ones"""
+    if not deltas:
+        return
+    entries = model.objects.in_bulk(deltas.keys(), field_name='wallet_address')
+    now = timezone.now()
+    changed_fields = {'updated_at'}
+    created, updated = [], []
+    for address, counts in deltas.items():
+        entry = entries.get(address)
+        if entry is None:
+            entry = model(wallet_address=address)
+            created.append(entry)
+        else:
+            entry.updated_at = now
+            updated.append(entry)
+        for field_name, delta in counts.items():
+            setattr(entry, field_name, getattr(entry, field_name) + delta)
+            changed_fields.add(field_name)
+        if on_change:
+            changed_fields.update(on_change(entry))
+
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, sorted(changed_fields))
+
+
+def apply_leaderboard_deltas(deltas):
+    def refresh(entry):
+        entry.refresh_win_rate()
+        return ['win_rate']
+
+    apply_deltas(LeaderboardEntry, deltas, on_change=refresh)
+
+
+def completed_game_deltas(winner_address, final_round, players, eliminated_rounds, risk_mode_players=()):
+    """PlayerStats deltas contributed by one completed game"""
+    deltas = defaultdict(Counter)
+    for address in players:
+        stats = deltas[address]
+        stats['games_played'] += 1
+        stats['wins'] += int(address == winner_address)
+        stats['total_rounds_survived'] += eliminated_rounds.get(address, final_round)
+        stats['risk_mode_uses'] += int(address in risk_mode_players)
+    return deltas
+
+
+def merge_deltas(target, deltas):
+    for address, counts in deltas.items():
+        target[address].update(counts)
+    return target
+
+
+def rebuild_player_stats():
+    """Recompute PlayerStats from scratch over all completed games"""
+    games = {
+        pk: {'winner': winner, 'round': final_round, 'players': [], 'eliminated': {}, 'risk': set()}
+        for pk, winner, final_round in (
+            Game.objects.filter(is_completed=True)
+            .values_list('pk', 'winner_address', 'current_round')
+            .iterator()
+        )
+    }
+    participants = (
+        GameParticipant.objects
+        .filter(game__is_completed=True)
+        .values_list('game_id', 'player__wallet_address', 'eliminated', 'eliminated_round', 'used_risk_mode')
+        .iterator()
+    )
+    for game_id, address, eliminated, eliminated_round, used_risk_mode in participants:
+        games[game_id]['players'].append(address)
+        if eliminated:
+            games[game_id]['eliminated'][address] = eliminated_round or 0
+        if used_risk_mode:
+            games[game_id]['risk'].add(address)
+
+    deltas = defaultdict(Counter)
+    for game in games.values():
+        merge_deltas(deltas, completed_game_deltas(
+            game['winner'], game['round'], game['players'], game['eliminated'], game['risk']
+        ))
+
+    with transaction.atomic():
+        PlayerStats.objects.all().delete()
+        PlayerStats.objects.bulk_create(
+            [PlayerStats(wallet_address=address, **counts) for address, counts in deltas.items()],
+            batch_size=1000,
+        )
+    return len(deltas)
+
+
+GAME_COUNTERS = ['total_players', 'active_players', 'total_spins', 'shield_uses', 'eliminations']
+
+# Game counters bumped by each written event type
+EVENT_COUNTERS = {
+    'player_survived': {'total_spins': 1},
+    'player_eliminated': {'total_spins': 1, 'eliminations': 1, 'active_players': -1},
+    'shield_used': {'shield_uses': 1},
+}
+
+
+def game_counter_deltas(events, joined_game_pks=(), deltas=None):
+    """Counter deltas per game pk for saved `events` and new memberships"""
+    deltas = deltas if deltas is not None else defaultdict(Counter)
+    for game_pk in joined_game_pks:
+        deltas[game_pk]['total_players'] += 1
+        deltas[game_pk]['active_players'] += 1
+    for event in events:
+        for field_name, delta in EVENT_COUNTERS.get(event.event_type, {}).items():
+            deltas[event.game_id][field_name] += delta
+    return deltas
+
+
+def apply_game_counter_deltas(deltas):
+    for game_pk, counts in deltas.items():
+        changes = {name: F(name) + delta for name, delta in counts.items() if delta}
+        if changes:
+            Game.objects.filter(pk=game_pk).update(**changes)
+
+
+def _event_count(*event_types):
+    return Coalesce(Subquery(
+        GameEvent.objects
+        .filter(game=OuterRef('pk'), event_type__in=event_types)
+        .order_by()
+        .values('game')
+        .annotate(total=Count('id'))
+        .values('total')
+    ), Value(0), output_field=IntegerField())
+
+
+def expected_game_counters():
+    """Annotations recomputing every counter from the event and membership tables"""
+    members = Coalesce(Subquery(
+        GameParticipant.objects
+        .filter(game=OuterRef('pk'))
+        .order_by()
+        .values('game')
+        .annotate(total=Count('id'))
+        .values('total')
+    ), Value(0), output_field=IntegerField())
+    eliminations = _event_count('player_eliminated')
+    return {
+        'expected_total_players': members,
+        'expected_active_players': members - eliminations,
+        'expected_total_spins': _event_count('player_survived', 'player_eliminated'),
+        'expected_shield_uses': _event_count('shield_used'),
+        'expected_eliminations': eliminations,
+    }
+
+
+def check_game_counters(fix=False, batch_size=1000):
+    """
+    Compare stored counters with recomputed ones.
+
+    Returns `{game_id: {field: (stored, expected)}}` for every game that has
+    drifted; with `fix`, the drifted games are corrected in bulk.
+    """
+    expected = expected_game_counters()
+    drift = Q()
+    for name in GAME_COUNTERS:
+        drift |= ~Q(**{name: F(f'expected_{name}')})
+    drifted = (
+        Game.objects
+        .annotate(**expected)
+        .filter(drift)
+        .only('game_id', *GAME_COUNTERS)
+        .order_by('pk')
+    )
+
+    report, fixed = {}, []
+    for game in drifted.iterator(chunk_size=batch_size):
+        report[game.game_id] = {
+            name: (getattr(game, name), getattr(game, f'expected_{name}'))
+            for name in GAME_COUNTERS
+            if getattr(game, name) != getattr(game, f'expected_{name}')
+        }
+        if fix:
+            for name in GAME_COUNTERS:
+                setattr(game, name, getattr(game, f'expected_{name}'))
+            fixed.append(game)
+    if fixed:
+        Game.objects.bulk_update(fixed, GAME_COUNTERS, batch_size=batch_size)
+    return report
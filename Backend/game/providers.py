@@ -0,0 +1,211 @@
+"""
+Model providers behind `llm.generate_content`.
+
+`LLM_PROVIDER` selects one:
+
+- "gemini": google-generativeai. The SDK (and the grpc/protobuf stack under
+  it) is imported and configured on the first model call instead of at
+  import time, so web workers, migrations, tests and management commands
+  that never call a model don't pay for loading it. `GenerativeModel`
+  objects are built once per (model, generation_config) and reused.
+  `agenerate` uses the SDK's grpc.aio client, which is process-wide and
+  bound to the first event loop that uses it; that is the server's loop
+  under ASGI. Calls from any other loop (async views run by a WSGI server
+  get a fresh loop per request) fall back to a worker thread.
+- "fake": deterministic offline answers for tests and benchmarks; the same
+  prompt always gets the same text, optionally after `LLM_FAKE_LATENCY`
+  seconds and failing `LLM_FAKE_ERROR_RATE` of the calls, to stand in for
+  a slow or flaky model.
+
+Both take a per-call `timeout` and raise LLMTimeout when it runs out, and
+both can stream: `astream` yields the answer in chunks as the model writes
+them.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import weakref
+from collections import Counter
+
+from django.conf import settings
+
+
+class LLMError(Exception):
+    """A model call failed"""
+
+
+class LLMTimeout(LLMError):
+    """A model call did not answer within its timeout"""
+
+
+def _request_options(timeout):
+    return {'timeout': timeout} if timeout else None
+
+
+class GeminiProvider:
+    """google-generativeai, loaded on first use"""
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self.lock = threading.Lock()
+        self.genai = None
+        self.models = {}
+        self.async_loop = None
+
+    def model(self, model_name, generation_config=None):
+        key = (model_name, json.dumps(generation_config or {}, sort_keys=True))
+        with self.lock:
+            model = self.models.get(key)
+            if model is None:
+                if self.genai is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self.genai = genai
+                model = self.models[key] = self.genai.GenerativeModel(
+                    model_name, generation_config=generation_config
+                )
+        return model
+
+    def _translate(self, error):
+        from google.api_core.exceptions import DeadlineExceeded
+        if isinstance(error, DeadlineExceeded):
+            return LLMTimeout(str(error))
+        return error
+
+    def generate(self, model_name, prompt, generation_config=None, timeout=None):
+        model = self.model(model_name, generation_config)
+        try:
+            return model.generate_content(prompt, request_options=_request_options(timeout)).text
+        except Exception as e:
+            raise self._translate(e) from e
+
+    def _on_own_loop(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.async_loop is None:
+                self.async_loop = weakref.ref(loop)
+            return self.async_loop() is loop
+
+    async def _amodel(self, model_name, generation_config):
+        if self.genai is None:
+            # Import the SDK off the event loop
+            await asyncio.to_thread(self.model, model_name, generation_config)
+        return self.model(model_name, generation_config)
+
+    async def agenerate(self, model_name, prompt, generation_config=None, timeout=None):
+        if not self._on_own_loop():
+            return await asyncio.to_thread(self.generate, model_name, prompt, generation_config, timeout)
+        model = await self._amodel(model_name, generation_config)
+        try:
+            response = await model.generate_content_async(prompt, request_options=_request_options(timeout))
+        except Exception as e:
+            raise self._translate(e) from e
+        return response.text
+
+    async def astream(self, model_name, prompt, generation_config=None, timeout=None):
+        if not self._on_own_loop():
+            # No grpc.aio client on this loop: the whole answer as one chunk
+            yield await asyncio.to_thread(self.generate, model_name, prompt, generation_config, timeout)
+            return
+        model = await self._amodel(model_name, generation_config)
+        try:
+            response = await model.generate_content_async(
+                prompt, stream=True, request_options=_request_options(timeout)
+            )
+            async for chunk in response:
+                # The closing chunk may carry only the finish reason
+                if chunk.parts:
+                    yield chunk.text
+        except Exception as e:
+            raise self._translate(e) from e
+
+
+# Words per chunk when the fake provider streams
+STREAM_WORDS = 2
+
+
+class FakeProvider:
+    """
+    Deterministic stand-in that never leaves the process.
+
+    `latency` (or a per-model entry in `model_latency`) delays every answer
+    and `error_rate` makes that share of calls fail, from a seeded RNG so
+    runs repeat; calls slower than their `timeout` raise LLMTimeout once
+    the timeout has passed, like the real client.
+    """
+
+    def __init__(self, latency=0, error_rate=0, model_latency=None, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.model_latency = model_latency or {}
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+
+    def _delay(self, model_name, timeout):
+        self.calls[model_name] += 1
+        delay = self.model_latency.get(model_name, self.latency)
+        if timeout is not None and delay > timeout:
+            return timeout, LLMTimeout(f'{model_name} did not answer within {timeout}s')
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return delay, LLMError(f'{model_name} failed (injected)')
+        return delay, None
+
+    def generate(self, model_name, prompt, generation_config=None, timeout=None):
+        delay, error = self._delay(model_name, timeout)
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise error
+        return self._answer(model_name, prompt, generation_config)
+
+    async def agenerate(self, model_name, prompt, generation_config=None, timeout=None):
+        delay, error = self._delay(model_name, timeout)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+        return self._answer(model_name, prompt, generation_config)
+
+    async def astream(self, model_name, prompt, generation_config=None, timeout=None):
+        """The answer a few words at a time, the latency spread over the chunks"""
+        delay, error = self._delay(model_name, timeout)
+        if error:
+            await asyncio.sleep(delay)
+            raise error
+        words = self._answer(model_name, prompt, generation_config).split(' ')
+        chunks = [' '.join(words[i:i + STREAM_WORDS]) for i in range(0, len(words), STREAM_WORDS)]
+        for i, chunk in enumerate(chunks):
+            if delay:
+                await asyncio.sleep(delay / len(chunks))
+            yield chunk if i == 0 else ' ' + chunk
+
+    def _answer(self, model_name, prompt, generation_config):
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+        if (generation_config or {}).get('response_mime_type') == 'application/json':
+            return json.dumps({
+                'predictions': [],
+                'next_elimination_reasoning': f'Fake reasoning {digest}.',
+            })
+        return f'Fake {model_name} response {digest}.'
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name=None):
+    """The process-wide provider for `name` (default: LLM_PROVIDER)"""
+    name = name or settings.LLM_PROVIDER
+    with _providers_lock:
+        if name not in _providers:
+            if name == 'gemini':
+                _providers[name] = GeminiProvider(settings.GEMINI_API_KEY)
+            elif name == 'fake':
+                _providers[name] = FakeProvider(settings.LLM_FAKE_LATENCY, settings.LLM_FAKE_ERROR_RATE)
+            else:
+                raise ValueError(f'Unknown LLM provider: {name}')
+        return _providers[name]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Game, Player, GameSummary, GameCommentary, GameEvent  # Ensure GameEvent is defined
+from .models import Game, Player, GameSummary, GameCommentary, GameEvent, LeaderboardEntry, Job  # Ensure GameEvent is defined
 
 class GameEventSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,7 +9,8 @@ class GameEventSerializer(serializers.ModelSerializer):
 class GameListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Game
-        fields = ['game_id', 'created_at', 'current_round', 'prize_pool', 'stake_amount', 'is_completed']
+        fields = ['game_id', 'created_at', 'current_round', 'prize_pool', 'stake_amount', 'is_completed',
+                  'status', 'total_players', 'active_players']
 
 class GameDetailSerializer(serializers.ModelSerializer):
     players = serializers.StringRelatedField(many=True)  # Or custom serializer if needed
@@ -18,7 +19,8 @@ class GameDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Game
         fields = ['game_id', 'created_at', 'current_round', 'prize_pool', 'stake_amount', 
-                  'is_completed', 'winner_address', 'players']
+                  'is_completed', 'status', 'winner_address', 'players', 'total_players', 'active_players',
+                  'total_spins', 'shield_uses', 'eliminations']
 
 class GameCommentarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -35,4 +37,31 @@ class GameSummarySerializer(serializers.ModelSerializer):
             'id', 'game', 'ai_summary', 'total_rounds', 'total_spins',
             'elimination_order', 'key_moments', 'statistics',
             'winner_address', 'generated_at'
-        ]
\ No newline at end of file
+        ]
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = [
+            'rank', 'wallet_address', 'games_played', 'games_won',
+            'total_winnings', 'total_staked', 'win_rate', 'updated_at'
+        ]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    game = serializers.CharField(source='game.game_id', read_only=True, default=None)
+    queue_position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'game', 'status', 'queue_position', 'attempts',
+            'result', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_queue_position(self, obj):
+        if obj.status != 'queued':
+            return None
+        return Job.objects.filter(status='queued', id__lt=obj.id).count() + 1
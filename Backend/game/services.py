@@ -0,0 +1,554 @@
+"""
+AI-powered game features using Gemini.
+
+These are shared by the API views and the background job worker, so they
+take model instances and return either the created rows or plain data and
+leave HTTP concerns to the caller. The `a`-prefixed coroutines are the same
+actions for the async views: the reads and prompt building run as one
+thread hop, the model call is awaited.
+
+Everything an action needs to know about a game comes from one GameContext
+(see context.py), two queries however many players and events it has.
+"""
+
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import llm, simulation, singleflight
+from .context import GameContext
+from .models import PlayerStats, GameSummary, GameCommentary
+
+# Gemini answers the predict_outcome prompt in JSON
+PREDICTION_CONFIG = {"response_mime_type": "application/json"}
+
+COMMENTARY_MODEL = 'gemini-2.5-flash'
+
+
+def _live_commentary_prompt(context):
+    """The commentary prompt and the GameCommentary fields besides its text"""
+    game = context.game
+    active = context.active
+
+    active_players = game.active_players
+
+    recent_actions = []
+    for event in context.recent_events(5):
+        recent_actions.append({
+            'type': event.label,
+            'round': '?' if event.round is None else event.round,
+            'player': event.player_address[:8] + '...' if event.player_address else 'N/A'
+        })
+
+    tension_level = calculate_tension_level(context)
+
+    game_context = f"""
+        Current Game State:
+        - Game ID: {game.game_id}
+        - Current Round: {game.current_round}
+        - Players Remaining: {active_players} of {game.total_players}
+        - Prize Pool: {game.prize_pool} STX
+        - Tension Level: {tension_level}/10
+
+        Recent Actions (last 5):
+        {chr(10).join([f"Round {a['round']}: {a['type']} - {a['player']}" for a in recent_actions])}
+
+        Active Players:
+        {chr(10).join([f"- {p.address[:12]}... {'(Risk Mode Active)' if p.used_risk_mode else ''}" for p in active])}
+        """
+
+    prompt = f"""You are a live sports commentator for a blockchain Russian Roulette game.
+        Provide exciting, real-time commentary on the current game state.
+
+        Style: Energetic, suspenseful, focus on the drama of the moment.
+        Keep it to 2-3 punchy sentences about what's happening RIGHT NOW.
+        Make it feel like a live broadcast.
+
+        {game_context}
+
+        Commentary:"""
+
+    return prompt, {
+        'round_number': game.current_round,
+        'commentary_type': 'live',
+        'tension_level': tension_level,
+        'context_data': {
+            'active_players': active_players,
+            'recent_events': recent_actions,
+            'prize_pool': str(game.prize_pool),
+            # Same game state, same prompt: see _recent_commentary
+            'prompt_key': llm.cache_key(COMMENTARY_MODEL, prompt),
+        }
+    }
+
+
+def _recent_commentary(game, fields):
+    """Commentary already stored for the same prompt within its cache TTL, if any"""
+    since = timezone.now() - timedelta(seconds=settings.LLM_CACHE_TTLS['generate_live_commentary'])
+    return (
+        GameCommentary.objects
+        .filter(game=game, context_data__prompt_key=fields['context_data']['prompt_key'], created_at__gte=since)
+        .order_by('-id')
+        .first()
+    )
+
+
+def _live_commentary_inputs(game):
+    prompt, fields = _live_commentary_prompt(GameContext.load(game))
+    return prompt, fields, _recent_commentary(game, fields)
+
+
+def generate_live_commentary(game):
+    """
+    Return (commentary, created) for the current game state. Polling an
+    unchanged game returns the commentary stored for it instead of adding
+    a copy.
+    """
+    prompt, fields, existing = _live_commentary_inputs(game)
+    if existing is not None:
+        return existing, False
+    commentary_text = llm.generate_content(
+        COMMENTARY_MODEL, prompt, action='generate_live_commentary', scope=f'live_commentary:{game.pk}'
+    )
+    return GameCommentary.objects.create(game=game, commentary_text=commentary_text, **fields), True
+
+
+async def agenerate_live_commentary(game, on_text=None):
+    """
+    generate_live_commentary for async views; `on_text` gets the text as
+    the model writes it (see llm.agenerate_content), or a stored
+    commentary's text in one piece
+    """
+    prompt, fields, existing = await sync_to_async(_live_commentary_inputs)(game)
+    if existing is not None:
+        if on_text is not None:
+            on_text(existing.commentary_text)
+        return existing, False
+    commentary_text = await llm.agenerate_content(
+        COMMENTARY_MODEL, prompt, action='generate_live_commentary', scope=f'live_commentary:{game.pk}',
+        on_text=on_text,
+    )
+    return await GameCommentary.objects.acreate(game=game, commentary_text=commentary_text, **fields), True
+
+
+def _summary_prompt(context):
+    """The summary prompt and the GameSummary fields besides its text"""
+    game = context.game
+    players = context.players
+
+    elimination_order = []
+    for player in sorted((p for p in players if p.eliminated), key=lambda p: p.eliminated_round or 0):
+        elimination_order.append({
+            'address': player.address,
+            'round': player.eliminated_round
+        })
+
+    total_spins = game.total_spins
+
+    timeline = []
+    for event in context.events[:50]:  # Limit to first 50 events
+        event_desc = f"Round {'?' if event.round is None else event.round}: {event.label}"
+        if event.player_address:
+            event_desc += f" - {event.player_address[:8]}..."
+        timeline.append(event_desc)
+
+    game_context = f"""
+        Game Summary Data:
+        - Game ID: {game.game_id}
+        - Stake Amount: {game.stake_amount} STX per player
+        - Total Prize Pool: {game.prize_pool} STX
+        - Total Players: {game.total_players}
+        - Total Rounds: {game.current_round}
+        - Total Spins: {total_spins}
+        - Winner: {game.winner_address[:10] if game.winner_address else 'N/A'}...
+
+        Players (in join order):
+        {chr(10).join([f'{i+1}. {p.address[:10]}... {"🏆 WINNER" if p.address == game.winner_address else f"💀 Eliminated Round {p.eliminated_round}" if p.eliminated else ""}' for i, p in enumerate(players)])}
+
+        Game Timeline:
+        {chr(10).join(timeline)}
+
+        Elimination Order:
+        {chr(10).join([f"{i+1}. {e['address'][:10]}... - Round {e['round']}" for i, e in enumerate(elimination_order)])}
+        """
+
+    prompt = f"""You are a master storyteller recounting an epic Russian Roulette game on the Stacks blockchain.
+            Write a compelling narrative summary that captures the full arc of this game.
+
+            Structure your response:
+            1. **The Setup** - Set the stakes and introduce the battle (2-3 sentences)
+            2. **Rising Action** - Chronicle key eliminations and tense moments (3-4 sentences)
+            3. **The Climax** - Build to the final showdown (2-3 sentences)
+            4. **The Resolution** - Winner announcement and reflection (2 sentences)
+            5. **Strategy Analysis** - Brief tactical insights (2-3 sentences)
+
+            {game_context}
+
+            Write in an engaging, dramatic style. Use metaphors from poker, warfare, or gladiatorial combat.
+            Keep it under 400 words. Make readers feel the tension and excitement."""
+
+    key_moments = extract_key_moments(context)
+
+    statistics = {
+        'average_spins_per_round': round(total_spins / game.current_round, 2) if game.current_round > 0 else 0,
+        'shield_uses': game.shield_uses,
+        'risk_mode_uses': sum(1 for p in players if p.used_risk_mode),
+        'survival_rate': round((1 / game.total_players) * 100, 2) if game.total_players > 0 else 0,
+        'longest_game_duration': game.current_round,
+        'total_prize_pool': str(game.prize_pool)
+    }
+
+    return prompt, {
+        'total_rounds': game.current_round,
+        'total_spins': total_spins,
+        'elimination_order': elimination_order,
+        'key_moments': key_moments,
+        'statistics': statistics,
+        'excitement_rating': calculate_excitement_rating(context, key_moments),
+    }
+
+
+def generate_summary(game):
+    """Generate and store the narrative summary of a completed game"""
+    prompt, fields = _summary_prompt(GameContext.load(game))
+    ai_summary = llm.generate_content(
+        'gemini-2.5-pro', prompt, action='generate_summary', scope=f'summary:{game.pk}'
+    )
+    return GameSummary.objects.create(game=game, ai_summary=ai_summary, **fields)
+
+
+def generate_summary_once(game):
+    """
+    Return (summary, created) for a completed game.
+
+    Concurrent callers for the same game share one generation (across
+    workers) instead of each paying for a Gemini Pro call.
+    """
+    def compute():
+        existing = GameSummary.objects.filter(game=game).first()
+        if existing:
+            return [existing.pk, False]
+        return [generate_summary(game).pk, True]
+
+    (summary_id, created), leader = singleflight.run(f'generate_summary:{game.pk}', compute)
+    return GameSummary.objects.get(pk=summary_id), created and leader
+
+
+async def agenerate_summary(game, on_text=None):
+    """generate_summary for async views; `on_text` as for agenerate_live_commentary"""
+    prompt, fields = await sync_to_async(lambda: _summary_prompt(GameContext.load(game)))()
+    ai_summary = await llm.agenerate_content(
+        'gemini-2.5-pro', prompt, action='generate_summary', scope=f'summary:{game.pk}', on_text=on_text
+    )
+    return await GameSummary.objects.acreate(game=game, ai_summary=ai_summary, **fields)
+
+
+async def agenerate_summary_once(game, on_text=None):
+    """
+    generate_summary_once for async views. A caller that did not generate
+    the summary itself gets its text passed to `on_text` in one piece.
+    """
+    async def compute():
+        existing = await GameSummary.objects.filter(game=game).afirst()
+        if existing:
+            return [existing.pk, False]
+        return [(await agenerate_summary(game, on_text)).pk, True]
+
+    (summary_id, created), leader = await singleflight.arun(f'generate_summary:{game.pk}', compute)
+    summary = await GameSummary.objects.select_related('game').aget(pk=summary_id)
+    created = created and leader
+    if on_text is not None and not created:
+        on_text(summary.ai_summary)
+    return summary, created
+
+
+def likelihood_label(probability):
+    if probability >= 0.5:
+        return 'High'
+    if probability >= 0.25:
+        return 'Medium'
+    return 'Low'
+
+
+def _prediction_inputs(context):
+    """
+    Active players in join order with their modelled odds, the likeliest
+    next victim and the confidence in the game-counter the odds assume.
+    """
+    survivals = context.survivals()
+    player_stats = []
+    for position, player in enumerate(context.active, start=1):
+        player_stats.append({
+            'address': player.address[:10] + '...',
+            'full_address': player.address,
+            'survival_count': survivals[player.address],
+            'risk_mode_active': player.used_risk_mode,
+            'position': position
+        })
+
+    seats = tuple(p['full_address'] for p in player_stats)
+    counter = simulation.game_counter()
+    odds = context.memo(('odds', counter.value, seats), lambda: simulation.predict(context, counter.value))
+    for p in player_stats:
+        p['win_probability'] = round(odds[p['full_address']][0] * 100, 2)
+        p['elimination_probability'] = round(odds[p['full_address']][1] * 100, 2)
+        p['reasoning'] = (
+            f"{p['survival_count']} survivals so far; seat {p['position']} of {len(player_stats)} "
+            f"has a {p['elimination_probability']}% chance of being hit by the next spin"
+        )
+    next_victim = max(player_stats, key=lambda p: p['elimination_probability'], default=None)
+    return player_stats, next_victim, counter.confidence
+
+
+def _prediction_prompt(game, player_stats, next_victim):
+    return f"""
+        Explain the odds in this Russian Roulette game.
+
+        Current Game State:
+        - Round: {game.current_round}
+        - Players Remaining: {len(player_stats)}
+        - Prize Pool: {game.prize_pool} STX
+
+        Player Statistics:
+        {chr(10).join([f"Player {p['address']}: {p['survival_count']} survivals, Risk Mode: {p['risk_mode_active']}, Position: {p['position']}" for p in player_stats])}
+
+        Odds (computed from the contract's elimination rule, do not change them):
+        {chr(10).join([f"Player {p['address']}: {p['win_probability']}% to win, {p['elimination_probability']}% to be eliminated next" for p in player_stats])}
+
+        Reply in JSON with:
+        1. predictions: a list of {{"player": <player as written above>, "reasoning": <one sentence>}}
+        2. next_elimination_reasoning: one sentence about {next_victim['address']}
+        """
+
+
+def _prediction(game, player_stats, next_victim, confidence, response_text=None):
+    """The prediction payload, with the model's reasoning merged in if there is a response"""
+    next_reasoning = 'Most likely seat for the next spin under the contract\'s elimination rule'
+    if response_text is not None:
+        prediction_json = json.loads(response_text)
+        reasons = {
+            item.get('player'): item.get('reasoning')
+            for item in prediction_json.get('predictions', [])
+            if isinstance(item, dict)
+        }
+        for p in player_stats:
+            p['reasoning'] = reasons.get(p['address']) or p['reasoning']
+        next_reasoning = prediction_json.get('next_elimination_reasoning') or next_reasoning
+
+    return {
+        'game_id': game.game_id,
+        'round': game.current_round,
+        'predictions': [
+            {
+                'player': p['address'],
+                'win_probability': p['win_probability'],
+                'reasoning': p['reasoning'],
+            }
+            for p in player_stats
+        ],
+        'next_elimination': {
+            'player': next_victim['address'],
+            'likelihood': likelihood_label(next_victim['elimination_probability'] / 100),
+            'probability': next_victim['elimination_probability'],
+            'reasoning': next_reasoning,
+        } if next_victim else {},
+        # Every spin eliminates exactly one player
+        'rounds_remaining': max(len(player_stats) - 1, 0),
+        'confidence_level': confidence,
+        'generated_at': game.current_round
+    }
+
+
+def predict_outcome(game, fast=False):
+    """
+    Predict win probabilities for the players still in the game.
+
+    The probabilities come from the contract's elimination rule (see
+    game/simulation.py). Gemini only writes the reasoning text, and with
+    `fast` it is skipped and a short factual reasoning is used instead.
+
+    The rule depends on the contract's game-counter, which is only
+    approximated by the one the indexer last saw, so `confidence_level` is
+    'high' only while the indexer is current (see simulation.game_counter).
+    """
+    player_stats, next_victim, confidence = _prediction_inputs(GameContext.load(game))
+    response_text = None
+    if not fast and player_stats:
+        try:
+            response_text = llm.generate_content(
+                'gemini-2.5-flash',
+                _prediction_prompt(game, player_stats, next_victim),
+                generation_config=PREDICTION_CONFIG,
+                action='predict_outcome',
+                scope=f'predict_outcome:{game.pk}',
+            )
+        except llm.LLMUnavailable:
+            # The odds don't need the model; keep the factual reasoning
+            pass
+    return _prediction(game, player_stats, next_victim, confidence, response_text)
+
+
+async def apredict_outcome(game, fast=False):
+    """predict_outcome for async views"""
+    player_stats, next_victim, confidence = await sync_to_async(lambda: _prediction_inputs(GameContext.load(game)))()
+    response_text = None
+    if not fast and player_stats:
+        try:
+            response_text = await llm.agenerate_content(
+                'gemini-2.5-flash',
+                _prediction_prompt(game, player_stats, next_victim),
+                generation_config=PREDICTION_CONFIG,
+                action='predict_outcome',
+                scope=f'predict_outcome:{game.pk}',
+            )
+        except llm.LLMUnavailable:
+            pass
+    return _prediction(game, player_stats, next_victim, confidence, response_text)
+
+
+def _prediction_key(game, fast):
+    return f'predict_outcome:{game.pk}:{game.current_round}:{"fast" if fast else "full"}'
+
+
+def predict_outcome_once(game, fast=False):
+    """Prediction for the current round, computed once across concurrent callers"""
+    prediction, _ = singleflight.run(_prediction_key(game, fast), lambda: predict_outcome(game, fast=fast))
+    return prediction
+
+
+async def apredict_outcome_once(game, fast=False):
+    """predict_outcome_once for async views"""
+    prediction, _ = await singleflight.arun(_prediction_key(game, fast), lambda: apredict_outcome(game, fast=fast))
+    return prediction
+
+
+def _strategy_comparison_prompt(wallet_addresses):
+    """Per-wallet statistics and the comparison prompt"""
+    wallets = wallet_addresses[:settings.COMPARE_STRATEGIES_MAX_WALLETS]
+    stats = PlayerStats.objects.in_bulk(wallets, field_name='wallet_address')
+
+    player_analyses = []
+    for wallet in wallets:
+        player = stats.get(wallet) or PlayerStats(wallet_address=wallet)
+        player_analyses.append({
+            'wallet': wallet[:10] + '...',
+            'full_wallet': wallet,
+            'games_played': player.games_played,
+            'wins': player.wins,
+            'win_rate': player.win_rate,
+            'risk_mode_usage': player.risk_mode_uses,
+            'average_survival_rounds': player.average_survival_rounds
+        })
+
+    context = f"""
+            Compare these Russian Roulette players' performance and strategies:
+
+            {chr(10).join([f"Player {p['wallet']}:{chr(10)}- Games: {p['games_played']}, Wins: {p['wins']} ({p['win_rate']}%){chr(10)}- Risk Mode Usage: {p['risk_mode_usage']} times{chr(10)}- Avg Survival: {p['average_survival_rounds']} rounds{chr(10)}" for p in player_analyses])}
+
+            Provide:
+            1. Strategic assessment of each player
+            2. Strengths and weaknesses comparison
+            3. Head-to-head matchup prediction
+            4. Strategy recommendations
+
+            Be insightful like a professional analyst.
+            """
+
+    return player_analyses, context
+
+
+def compare_strategies(wallet_addresses):
+    """Compare the track records of several wallets over their completed games"""
+    player_analyses, context = _strategy_comparison_prompt(wallet_addresses)
+    ai_analysis = llm.generate_content('gemini-2.5-flash', context, action='compare_strategies')
+
+    return {
+        'player_stats': player_analyses,
+        'ai_analysis': ai_analysis
+    }
+
+
+async def acompare_strategies(wallet_addresses):
+    """compare_strategies for async views"""
+    player_analyses, context = await sync_to_async(_strategy_comparison_prompt)(wallet_addresses)
+    ai_analysis = await llm.agenerate_content('gemini-2.5-flash', context, action='compare_strategies')
+
+    return {
+        'player_stats': player_analyses,
+        'ai_analysis': ai_analysis
+    }
+
+
+def calculate_tension_level(context):
+    """Calculate tension level 1-10"""
+    game = context.game
+    total_players = game.total_players
+    rounds = game.current_round
+
+    player_factor = (1 - (game.active_players / total_players)) * 5 if total_players else 0
+    round_factor = min(rounds / 10, 1) * 3
+
+    # Only the last two eliminations count towards tension
+    recent_eliminations = min(game.eliminations, 2)
+
+    elimination_factor = recent_eliminations * 1
+
+    return min(round(player_factor + round_factor + elimination_factor), 10)
+
+
+def extract_key_moments(context):
+    """Extract significant game moments"""
+    key_moments = []
+
+    for shield_event in context.of_type('shield_used'):
+        key_moments.append({
+            'type': 'shield_used',
+            'round': shield_event.round,
+            'player': shield_event.player_address[:10] + '...',
+            'impact': 'high'
+        })
+
+    eliminations = context.of_type('player_eliminated')
+    if eliminations:
+        first_elim = eliminations[0]
+        key_moments.append({
+            'type': 'first_blood',
+            'round': first_elim.round,
+            'player': first_elim.player_address[:10] + '...',
+            'impact': 'medium'
+        })
+
+    for i in range(len(eliminations) - 1):
+        round_diff = (eliminations[i+1].round or 0) - (eliminations[i].round or 0)
+        if round_diff <= 1:
+            key_moments.append({
+                'type': 'rapid_eliminations',
+                'round': eliminations[i].round,
+                'impact': 'high'
+            })
+            break
+
+    return key_moments
+
+
+def calculate_excitement_rating(context, key_moments):
+    """Calculate excitement rating 1-10"""
+    rounds = context.game.current_round
+    player_count = context.game.total_players
+    base_score = 5
+
+    if rounds > 10:
+        base_score += 2
+    elif rounds > 5:
+        base_score += 1
+
+    if player_count > 5:
+        base_score += 1
+
+    high_impact = len([m for m in key_moments if m.get('impact') == 'high'])
+    base_score += min(high_impact, 2)
+
+    return min(base_score, 10)
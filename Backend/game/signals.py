@@ -0,0 +1,38 @@
+"""
+Model signal handlers, connected in `GameConfig.ready`.
+
+The chain indexer writes games with `bulk_update`, which sends no signals,
+so it queues completed games' summaries itself (see `indexer.py`); these
+handlers cover every other save, e.g. the admin or a shell.
+
+Every database connection also gets the per-request query timer from
+metrics.py as it is opened.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import Game
+
+
+@receiver(post_save, sender=Game, dispatch_uid='game_completed_summary')
+def queue_summary_on_completion(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Queue the AI summary as soon as a game is saved as completed"""
+    if raw or not settings.SUMMARY_ON_COMPLETION or not instance.is_completed:
+        return
+    if update_fields is not None and 'is_completed' not in update_fields:
+        return
+    from . import jobs
+    transaction.on_commit(partial(jobs.enqueue_summaries, [instance]))
+
+
+@receiver(connection_created, dispatch_uid='request_metrics_timer')
+def time_queries(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED:
+        metrics.instrument_connection(connection)
@@ -0,0 +1,174 @@
+"""
+Outcome model of the contract's elimination rule.
+
+`spin` in Breevs.clar eliminates
+`active[(stacks-block-height + game-counter) mod len(active)]`, where
+`active` is the game's surviving players in join order. The only unknown is
+the block height each future spin lands on; the gap (in blocks) before
+every spin is modelled with the gaps observed between recent spins.
+
+Because the rule only looks at the height modulo the number of active
+players, the whole future depends on the height modulo lcm(2..n) (60 for
+a full six-player game). Instead of sampling playouts, the model carries
+the exact probability of every (height residue, surviving set) state
+through each remaining spin as NumPy arrays, which gives the limit of
+infinitely many Monte Carlo playouts in well under a millisecond.
+
+The gap distribution comes from recent spins across all games. It is read
+once and reused until a game shows a block newer than the one it was read
+at. The game-counter is the one the chain indexer last recorded from a
+`game-created` event. It is an estimate: the indexer may lag the chain, and
+games created before a future spin move the counter that spin will use.
+`game_counter` grades how far it can be trusted.
+"""
+
+import math
+import threading
+from datetime import timedelta
+from functools import reduce
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import GameEvent, IndexerCheckpoint
+
+# Gaps to assume when there is no spin history yet
+DEFAULT_GAPS = np.arange(1, 11)
+
+# Spins sampled for the gap distribution
+GAP_HISTORY = 1000
+
+
+def outcome_probabilities(active_count, start_height, game_counter, gaps):
+    """
+    Exact outcome of the elimination rule from the current state.
+
+    Returns (win, next_elimination): per join-order position among the
+    active players, the probability that player wins, and that it is the
+    next one eliminated.
+    """
+    win = np.zeros(active_count)
+    next_elimination = np.zeros(active_count)
+    if active_count < 2:
+        win[:] = 1
+        return win, next_elimination
+
+    period = reduce(math.lcm, range(2, active_count + 1))
+    gap_pmf = np.bincount(np.asarray(gaps) % period, minlength=period) / len(gaps)
+    # step[r, s]: probability the next spin lands on residue s after residue r
+    residues = np.arange(period)
+    step = gap_pmf[(residues[None, :] - residues[:, None]) % period]
+
+    start = np.zeros(period)
+    start[start_height % period] = 1
+    # Surviving set (tuple of positions) -> distribution of the height residue
+    states = {tuple(range(active_count)): start}
+
+    for remaining in range(active_count, 1, -1):
+        targets = (residues + game_counter) % remaining
+        next_states = {}
+        for survivors, distribution in states.items():
+            landed = distribution @ step
+            for index, victim in enumerate(survivors):
+                mass = np.where(targets == index, landed, 0)
+                total = mass.sum()
+                if not total:
+                    continue
+                if remaining == active_count:
+                    next_elimination[victim] += total
+                rest = survivors[:index] + survivors[index + 1:]
+                if rest in next_states:
+                    next_states[rest] = next_states[rest] + mass
+                else:
+                    next_states[rest] = mass
+        states = next_states
+
+    for (winner,), distribution in states.items():
+        win[winner] += distribution.sum()
+    return win, next_elimination
+
+
+# (block height read at, gaps)
+_gaps = (None, None)
+_gaps_lock = threading.Lock()
+
+
+def _read_spin_gaps():
+    """Block gaps between consecutive spins of the same game"""
+    recent = (
+        GameEvent.objects
+        .filter(event_type='player_eliminated')
+        .order_by('-id')
+        .values_list('game_id', 'block_height')[:GAP_HISTORY]
+    )
+    last_height = {}
+    gaps = []
+    for game_id, height in recent:
+        if game_id in last_height and last_height[game_id] >= height:
+            gaps.append(last_height[game_id] - height)
+        last_height[game_id] = height
+    return np.array(gaps) if gaps else DEFAULT_GAPS
+
+
+def spin_gaps(height):
+    """
+    Block gaps between consecutive spins of the same game, as of `height`
+    or later.
+    """
+    global _gaps
+    with _gaps_lock:
+        read_at, gaps = _gaps
+    if read_at is not None and height <= read_at:
+        return gaps
+    gaps = _read_spin_gaps()
+    with _gaps_lock:
+        if _gaps[0] is None or height >= _gaps[0]:
+            _gaps = (height, gaps)
+    return gaps
+
+
+def clear_gap_cache():
+    global _gaps
+    with _gaps_lock:
+        _gaps = (None, None)
+
+
+class GameCounter(NamedTuple):
+    value: int
+    # 'high' while the indexer is current, 'medium' when it lags the chain
+    # by more than INDEXER_MAX_LAG seconds, 'low' without an indexed game
+    confidence: str
+
+
+def game_counter(indexer='breevs'):
+    """The contract's game-counter as of the indexer's checkpoint (0 before any game)"""
+    checkpoint = (
+        IndexerCheckpoint.objects
+        .filter(name=indexer)
+        .values_list('game_counter', 'updated_at')
+        .first()
+    )
+    if checkpoint is None or not checkpoint[0]:
+        return GameCounter(0, 'low')
+    counter, updated_at = checkpoint
+    if timezone.now() - updated_at > timedelta(seconds=settings.INDEXER_MAX_LAG):
+        return GameCounter(counter, 'medium')
+    return GameCounter(counter, 'high')
+
+
+def predict(context, counter):
+    """
+    Win and next-elimination probabilities for a GameContext's active
+    players, as {address: (win, next_elimination)}, given the contract's
+    game-counter.
+    """
+    addresses = [player.address for player in context.active]
+    win, next_elimination = outcome_probabilities(
+        len(addresses), context.latest_block, counter, spin_gaps(context.latest_block)
+    )
+    return {
+        address: (float(win[i]), float(next_elimination[i]))
+        for i, address in enumerate(addresses)
+    }
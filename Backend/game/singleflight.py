@@ -0,0 +1,144 @@
+"""
+Single-flight deduplication across gunicorn workers.
+
+`run(key, compute)` makes sure only one caller at a time computes the value
+for `key`. The first caller inserts a `SingleFlight` row (the unique key is
+the lock), computes and stores the JSON result on it; concurrent callers
+poll that row and return the same result instead of repeating the slow call.
+Finished rows are kept for a short time so stragglers still find the result,
+and leases expire so a crashed leader does not block the key forever.
+"""
+
+import asyncio
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import SingleFlight
+
+
+class SingleFlightError(Exception):
+    """The leader failed, or the result did not arrive in time"""
+
+
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def _try_acquire(key, owner, lease):
+    try:
+        with transaction.atomic():
+            SingleFlight.objects.create(
+                key=key,
+                owner=owner,
+                expires_at=timezone.now() + timedelta(seconds=lease),
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def _poll(key, owner, lease):
+    """
+    One attempt at `key`: ('leader', None) when this caller now holds it,
+    ('done', result) when a finished result is there, or ('wait', None).
+    """
+    while True:
+        if _try_acquire(key, owner, lease):
+            return 'leader', None
+
+        flight = SingleFlight.objects.filter(key=key).first()
+        if flight is None:
+            continue
+        if flight.expires_at < timezone.now():
+            # Stale lease or expired result: clear it and race for the key again.
+            SingleFlight.objects.filter(pk=flight.pk, expires_at=flight.expires_at).delete()
+            continue
+        if flight.status == 'done':
+            return 'done', flight.result
+        if flight.status == 'failed':
+            raise SingleFlightError(flight.error)
+        return 'wait', None
+
+
+def _finish(key, owner, result_ttl, result=None, error=None):
+    flights = SingleFlight.objects.filter(key=key, owner=owner)
+    if error is not None:
+        flights.update(
+            status='failed',
+            error=str(error),
+            expires_at=timezone.now() + timedelta(seconds=1),
+        )
+    else:
+        flights.update(
+            status='done',
+            result=result,
+            expires_at=timezone.now() + timedelta(seconds=result_ttl),
+        )
+
+
+def run(key, compute, lease=None, wait=None, result_ttl=None, poll_interval=0.2):
+    """
+    Return (result, computed) for `key`.
+
+    `computed` is True for the caller that actually ran `compute()`; every
+    other concurrent caller gets the leader's (JSON-serializable) result.
+    """
+    lease = lease or settings.SINGLE_FLIGHT_LEASE
+    wait = wait or settings.SINGLE_FLIGHT_WAIT
+    result_ttl = result_ttl or settings.SINGLE_FLIGHT_RESULT_TTL
+    owner = _owner()
+    deadline = time.monotonic() + wait
+
+    while True:
+        state, result = _poll(key, owner, lease)
+        if state == 'leader':
+            break
+        if state == 'done':
+            return result, False
+        if time.monotonic() > deadline:
+            raise SingleFlightError(f'Timed out waiting for {key}')
+        time.sleep(poll_interval)
+
+    try:
+        result = compute()
+    except Exception as e:
+        _finish(key, owner, result_ttl, error=e)
+        raise
+    _finish(key, owner, result_ttl, result=result)
+    return result, True
+
+
+async def arun(key, compute, lease=None, wait=None, result_ttl=None, poll_interval=0.2):
+    """`run` for coroutines: awaits `compute()` and sleeps without a thread"""
+    lease = lease or settings.SINGLE_FLIGHT_LEASE
+    wait = wait or settings.SINGLE_FLIGHT_WAIT
+    result_ttl = result_ttl or settings.SINGLE_FLIGHT_RESULT_TTL
+    # Many coroutines share a thread, so the task tells the owners apart
+    owner = f'{_owner()}:{id(asyncio.current_task()):x}'
+    deadline = time.monotonic() + wait
+
+    while True:
+        state, result = await sync_to_async(_poll)(key, owner, lease)
+        if state == 'leader':
+            break
+        if state == 'done':
+            return result, False
+        if time.monotonic() > deadline:
+            raise SingleFlightError(f'Timed out waiting for {key}')
+        await asyncio.sleep(poll_interval)
+
+    try:
+        result = await compute()
+    except Exception as e:
+        await sync_to_async(_finish)(key, owner, result_ttl, error=e)
+        raise
+    await sync_to_async(_finish)(key, owner, result_ttl, result=result)
+    return result, True
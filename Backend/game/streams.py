@@ -0,0 +1,226 @@
+"""
+Server-sent event streams of game activity.
+
+`/api/games/{id}/stream/` pushes new `GameEvent` and `GameCommentary` rows
+as they are written. All viewers of a game in one process share a single
+`GameChannel`: one polling task reads the new rows once per interval and
+fans them out to every subscriber's queue, so a game with a thousand
+spectators costs one pair of small indexed queries per interval.
+
+`stream_generation` relays a model's answer to the AI actions' `?stream=1`
+callers as it is written.
+
+Streaming needs the ASGI application (`api.asgi:application`). Under WSGI
+Django would read the endless stream to its end before sending anything,
+so there the stream endpoint answers 501 and the AI actions ignore
+`?stream=1` (see `can_stream`).
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+from . import llm
+from .models import Game, GameCommentary, GameEvent
+from .serializers import GameCommentarySerializer, GameEventSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def can_stream(request):
+    """Whether `request` (Django's or DRF's) is served by the ASGI application"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+class GameChannel:
+    """Polls one game for new rows and fans them out to subscribers"""
+
+    def __init__(self, game_pk, poll_interval=None):
+        self.game_pk = game_pk
+        self.poll_interval = poll_interval or settings.STREAM_POLL_INTERVAL
+        self.subscribers = set()
+        self.task = None
+        self.last_event_id = None
+        self.last_commentary_id = None
+
+    async def _start_positions(self):
+        last_event = await GameEvent.objects.filter(game_id=self.game_pk).order_by('-id').afirst()
+        last_commentary = await GameCommentary.objects.filter(game_id=self.game_pk).order_by('-id').afirst()
+        self.last_event_id = last_event.pk if last_event else 0
+        self.last_commentary_id = last_commentary.pk if last_commentary else 0
+
+    async def _poll(self):
+        messages = []
+        events = GameEvent.objects.filter(
+            game_id=self.game_pk, id__gt=self.last_event_id
+        ).order_by('id')[:settings.STREAM_BATCH_SIZE]
+        async for event in events:
+            self.last_event_id = event.pk
+            messages.append(format_sse('game_event', GameEventSerializer(event).data, f'event-{event.pk}'))
+
+        commentaries = GameCommentary.objects.filter(
+            game_id=self.game_pk, id__gt=self.last_commentary_id
+        ).order_by('id')[:settings.STREAM_BATCH_SIZE]
+        async for commentary in commentaries:
+            self.last_commentary_id = commentary.pk
+            messages.append(format_sse(
+                'commentary', GameCommentarySerializer(commentary).data, f'commentary-{commentary.pk}'
+            ))
+        return messages
+
+    async def run(self):
+        await self._start_positions()
+        while self.subscribers:
+            try:
+                messages = await self._poll()
+            except Exception:
+                logger.exception('Polling game %s for the stream failed', self.game_pk)
+                messages = []
+            for message in messages:
+                for queue in list(self.subscribers):
+                    try:
+                        queue.put_nowait(message)
+                    except asyncio.QueueFull:
+                        # Too slow to keep up: drop it, the client reconnects.
+                        self.subscribers.discard(queue)
+            await asyncio.sleep(self.poll_interval)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+
+# One channel per game per event loop (i.e. per ASGI worker process)
+_channels = {}
+
+
+def get_channel(game_pk):
+    channel = _channels.get(game_pk)
+    if channel is None:
+        channel = _channels[game_pk] = GameChannel(game_pk)
+    return channel
+
+
+async def _stream(game_pk):
+    channel = get_channel(game_pk)
+    queue = channel.subscribe()
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if queue not in channel.subscribers:
+                    return
+                message = ': keepalive\n\n'
+            yield message
+    finally:
+        channel.unsubscribe(queue)
+        if not channel.subscribers:
+            _channels.pop(game_pk, None)
+
+
+async def game_stream(request, pk):
+    """
+    Stream new events and commentary for a game as server-sent events
+
+    Method: GET
+    Endpoint: /api/games/{id}/stream/
+
+    Events:
+    - game_event: a GameEvent (same shape as /api/games/{id}/events/)
+    - commentary: a GameCommentary (same shape as /api/games/{id}/commentaries/)
+
+    Errors:
+    - 404: Game not found
+    - 501: Served by the WSGI application, which cannot stream; long-poll
+      /api/games/{id}/events/?since_id=...&wait=... instead
+    """
+    if not can_stream(request):
+        return JsonResponse(
+            {'error': 'Streaming needs the ASGI server; long-poll the events endpoint instead'},
+            status=501,
+        )
+    if not await Game.objects.filter(pk=pk).aexists():
+        raise Http404('Game not found')
+
+    response = StreamingHttpResponse(_stream(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Streamed generations in progress, held so they finish even if their viewer leaves
+_detached = set()
+_DONE = object()
+
+
+def _finished(task):
+    _detached.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning('Streamed generation failed', exc_info=task.exception())
+
+
+def stream_generation(generate, event, serialize, failure):
+    """
+    Relay `generate(on_text)` as server-sent events: a `delta` event with
+    each chunk of text as the model writes it, then `event` with
+    `serialize(result)`, or an `error` event ({"error", "status"} and, for
+    503, "retry_after") if it fails.
+
+    The response starts at once and the generation starts with it, in a
+    task of its own, so a viewer disconnecting does not stop the finished
+    text from being stored.
+    """
+    queue = asyncio.Queue()
+
+    async def run():
+        try:
+            return await generate(queue.put_nowait)
+        finally:
+            queue.put_nowait(_DONE)
+
+    async def events():
+        # Started by the server iterating the response rather than by the
+        # view, and in a context of its own: the view's can tie
+        # sync_to_async to an async_to_sync executor (around sync-only
+        # middleware) that stops as soon as the view returns
+        task = contextvars.Context().run(asyncio.create_task, run())
+        _detached.add(task)
+        task.add_done_callback(_finished)
+
+        while (item := await queue.get()) is not _DONE:
+            yield format_sse('delta', {'text': item})
+        try:
+            result = task.result()
+        except llm.LLMUnavailable as e:
+            yield format_sse('error', {'error': str(e), 'status': 503, 'retry_after': max(e.retry_after, 1)})
+        except Exception as e:
+            yield format_sse('error', {'error': f'{failure}: {str(e)}', 'status': 500})
+        else:
+            yield format_sse(event, serialize(result))
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,1167 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import (
+    benchmark, clarity, context, indexer, jobs, llm, projections, providers, services, simulation, singleflight,
+    streams,
+)
+from .breaker import CircuitBreaker
+from .models import (
+    Game, GameCommentary, GameEvent, GameParticipant, GameSummary, IndexerCheckpoint, Job, LeaderboardEntry, LLMResponse,
+    Player, PlayerStats, SingleFlight,
+)
+from .projections import apply_game_counter_deltas, check_game_counters, game_counter_deltas
+
+
+def create_game(game_id, player_count, spins_per_player=3):
+    game = Game.objects.create(
+        game_id=game_id,
+        current_round=spins_per_player,
+        prize_pool=Decimal(5 * player_count),
+        stake_amount=Decimal(5),
+        total_players=player_count,
+        active_players=player_count,
+        total_spins=player_count * spins_per_player,
+    )
+    players = [
+        Player.objects.create(wallet_address=f'ST{game_id}PLAYER{i:02d}')
+        for i in range(player_count)
+    ]
+    GameParticipant.objects.bulk_create([
+        GameParticipant(game=game, player=player, join_position=i + 1)
+        for i, player in enumerate(players)
+    ])
+    GameEvent.objects.bulk_create([
+        GameEvent(
+            game=game,
+            event_type='player_survived',
+            player_address=player.wallet_address,
+            event_data={'round': spin + 1},
+            block_height=100 + spin,
+        )
+        for player in players
+        for spin in range(spins_per_player)
+    ])
+    return game
+
+
+CONTRACT_ID = 'ST168JS95Y70CV8T7T63GF8V420FG2VCBZ5TXP2DA.Breevs-v2'
+
+
+def chain_transactions(game_count, players_per_game=3, rosters=None):
+    """
+    Recorded contract transactions, one per block, for `game_count` full
+    games. `rosters` gives each game's wallets in join order instead; the
+    first one wins and the others are eliminated in join order.
+    """
+    transactions = []
+
+    def record(sender, function_name, arg, result, prints):
+        block = 100 + len(transactions)
+        transactions.append({
+            'tx_id': f'0x{len(transactions) + 1:064x}',
+            'tx_status': 'success',
+            'block_height': block,
+            'tx_index': 0,
+            'sender_address': sender,
+            'contract_call': {
+                'contract_id': CONTRACT_ID,
+                'function_name': function_name,
+                'function_args': [{'repr': arg}],
+            },
+            'tx_result': {'repr': result},
+            'event_count': len(prints),
+            'events': [{
+                'event_index': index,
+                'event_type': 'smart_contract_log',
+                'contract_log': {
+                    'contract_id': CONTRACT_ID,
+                    'topic': 'print',
+                    'value': {'repr': f'(tuple (block u{block}) (event "{name}") (game-id u{game_id}))'},
+                },
+            } for index, name in enumerate(prints)],
+        })
+
+    for game_id in range(1, game_count + 1):
+        players = rosters[game_id - 1] if rosters else [f'ST{game_id}CHAIN{i:02d}' for i in range(players_per_game)]
+        record(players[0], 'create-game', 'u5000000', f'(ok u{game_id})', ['game-created'])
+        for player in players[1:]:
+            record(player, 'join-game', f'u{game_id}', '(ok true)', ['player-joined'])
+        record(players[0], 'start-game', f'u{game_id}', '(ok true)', ['game-started'])
+        for victim in players[1:-1]:
+            record(players[0], 'spin', f'u{game_id}', f"(ok '{victim})", ['player-eliminated'])
+            record(players[0], 'advance-round', f'u{game_id}', '(ok true)', ['round-advanced'])
+        record(players[0], 'spin', f'u{game_id}', f"(ok '{players[-1]})", ['game-completed', 'player-eliminated'])
+        record(players[0], 'claim-prize', f'u{game_id}', '(ok u15000000)', ['prize-claimed'])
+    return transactions
+
+
+def index_chain(testcase, transactions, batch_blocks=4):
+    """Run the indexer over `transactions` recorded to a fixture file"""
+    fixture = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    json.dump(transactions, fixture)
+    fixture.close()
+    testcase.addCleanup(os.unlink, fixture.name)
+    source = indexer.FixtureChainSource(fixture.name)
+    return indexer.ChainIndexer(source, contract_id=CONTRACT_ID, batch_blocks=batch_blocks).run_once()
+
+
+@override_settings(LLM_PROVIDER='fake')
+class PredictOutcomeQueryCountTests(TestCase):
+    # Game lookup, single-flight claim (insert in a savepoint) and release,
+    # the GameContext's players and events queries, the indexed game-counter,
+    # the odds model's spin gaps (cleared here; cached while no newer block
+    # appears) and the LLM cache lookup/store. Must not depend on the player
+    # count.
+    EXPECTED_QUERIES = 11
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        llm.clear_memory_cache()
+        context.clear_memo()
+        simulation.clear_gap_cache()
+
+    def count_queries(self, game):
+        simulation.clear_gap_cache()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/games/{game.pk}/predict_outcome/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_players(self):
+        small = self.count_queries(create_game('2', player_count=2))
+        large = self.count_queries(create_game('6', player_count=6))
+        self.assertEqual(small, large)
+        self.assertEqual(large, self.EXPECTED_QUERIES)
+
+    def test_player_statistics(self):
+        game = create_game('3', player_count=3, spins_per_player=4)
+        GameParticipant.objects.filter(game=game, player__wallet_address='ST3PLAYER00').update(eliminated=True)
+
+        with mock.patch.object(llm, 'agenerate_content', return_value='{}') as generate:
+            self.client.post(f'/api/games/{game.pk}/predict_outcome/')
+
+        prompt = generate.call_args.args[1]
+        self.assertIn('Players Remaining: 2', prompt)
+        self.assertIn('Player ST3PLAYER0...: 4 survivals, Risk Mode: False, Position: 1', prompt)
+        self.assertNotIn('Position: 3', prompt)
+
+    def test_async_prediction_matches_sync(self):
+        game = create_game('5', player_count=4)
+        self.assertEqual(
+            async_to_sync(services.apredict_outcome)(game),
+            services.predict_outcome(game),
+        )
+
+    def test_fast_mode_skips_the_model(self):
+        game = create_game('4', player_count=3)
+
+        with mock.patch.object(llm, 'agenerate_content') as generate:
+            response = self.client.post(f'/api/games/{game.pk}/predict_outcome/?mode=fast')
+
+        generate.assert_not_called()
+        predictions = response.json()['predictions']
+        self.assertEqual(len(predictions), 3)
+        self.assertAlmostEqual(sum(p['win_probability'] for p in predictions), 100, places=1)
+        self.assertEqual(response.json()['rounds_remaining'], 2)
+
+
+class OutcomeProbabilityTests(TestCase):
+    def test_known_spin_heights_are_deterministic(self):
+        # Next spin lands on height 1: index 1 % 2 eliminates the second seat.
+        win, next_elimination = simulation.outcome_probabilities(2, 0, 0, [1])
+        self.assertEqual(list(win), [1, 0])
+        self.assertEqual(list(next_elimination), [0, 1])
+
+    def test_uniform_gaps_give_uniform_next_elimination(self):
+        win, next_elimination = simulation.outcome_probabilities(6, 1234, 57, range(60))
+        self.assertTrue(np.allclose(next_elimination, 1 / 6))
+        self.assertAlmostEqual(win.sum(), 1)
+
+    @override_settings(INDEXER_MAX_LAG=60)
+    def test_confidence_follows_the_indexed_game_counter(self):
+        game = create_game('30', player_count=3)
+
+        def confidence():
+            return services.predict_outcome(game, fast=True)['confidence_level']
+
+        self.assertEqual(confidence(), 'low')
+        IndexerCheckpoint.objects.create(name='breevs', block_height=200, game_counter=30)
+        self.assertEqual(confidence(), 'high')
+        IndexerCheckpoint.objects.update(updated_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(confidence(), 'medium')
+
+
+class GameListPaginationTests(TestCase):
+    def test_cursor_walks_every_game_once_at_constant_cost(self):
+        for i in range(7):
+            Game.objects.create(game_id=str(100 + i), prize_pool=Decimal(0), stake_amount=Decimal(5), status=i % 3)
+        client = APIClient()
+
+        seen, query_counts = [], []
+        url = '/api/games/?page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = client.get(url).json()
+            query_counts.append(len(queries))
+            seen += [game['game_id'] for game in page['results']]
+            url = page['next']
+
+        self.assertEqual(seen, [str(106 - i) for i in range(7)])
+        self.assertEqual(set(query_counts), {1})
+
+        completed = client.get('/api/games/?status=2').json()['results']
+        self.assertEqual([game['game_id'] for game in completed], ['105', '102'])
+        self.assertEqual(client.get('/api/games/?status=done').status_code, 400)
+
+
+@override_settings(LONG_POLL_INTERVAL=0.01)
+class LongPollTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.game = create_game('15', player_count=2)
+        self.events = list(GameEvent.objects.filter(game=self.game).order_by('id'))
+
+    def get(self, path, **params):
+        response = self.client.get(f'/api/games/{self.game.pk}/{path}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_events_since_id_and_since_block(self):
+        delta = self.get('events', since_id=self.events[2].pk)
+        self.assertEqual([event['id'] for event in delta], [event.pk for event in self.events[3:]])
+
+        delta = self.get('events', since_block=101)
+        self.assertEqual({event['block_height'] for event in delta}, {102})
+
+    def test_commentaries_since_id_come_oldest_first(self):
+        commentaries = GameCommentary.objects.bulk_create([
+            GameCommentary(game=self.game, commentary_text=f'#{i}', round_number=1, tension_level=5)
+            for i in range(3)
+        ])
+        delta = self.get('commentaries', since_id=commentaries[0].pk)
+        self.assertEqual([c['commentary_text'] for c in delta], ['#1', '#2'])
+
+    @override_settings(LONG_POLL_MAX_WAIT=0.1)
+    def test_empty_wait_times_out_at_the_clamp(self):
+        started = time.monotonic()
+        self.assertEqual(self.get('events', since_id=self.events[-1].pk, wait=30), [])
+        self.assertEqual(self.get('commentaries', since_id=0, wait=30), [])
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_wait_answers_when_rows_arrive(self):
+        naps = []
+        arrived = []
+
+        async def nap(seconds):
+            naps.append(seconds)
+            if len(naps) == 2:
+                arrived.append(await GameEvent.objects.acreate(
+                    game=self.game, event_type='round_advanced', block_height=300
+                ))
+
+        with mock.patch('asyncio.sleep', nap):
+            delta = self.get('events', since_id=self.events[-1].pk, wait=10)
+        self.assertEqual([event['id'] for event in delta], [arrived[0].pk])
+        self.assertEqual(naps, [0.01, 0.01])
+
+
+class GameBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_batch_lookup_uses_constant_queries(self):
+        for i in range(12):
+            create_game(str(200 + i), player_count=3, spins_per_player=1)
+
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get('/api/games/batch/?ids=201,999,200')
+        self.assertEqual([game['game_id'] for game in response.json()['results']], ['201', '200'])
+        self.assertEqual(response.json()['missing'], ['999'])
+        self.assertEqual(len(response.json()['results'][0]['players']), 3)
+
+        ids = [200 + i for i in range(12)]
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post('/api/games/batch/', {'ids': ids}, format='json')
+        self.assertEqual(len(response.json()['results']), 12)
+        self.assertEqual(len(few), len(many))
+
+        with CaptureQueriesContext(connection) as cached:
+            self.client.post('/api/games/batch/', {'ids': ids}, format='json')
+        self.assertEqual(len(cached), 0)
+
+    def test_batch_limits(self):
+        self.assertEqual(self.client.get('/api/games/batch/').status_code, 400)
+        ids = ','.join(str(i) for i in range(501))
+        self.assertEqual(self.client.get(f'/api/games/batch/?ids={ids}').status_code, 400)
+
+
+class FakeClarityNode:
+    """Counts upstream calls; each takes a moment so callers overlap"""
+
+    def __init__(self):
+        self.tip = 100
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def tip_height(self):
+        return self.tip
+
+    def call_read(self, function_name, arguments):
+        time.sleep(0.05)
+        with self.lock:
+            self.calls.append((function_name, arguments))
+        return {'okay': True, 'result': f'0x{self.tip}{len(arguments)}'}
+
+
+class ClarityProxyTests(TestCase):
+    def setUp(self):
+        self.node = FakeClarityNode()
+        self.proxy = clarity.ReadOnlyProxy(self.node, max_concurrency=4, tip_ttl=0)
+
+    def test_concurrent_identical_calls_share_one_request(self):
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            answers = list(pool.map(lambda _: self.proxy.call('get-game-info', ['0x01']), range(20)))
+        self.assertEqual(len(self.node.calls), 1)
+        self.assertEqual({answer['result'] for answer in answers}, {'0x1001'})
+
+    def test_batch_dedupes_and_cache_follows_chain_tip(self):
+        calls = [('get-game-info', [f'0x{i % 5}']) for i in range(10)] + [('get-total-games', [])]
+        self.assertEqual(len(self.proxy.call_many(calls)), 11)
+        self.assertEqual(len(self.node.calls), 6)
+
+        self.proxy.call_many(calls)
+        self.assertEqual(len(self.node.calls), 6)
+
+        self.node.tip = 101
+        self.assertEqual(self.proxy.call('get-total-games', [])['result'], '0x1010')
+        self.assertEqual(len(self.node.calls), 7)
+
+    def test_rejects_functions_that_are_not_read_only(self):
+        with self.assertRaises(ValueError):
+            self.proxy.call('spin', [])
+
+
+class GameCounterTests(TestCase):
+    def test_event_deltas_match_recomputed_counters(self):
+        game = create_game('7', player_count=3, spins_per_player=2)
+        events = GameEvent.objects.bulk_create([
+            GameEvent(game=game, event_type='shield_used', player_address='ST7PLAYER01', block_height=200),
+            GameEvent(game=game, event_type='player_eliminated', player_address='ST7PLAYER00', block_height=201),
+        ])
+        apply_game_counter_deltas(game_counter_deltas(events))
+
+        game.refresh_from_db()
+        self.assertEqual(
+            (game.active_players, game.total_spins, game.shield_uses, game.eliminations),
+            (2, 7, 1, 1),
+        )
+        self.assertEqual(check_game_counters(), {})
+
+    def test_check_reports_and_fixes_drift(self):
+        game = create_game('8', player_count=2)
+        Game.objects.filter(pk=game.pk).update(total_spins=0)
+
+        self.assertEqual(check_game_counters(), {'8': {'total_spins': (0, 6)}})
+        check_game_counters(fix=True)
+        self.assertEqual(check_game_counters(), {})
+
+
+class FakeStacksApi:
+    """
+    Serves recorded transactions like the Stacks API, newest first. Every
+    page after the first starts with the previous page's last transaction,
+    as when the listing shifts between two page requests.
+    """
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.event_requests = 0
+
+    def get(self, path, **params):
+        if path == '/extended/v1/block':
+            return {'results': [{'height': self.transactions[-1]['block_height']}]}
+        if path == '/extended/v1/tx/multiple':
+            self.event_requests += 1
+            by_id = {tx['tx_id']: tx for tx in self.transactions}
+            return {tx_id: {'found': True, 'result': by_id[tx_id]} for tx_id in params['tx_id']}
+        listed = [
+            {key: value for key, value in tx.items() if key != 'events'}
+            for tx in reversed(self.transactions) if tx['block_height'] <= params['until_block']
+        ]
+        offset, limit = params['offset'], params['limit']
+        start = offset - 1 if offset and limit > 1 else offset
+        return {'total': len(listed), 'results': listed[start:start + limit]}
+
+
+class ChainIndexerTests(TestCase):
+    def setUp(self):
+        self.transactions = chain_transactions(2)
+        self.fixture = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        json.dump(self.transactions, self.fixture)
+        self.fixture.close()
+        self.addCleanup(os.unlink, self.fixture.name)
+
+    def index(self, source):
+        return indexer.ChainIndexer(source, contract_id=CONTRACT_ID, batch_blocks=4).run_once()
+
+    def test_parse_print_event(self):
+        self.assertEqual(
+            indexer.parse_print_event('(tuple (block u812) (event "game-created") (game-id u3))'),
+            {'block': 812, 'event': 'game-created', 'game-id': 3},
+        )
+        self.assertIsNone(indexer.parse_print_event('(tuple (amount u5) (event "transfer"))'))
+
+    def test_ingests_recorded_fixture(self):
+        Game.objects.create(game_id='fixture-1', stake_amount=1, prize_pool=1)
+        blocks, events = self.index(indexer.FixtureChainSource(self.fixture.name))
+
+        self.assertEqual(blocks, len(self.transactions))
+        self.assertEqual(events, GameEvent.objects.count())
+        game = Game.objects.get(game_id='1')
+        self.assertEqual((game.status, game.winner_address, game.prize_pool), (Game.STATUS_COMPLETED, 'ST1CHAIN00', Decimal(15)))
+        self.assertEqual(game.participants.count(), 3)
+        self.assertEqual(game.eliminations, 2)
+        self.assertEqual(
+            IndexerCheckpoint.objects.get(name='breevs').block_height,
+            self.transactions[-1]['block_height'],
+        )
+        # The contract's counter, not the number of rows in the table
+        self.assertEqual(simulation.game_counter(), (2, 'high'))
+        self.assertEqual(check_game_counters(), {})
+
+    def test_resumes_from_checkpoint(self):
+        partial = indexer.FixtureChainSource(self.fixture.name)
+        partial.transactions = partial.transactions[:7]
+        self.index(partial)
+        self.assertEqual(IndexerCheckpoint.objects.get(name='breevs').block_height, 106)
+
+        blocks, _ = self.index(indexer.FixtureChainSource(self.fixture.name))
+        self.assertEqual(blocks, len(self.transactions) - 7)
+        self.assertEqual(self.index(indexer.FixtureChainSource(self.fixture.name)), (0, 0))
+
+        self.assertEqual(Game.objects.count(), 2)
+        self.assertEqual(GameEvent.objects.filter(event_type='game_created').count(), 2)
+        self.assertEqual(Game.objects.get(game_id='2').participants.count(), 3)
+        self.assertEqual(simulation.game_counter(), (2, 'high'))
+        self.assertEqual(check_game_counters(), {})
+
+    def test_http_source_streams_ranges_in_chain_order_without_duplicates(self):
+        api = FakeStacksApi(self.transactions)
+        source = indexer.HttpChainSource('http://chain.test', CONTRACT_ID)
+        source.page_size, source.block_range, source.tx_batch_size = 3, 5, 2
+
+        with mock.patch.object(source, '_get', side_effect=api.get):
+            streamed = list(source.transactions_after(0))
+
+        self.assertEqual([tx['tx_id'] for tx in streamed], [tx['tx_id'] for tx in self.transactions])
+        self.assertTrue(all(len(tx['events']) == tx['event_count'] for tx in streamed))
+        # Ranges of 5, 5, 5 and 1 transactions, fetched two at a time
+        self.assertEqual(api.event_requests, 3 + 3 + 3 + 1)
+        self.assertEqual(source.scanned_to, self.transactions[-1]['block_height'])
+
+
+class GameParticipantMigrationTests(TransactionTestCase):
+    before = [('game', '0009_game_counters')]
+    after = [('game', '0010_game_participant')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        apps = self.migrate(self.before)
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes('game'))
+        Game = apps.get_model('game', 'Game')
+        Player = apps.get_model('game', 'Player')
+        GameEvent = apps.get_model('game', 'GameEvent')
+
+        self.first = Game.objects.create(game_id='m1', prize_pool=10, stake_amount=5, current_round=2)
+        self.second = Game.objects.create(game_id='m2', prize_pool=10, stake_amount=5, current_round=1)
+        # The old global flags still describe the wallets' latest game
+        alice = Player.objects.create(wallet_address='STALICE', used_risk_mode=True)
+        bob = Player.objects.create(wallet_address='STBOB', eliminated=True, eliminated_round=1)
+        self.first.players.add(alice)
+        self.first.players.add(bob)
+        self.second.players.add(bob)
+        GameEvent.objects.create(
+            game=self.first, event_type='player_eliminated', player_address='STALICE',
+            event_data={'round': 2}, block_height=10,
+        )
+
+    def test_memberships_move_to_participants_and_back(self):
+        apps = self.migrate(self.after)
+        GameParticipant = apps.get_model('game', 'GameParticipant')
+        self.assertEqual(
+            sorted(GameParticipant.objects.values_list(
+                'game__game_id', 'player__wallet_address', 'join_position', 'eliminated', 'eliminated_round',
+                'used_risk_mode',
+            )),
+            [
+                ('m1', 'STALICE', 1, True, 2, True),
+                ('m1', 'STBOB', 2, True, 1, False),
+                ('m2', 'STBOB', 1, True, 1, False),
+            ],
+        )
+
+        apps = self.migrate(self.before)
+        Game = apps.get_model('game', 'Game')
+        Player = apps.get_model('game', 'Player')
+        self.assertEqual(
+            sorted(Game.players.through.objects.values_list('game__game_id', 'player__wallet_address')),
+            [('m1', 'STALICE'), ('m1', 'STBOB'), ('m2', 'STBOB')],
+        )
+        self.assertEqual(
+            sorted(Player.objects.values_list('wallet_address', 'eliminated', 'eliminated_round', 'used_risk_mode')),
+            [('STALICE', True, 2, True), ('STBOB', True, 1, False)],
+        )
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Each game's creator wins; everyone stakes 5 STX
+        index_chain(self, chain_transactions(2))
+
+    def test_indexer_applies_user_stats_deltas(self):
+        entries = {
+            entry.wallet_address: (
+                entry.games_played, entry.games_won, entry.total_staked, entry.total_winnings, entry.win_rate
+            )
+            for entry in LeaderboardEntry.objects.all()
+        }
+        self.assertEqual(len(entries), 6)
+        self.assertEqual(entries['ST1CHAIN00'], (1, 1, 5_000_000, 15_000_000, 100))
+        self.assertEqual(entries['ST2CHAIN00'], (1, 1, 5_000_000, 15_000_000, 100))
+        self.assertEqual(entries['ST1CHAIN02'], (1, 0, 5_000_000, 0, 0))
+
+    def test_pages_and_ranks_follow_the_ordering_with_ties_broken_by_id(self):
+        LeaderboardEntry.objects.create(
+            wallet_address='STRICH', games_played=1, games_won=1, total_staked=5_000_000,
+            total_winnings=40_000_000, win_rate=100,
+        )
+        expected = list(LeaderboardEntry.objects.order_by('-win_rate', '-total_winnings', 'id').values_list(
+            'wallet_address', flat=True
+        ))
+        self.assertEqual(expected[:3], ['STRICH', 'ST1CHAIN00', 'ST2CHAIN00'])
+
+        ranked, url = [], '/api/leaderboard/?page_size=3'
+        while url:
+            body = self.client.get(url).json()
+            ranked += [(entry['rank'], entry['wallet_address']) for entry in body['results']]
+            url = body['next']
+        self.assertEqual(ranked, list(enumerate(expected, start=1)))
+
+        for rank, wallet in ranked:
+            body = self.client.get(f'/api/leaderboard/{wallet}/').json()
+            self.assertEqual(body['rank'], rank, wallet)
+        self.assertEqual(self.client.get('/api/leaderboard/STNOBODY/').status_code, 404)
+
+
+@override_settings(LLM_PROVIDER='fake')
+class PlayerStatsTests(TestCase):
+    def setUp(self):
+        llm.clear_memory_cache()
+        # The first wallet of each roster wins
+        rosters = [['STALICE', 'STBOB', 'STCAROL'], ['STBOB', 'STALICE', 'STCAROL'], ['STCAROL', 'STALICE']]
+        index_chain(self, chain_transactions(len(rosters), rosters=rosters))
+
+    def stats(self):
+        return {
+            stats.wallet_address: (stats.games_played, stats.wins, stats.total_rounds_survived, stats.risk_mode_uses)
+            for stats in PlayerStats.objects.all()
+        }
+
+    def test_completions_update_stats_like_a_rebuild(self):
+        indexed = self.stats()
+        self.assertEqual(indexed, {
+            'STALICE': (3, 1, 2 + 1 + 1, 0),
+            'STBOB': (2, 1, 1 + 2, 0),
+            'STCAROL': (3, 1, 2 + 2 + 1, 0),
+        })
+        self.assertEqual(projections.rebuild_player_stats(), 3)
+        self.assertEqual(self.stats(), indexed)
+
+    def test_compare_strategies_prompts_with_the_stored_stats(self):
+        with mock.patch.object(llm, 'agenerate_content', mock.AsyncMock(return_value='Analysis')) as generate:
+            response = APIClient().post(
+                '/api/games/compare_strategies/', {'wallets': ['STALICE', 'STBOB']}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['ai_analysis'], 'Analysis')
+        self.assertEqual(
+            [(stats['full_wallet'], stats['games_played'], stats['wins'], stats['average_survival_rounds'])
+             for stats in body['player_stats']],
+            [('STALICE', 3, 1, 1.33), ('STBOB', 2, 1, 1.5)],
+        )
+        prompt = generate.call_args.args[1]
+        self.assertIn('Player STALICE...:\n- Games: 3, Wins: 1 (33.33%)', prompt)
+        self.assertIn('- Avg Survival: 1.33 rounds', prompt)
+        self.assertIn('Player STBOB...:\n- Games: 2, Wins: 1 (50.0%)', prompt)
+        self.assertIn('- Avg Survival: 1.5 rounds', prompt)
+        self.assertNotIn('STCAROL', prompt)
+
+
+class SummaryOnCompletionTests(TestCase):
+    def test_completion_queues_one_summary_job(self):
+        game = create_game('9', player_count=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save()
+        self.assertFalse(Job.objects.exists())
+
+        game.is_completed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            game.save(update_fields=['is_completed'])
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.game_id, job.status), ('generate_summary', game.pk, 'queued'))
+
+        response = APIClient().get(f'/api/games/{game.pk}/summary/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job_id'], job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_reading_a_summary_never_queues_a_job(self):
+        game = create_game('10', player_count=2)
+        Game.objects.filter(pk=game.pk).update(is_completed=True)
+        response = APIClient().get(f'/api/games/{game.pk}/summary/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(LLM_PROVIDER='fake')
+class BackfillSummariesTests(TransactionTestCase):
+    class TrackingProvider(providers.FakeProvider):
+        """FakeProvider recording when each call started and the most in flight"""
+
+        def __init__(self, latency):
+            super().__init__(latency=latency)
+            self.lock = threading.Lock()
+            self.started, self.in_flight, self.max_in_flight = [], 0, 0
+
+        def generate(self, *args, **kwargs):
+            with self.lock:
+                self.started.append(time.monotonic())
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                return super().generate(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    def setUp(self):
+        llm.clear_memory_cache()
+        for number in range(6):
+            create_game(f'backfill-{number}', player_count=2)
+        Game.objects.update(is_completed=True)
+
+    def test_pool_is_bounded_and_rate_limited(self):
+        provider = self.TrackingProvider(latency=0.3)
+        output = StringIO()
+        with mock.patch.object(providers, 'get_provider', return_value=provider):
+            call_command('backfill_summaries', concurrency=2, rate=600, stdout=output)
+
+        self.assertEqual(GameSummary.objects.count(), 6)
+        self.assertIn('Created 6 summaries (0 already existed, 0 failed)', output.getvalue())
+        # 600/min: starts at least 0.1s apart, at most two calls at a time
+        self.assertEqual(len(provider.started), 6)
+        gaps = [later - earlier for earlier, later in zip(provider.started, provider.started[1:])]
+        self.assertGreaterEqual(min(gaps), 0.09)
+        self.assertEqual(provider.max_in_flight, 2)
+
+        call_command('backfill_summaries', stdout=output)
+        self.assertIn('0 completed games without a summary', output.getvalue())
+
+
+class JobQueueTests(TestCase):
+    def test_claims_are_exclusive_and_oldest_first(self):
+        game = create_game('20', player_count=2)
+        first = jobs.enqueue('predict_outcome', game=game)
+        second = jobs.enqueue('compare_strategies', wallets=['a', 'b'])
+
+        claimed = [jobs.claim_next('w1'), jobs.claim_next('w2'), jobs.claim_next('w3')]
+        self.assertEqual([job.pk if job else None for job in claimed], [first.pk, second.pk, None])
+        self.assertEqual(
+            list(Job.objects.order_by('id').values_list('status', 'worker', 'attempts')),
+            [('running', 'w1', 1), ('running', 'w2', 1)],
+        )
+
+    @override_settings(JOB_TIMEOUT=60, JOB_MAX_ATTEMPTS=2)
+    def test_stale_jobs_are_retried_up_to_the_attempt_limit(self):
+        retry = jobs.enqueue('compare_strategies', wallets=['a', 'b'])
+        exhausted = jobs.enqueue('compare_strategies', wallets=['c', 'd'])
+        fresh = jobs.enqueue('compare_strategies', wallets=['e', 'f'])
+        started = timezone.now() - timedelta(seconds=120)
+        Job.objects.filter(pk=retry.pk).update(status='running', attempts=1, started_at=started)
+        Job.objects.filter(pk=exhausted.pk).update(status='running', attempts=2, started_at=started)
+        Job.objects.filter(pk=fresh.pk).update(status='running', attempts=1, started_at=timezone.now())
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[retry.pk], statuses[exhausted.pk], statuses[fresh.pk]], ['queued', 'failed', 'running']
+        )
+        self.assertEqual(jobs.claim_next('w1').attempts, 2)
+
+    @override_settings(JOB_TIMEOUT=60)
+    def test_a_requeued_jobs_late_finisher_does_not_overwrite_the_retry(self):
+        job = jobs.enqueue('compare_strategies', wallets=['a', 'b'])
+        slow = jobs.claim_next('w1')
+        # w1 is still alive but past the timeout, so the sweep hands the job to w2
+        Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        retry = jobs.claim_next('w2')
+
+        with mock.patch.dict(jobs.HANDLERS, {'compare_strategies': mock.Mock(side_effect=ValueError('late'))}):
+            self.assertFalse(jobs.run_job(slow))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.error), ('running', 'w2', ''))
+
+        with mock.patch.dict(jobs.HANDLERS, {'compare_strategies': lambda job: {'attempt': job.attempts}}):
+            self.assertTrue(jobs.run_job(retry))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('succeeded', {'attempt': 2}))
+
+    def test_one_live_job_per_game_and_kind(self):
+        game = create_game('21', player_count=2)
+        first = jobs.enqueue('predict_outcome', game=game)
+        self.assertEqual(jobs.enqueue('predict_outcome', game=game).pk, first.pk)
+        self.assertNotEqual(jobs.enqueue('generate_live_commentary', game=game).pk, first.pk)
+
+        game.is_completed = True
+        jobs.enqueue_summaries([game])
+        # A second completion of the same game, e.g. from another indexer run
+        jobs.enqueue_summaries([game])
+        self.assertEqual(Job.objects.filter(kind='generate_summary').count(), 1)
+        self.assertEqual(jobs.enqueue('generate_summary', game=game), jobs.active_job('generate_summary', game))
+
+        Job.objects.filter(pk=first.pk).update(status='succeeded')
+        self.assertNotEqual(jobs.enqueue('predict_outcome', game=game).pk, first.pk)
+
+    def test_pool_sweeps_stale_jobs_once_per_interval(self):
+        pool = jobs.WorkerPool(concurrency=2, requeue_interval=60)
+        self.assertEqual([pool._requeue_due(), pool._requeue_due()], [True, False])
+        pool.next_requeue = 0
+        self.assertTrue(pool._requeue_due())
+
+    def test_status_endpoint_reports_queue_position_then_result(self):
+        client = APIClient()
+        jobs.enqueue('compare_strategies', wallets=['a', 'b'])
+        job = jobs.enqueue('compare_strategies', wallets=['c', 'd'])
+        body = client.get(f'/api/jobs/{job.pk}/').json()
+        self.assertEqual((body['status'], body['queue_position']), ('queued', 2))
+
+        with mock.patch.dict(jobs.HANDLERS, {'compare_strategies': lambda job: {'wallets': job.params['wallets']}}):
+            while (claimed := jobs.claim_next('w1')) is not None:
+                jobs.run_job(claimed)
+        body = client.get(f'/api/jobs/{job.pk}/').json()
+        self.assertEqual(
+            (body['status'], body['queue_position'], body['result']), ('succeeded', None, {'wallets': ['c', 'd']})
+        )
+        self.assertEqual(client.get('/api/jobs/999999/').status_code, 404)
+
+
+class SingleFlightTests(TestCase):
+    async def test_concurrent_callers_share_the_leaders_result(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {'value': 42}
+
+        results = await asyncio.gather(*[
+            singleflight.arun('flight:shared', compute, poll_interval=0.01) for _ in range(3)
+        ])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], [{'value': 42}] * 3)
+        self.assertEqual(sorted(computed for _, computed in results), [False, False, True])
+
+    async def test_waiters_see_the_leader_fail(self):
+        async def compute():
+            await asyncio.sleep(0.1)
+            raise ValueError('model exploded')
+
+        leader, waiter = await asyncio.gather(
+            singleflight.arun('flight:failing', compute, poll_interval=0.01),
+            singleflight.arun('flight:failing', compute, poll_interval=0.01),
+            return_exceptions=True,
+        )
+        self.assertIsInstance(leader, ValueError)
+        self.assertIsInstance(waiter, singleflight.SingleFlightError)
+        self.assertIn('model exploded', str(waiter))
+
+    def test_expired_lease_is_taken_over(self):
+        SingleFlight.objects.create(
+            key='flight:stale', owner='dead-host:1:1', expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(singleflight.run('flight:stale', lambda: 'fresh'), ('fresh', True))
+        flight = SingleFlight.objects.get(key='flight:stale')
+        self.assertEqual((flight.status, flight.result), ('done', 'fresh'))
+        # Within the result TTL later callers reuse it
+        self.assertEqual(singleflight.run('flight:stale', lambda: 'again'), ('fresh', False))
+
+
+class ProviderTests(TestCase):
+    def test_fake_provider_is_deterministic(self):
+        provider = providers.FakeProvider()
+        json_config = {'response_mime_type': 'application/json'}
+        self.assertEqual(provider.generate('m', 'prompt'), provider.generate('m', 'prompt'))
+        self.assertNotEqual(provider.generate('m', 'prompt'), provider.generate('m', 'other'))
+        self.assertIn('predictions', provider.generate('m', 'prompt', json_config))
+
+    def test_gemini_sdk_is_not_loaded_at_startup(self):
+        script = (
+            'import sys, django; django.setup(); import api.urls, game.jobs; '
+            'print("google.generativeai" in sys.modules)'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'api.settings'},
+        ).stdout
+        self.assertEqual(output.strip(), 'False')
+
+
+class LLMCacheTests(TestCase):
+    def setUp(self):
+        llm.clear_memory_cache()
+        self.provider = providers.FakeProvider()
+        patcher = mock.patch.object(providers, 'get_provider', return_value=self.provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_memory_then_shared_tier_before_the_model(self):
+        text = llm.generate_content('flash', 'prompt', action='predict_outcome')
+        self.assertEqual(self.provider.calls['flash'], 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(llm.generate_content('flash', 'prompt', action='predict_outcome'), text)
+
+        # Another worker: nothing in memory, the shared row answers
+        llm.clear_memory_cache()
+        self.assertEqual(llm.generate_content('flash', 'prompt', action='predict_outcome'), text)
+        self.assertEqual(self.provider.calls['flash'], 1)
+        self.assertEqual(LLMResponse.objects.get(key=llm.cache_key('flash', 'prompt')).hits, 1)
+
+        llm.generate_content('flash', 'other prompt', action='predict_outcome')
+        self.assertEqual(self.provider.calls['flash'], 2)
+
+    @override_settings(LLM_CACHE_TTLS={**settings.LLM_CACHE_TTLS, 'predict_outcome': 0.05})
+    def test_expired_entries_are_regenerated(self):
+        llm.generate_content('flash', 'prompt', action='predict_outcome')
+        time.sleep(0.1)
+
+        llm.generate_content('flash', 'prompt', action='predict_outcome')
+        self.assertEqual(self.provider.calls['flash'], 2)
+        stored = LLMResponse.objects.get(key=llm.cache_key('flash', 'prompt'))
+        self.assertGreater(stored.expires_at, timezone.now())
+        self.assertEqual(stored.hits, 0)
+
+    def test_polling_an_unchanged_game_reuses_its_commentary(self):
+        game = create_game('5', player_count=3)
+
+        commentary, created = services.generate_live_commentary(game)
+        self.assertTrue(created)
+        again, created = services.generate_live_commentary(game)
+        self.assertEqual((again.pk, created), (commentary.pk, False))
+
+        GameEvent.objects.create(game=game, event_type='round_advanced', block_height=300)
+        _, created = services.generate_live_commentary(game)
+        self.assertTrue(created)
+
+        # Past its TTL the commentary is written afresh
+        GameCommentary.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        _, created = services.generate_live_commentary(game)
+        self.assertTrue(created)
+        self.assertEqual(GameCommentary.objects.count(), 3)
+        self.assertEqual(self.provider.calls['gemini-2.5-flash'], 2)
+
+
+@override_settings(
+    LLM_PROVIDER='fake',
+    LLM_TIMEOUTS={'default': 1},
+    LLM_LATENCY_BUDGETS={'pro': 0.05},
+    LLM_FALLBACK_MODELS={'pro': 'flash'},
+    LLM_BREAKER_FAILURES=2,
+    LLM_BREAKER_COOLDOWN=60,
+)
+class LLMResilienceTests(TestCase):
+    def setUp(self):
+        llm.clear_memory_cache()
+        patcher = mock.patch.dict(llm._breakers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use(self, provider):
+        patcher = mock.patch.object(providers, 'get_provider', return_value=provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return provider
+
+    def test_slow_pro_falls_back_to_flash(self):
+        provider = self.use(providers.FakeProvider(model_latency={'pro': 5}))
+
+        started = time.monotonic()
+        text = llm.generate_content('pro', 'prompt')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIn('flash', text)
+
+        text = async_to_sync(llm.agenerate_content)('pro', 'other prompt')
+        self.assertIn('flash', text)
+        self.assertEqual(provider.calls, {'pro': 2, 'flash': 2})
+
+    def test_open_breaker_fails_fast_and_serves_last_response(self):
+        llm.generate_content('flash', 'old prompt', scope='game:1')
+        provider = self.use(providers.FakeProvider(error_rate=1))
+
+        for attempt in range(2):
+            self.assertIn('flash', llm.generate_content('flash', f'new prompt {attempt}', scope='game:1'))
+        self.assertEqual(llm.get_breaker('flash').state, 'open')
+        self.assertEqual(provider.calls['flash'], 2)
+
+        # Open: the provider is not called, the stored response stands in
+        self.assertIn('flash', llm.generate_content('flash', 'newer prompt', scope='game:1'))
+        self.assertEqual(provider.calls['flash'], 2)
+        with self.assertRaises(llm.LLMUnavailable) as raised:
+            llm.generate_content('flash', 'unrelated prompt')
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    def test_breaker_probes_after_cooldown(self):
+        clock = mock.Mock(return_value=0)
+        breaker = CircuitBreaker(failures=1, cooldown=10, clock=clock)
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        clock.return_value = 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.success()
+        self.assertEqual(breaker.state, 'closed')
+
+
+class BenchmarkTests(TestCase):
+    def test_fixture_is_consistent_and_endpoints_stay_within_budget(self):
+        events = benchmark.seed_fixture(games=60, batch_size=25)
+
+        self.assertEqual(GameEvent.objects.count(), events)
+        self.assertEqual(check_game_counters(), {})
+        report = benchmark.run_benchmarks(runs=2)
+        self.assertEqual(len(report['results']), len(benchmark.ENDPOINTS))
+        self.assertEqual([result['name'] for result in report['results'] if not result['ok']], [])
+
+
+class AsyncActionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_only_the_ai_and_long_poll_actions_are_async_views(self):
+        game = create_game('3', player_count=2)
+        for path in ('predict_outcome', 'generate_live_commentary', 'generate_summary', 'events', 'commentaries'):
+            self.assertTrue(iscoroutinefunction(resolve(f'/api/games/{game.pk}/{path}/').func), path)
+        self.assertTrue(iscoroutinefunction(resolve('/api/games/compare_strategies/').func))
+        self.assertFalse(iscoroutinefunction(resolve(f'/api/games/{game.pk}/').func))
+        self.assertFalse(iscoroutinefunction(resolve(f'/api/games/{game.pk}/summary/').func))
+
+    def test_async_actions_answer_through_drf(self):
+        response = self.client.post('/api/games/999/predict_outcome/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', response.json())
+
+        self.assertEqual(self.client.get('/api/games/compare_strategies/').status_code, 405)
+
+        # Parsed by DRF, so form posts work as well as JSON
+        response = self.client.post('/api/games/compare_strategies/', {'wallets': 'SP1'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/games/compare_strategies/?async=1', {'wallets': ['SP1', 'SP2']})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get(pk=response.json()['job_id']).params, {'wallets': ['SP1', 'SP2']})
+        response = self.client.post('/api/games/compare_strategies/', '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+
+@override_settings(LLM_PROVIDER='fake')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        llm.clear_memory_cache()
+        context.clear_memo()
+        simulation.clear_gap_cache()
+
+    def test_server_timing_splits_sql_model_and_serialization(self):
+        game = create_game('9', player_count=3)
+        response = self.client.post(f'/api/games/{game.pk}/predict_outcome/')
+
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(list(timing), ['db', 'llm', 'serialize', 'app', 'total'])
+        self.assertIn(f'desc="{PredictOutcomeQueryCountTests.EXPECTED_QUERIES} queries"', timing['db'])
+        self.assertIn('gemini-2.5-flash', timing['llm'])
+
+        exported = self.client.get('/metrics').content.decode()
+        self.assertIn('breevs_request_db_queries_count{endpoint="games-predict-outcome"}', exported)
+        self.assertIn('breevs_llm_call_duration_seconds_count{action="predict_outcome"', exported)
+
+
+@override_settings(LLM_PROVIDER='fake')
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        self.client = APIClient()
+        cache.clear()
+        llm.clear_memory_cache()
+        context.clear_memo()
+        simulation.clear_gap_cache()
+
+    def profiling(self, enabled=True):
+        return override_settings(
+            PROFILING_ENABLED=enabled, PROFILING_TOKEN='s3cret', PROFILE_DIR=self.profile_dir.name, PROFILE_RING_SIZE=2,
+        )
+
+    def test_profiles_requests_with_the_token_into_a_ring(self):
+        game = create_game('10', player_count=3)
+        with self.profiling():
+            self.assertNotIn('X-Profile-Id', self.client.get(f'/api/games/{game.pk}/events/'))
+            self.assertNotIn('X-Profile-Id', self.client.get(f'/api/games/{game.pk}/events/?profile=wrong'))
+            ids = [
+                self.client.get(f'/api/games/{game.pk}/events/?profile=s3cret&since_id=0')['X-Profile-Id'],
+                self.client.get(f'/api/games/{game.pk}/', HTTP_X_PROFILE='s3cret')['X-Profile-Id'],
+                self.client.post(f'/api/games/{game.pk}/predict_outcome/', HTTP_X_PROFILE='s3cret')['X-Profile-Id'],
+            ]
+
+            self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+            index = self.client.get('/api/profiles/', HTTP_X_PROFILE_TOKEN='s3cret').json()
+            self.assertEqual([run['id'] for run in index['results']], ids[:0:-1])
+
+            run = self.client.get(f'/api/profiles/{ids[2]}/', HTTP_X_PROFILE_TOKEN='s3cret').json()
+            self.assertEqual(run['endpoint'], 'games-predict-outcome')
+            self.assertEqual(run['queries'], PredictOutcomeQueryCountTests.EXPECTED_QUERIES)
+            call_sites = [site['stack'][-1] for statement in run['slow_sql'] for site in statement['call_sites']]
+            self.assertTrue(any(site.startswith('game/context.py') for site in call_sites))
+
+            download = self.client.get(f'/api/profiles/{ids[2]}/download/', HTTP_X_PROFILE_TOKEN='s3cret')
+            self.assertEqual(download.status_code, 200)
+            self.assertEqual(self.client.get(f'/api/profiles/{ids[0]}/', HTTP_X_PROFILE_TOKEN='s3cret').status_code, 404)
+
+        with self.profiling(enabled=False):
+            self.assertEqual(self.client.get('/api/profiles/', HTTP_X_PROFILE_TOKEN='s3cret').status_code, 404)
+
+
+@override_settings(LLM_PROVIDER='fake')
+class StreamingGenerationTests(TestCase):
+    def setUp(self):
+        llm.clear_memory_cache()
+        context.clear_memo()
+        patcher = mock.patch.object(providers, 'get_provider', return_value=providers.FakeProvider(latency=0.4))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def read_events(self, response):
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        events = []
+        for message in body.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in message.splitlines())
+            events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    async def test_commentary_streams_before_it_is_stored(self):
+        game = await sync_to_async(create_game)('11', player_count=3)
+        response = await self.async_client.post(f'/api/games/{game.pk}/generate_live_commentary/?stream=1')
+        self.assertFalse(await GameCommentary.objects.filter(game=game).aexists())
+
+        events = await self.read_events(response)
+        deltas = [data['text'] for event, data in events if event == 'delta']
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual(events[-1][0], 'commentary')
+        stored = await GameCommentary.objects.aget(game=game)
+        self.assertEqual(''.join(deltas), stored.commentary_text)
+        self.assertEqual(events[-1][1]['id'], stored.pk)
+
+    async def test_summary_streams_once(self):
+        game = await sync_to_async(create_game)('12', player_count=2)
+        game.is_completed = True
+        await game.asave(update_fields=['is_completed'])
+
+        events = await self.read_events(
+            await self.async_client.post(f'/api/games/{game.pk}/generate_summary/?stream=1')
+        )
+        summary = await GameSummary.objects.aget(game=game)
+        self.assertEqual(''.join(data['text'] for event, data in events if event == 'delta'), summary.ai_summary)
+        self.assertEqual(events[-1][0], 'summary')
+        self.assertEqual(events[-1][1]['ai_summary'], summary.ai_summary)
+
+        again = await self.async_client.post(f'/api/games/{game.pk}/generate_summary/?stream=1')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()['message'], 'Summary already exists')
+
+
+@override_settings(STREAM_POLL_INTERVAL=0.01)
+class GameStreamTests(TestCase):
+    async def test_subscriber_receives_new_events_and_commentary(self):
+        game = await sync_to_async(create_game)('13', player_count=2)
+        response = await self.async_client.get(f'/api/games/{game.pk}/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        messages = aiter(response.streaming_content)
+        self.assertEqual((await anext(messages)).decode(), 'retry: 3000\n\n')
+
+        # Only rows written after subscribing are sent
+        channel = streams.get_channel(game.pk)
+        await asyncio.sleep(0.05)
+        event = await GameEvent.objects.acreate(
+            game=game, event_type='round_advanced', block_height=300, event_data={'round': 2}
+        )
+        commentary = await GameCommentary.objects.acreate(
+            game=game, commentary_text='Spin!', round_number=2, tension_level=5
+        )
+
+        received = [(await anext(messages)).decode() for _ in range(2)]
+        self.assertTrue(received[0].startswith(f'id: event-{event.pk}\nevent: game_event\n'))
+        self.assertTrue(received[1].startswith(f'id: commentary-{commentary.pk}\nevent: commentary\n'))
+        self.assertEqual(json.loads(received[1].split('data: ', 1)[1])['commentary_text'], 'Spin!')
+
+        # A disconnect cancels the waiting response; the last viewer leaving
+        # stops the game's polling task
+        waiting = asyncio.ensure_future(anext(messages))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.wait_for(channel.task, timeout=1)
+        self.assertNotIn(game.pk, streams._channels)
+
+    def test_wsgi_requests_are_refused(self):
+        game = create_game('14', player_count=2)
+        response = self.client.get(f'/api/games/{game.pk}/stream/')
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
@@ -1,13 +1,28 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from .views import GameViewSet, GameSummaryViewSet
+from .streams import game_stream
+from .views import (
+    GameViewSet, GameSummaryViewSet, LeaderboardViewSet, JobViewSet, LLMCacheViewSet, ClarityProxyViewSet, ProfileViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'games', GameViewSet, basename='games')
 router.register(r'summaries', GameSummaryViewSet, basename='summaries')
+router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
+router.register(r'jobs', JobViewSet, basename='jobs')
+router.register(r'llm-cache', LLMCacheViewSet, basename='llm-cache')
+router.register(r'clarity', ClarityProxyViewSet, basename='clarity')
+router.register(r'profiles', ProfileViewSet, basename='profiles')
 
 
 urlpatterns = [
+    path('games/<int:pk>/stream/', game_stream, name='games-stream'),
+    # Stacks clients post to the node path without a trailing slash
+    re_path(
+        r'^clarity/v2/contracts/call-read/(?P<contract_address>[^/.]+)/(?P<contract_name>[^/.]+)/(?P<function_name>[^/.]+)$',
+        ClarityProxyViewSet.as_view({'post': 'call_read'}),
+        name='clarity-call-read-node-path',
+    ),
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
@@ -1379,31 +1379,46 @@
 #         return queryset.order_by('-generated_at')
 
 
-from rest_framework import viewsets, status
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count
+from django.http import FileResponse, Http404
+from django.conf import settings
 from django.core.cache import cache
-from .models import Game, Player, GameSummary, GameCommentary
+from .models import Game, GameSummary, GameCommentary, Job, LeaderboardEntry
 from .serializers import ( 
     GameEventSerializer, GameSummarySerializer,
     GameDetailSerializer, GameListSerializer,
-    GameCommentarySerializer,
+    GameCommentarySerializer, LeaderboardEntrySerializer, JobSerializer,
 )
-import google.generativeai as genai
-import os
-import json
-
-# Configure Gemini
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+from .pagination import KeysetPagination, LeaderboardPagination, keyset_before
+from . import clarity, jobs, llm, profiling, services, streams
+from .async_views import AsyncActionsMixin
+from .profiling import HasProfilingToken
 
-class GameViewSet(viewsets.ReadOnlyModelViewSet):
+class GameViewSet(AsyncActionsMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only viewset for games with AI-powered features using Gemini
+
+    List Query Parameters:
+    - status: 0 (created), 1 (in progress) or 2 (completed)
+    - wallet: Only games this wallet joined
+    - page_size: Games per page (default: 50, max: 500)
+    - cursor: Opaque cursor taken from the previous page's "next" link
+
+    The list is newest first and paged with a keyset seek on
+    (created_at, id), so deep pages cost the same as the first one.
     """
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -1411,46 +1426,176 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         return GameListSerializer
     
     def get_queryset(self):
-        queryset = Game.objects.all().prefetch_related('players', 'events')
+        queryset = Game.objects.all()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('players')
         
-        status_filter = self.request.query_params.get('status', None)
+        status_filter = self._int_param(self.request, 'status')
         if status_filter is not None:
-            queryset = queryset.filter(status=int(status_filter))
+            queryset = queryset.filter(status=status_filter)
         
         wallet = self.request.query_params.get('wallet', None)
         if wallet:
-            queryset = queryset.filter(players__wallet_address=wallet)
+            queryset = queryset.filter(participants__player__wallet_address=wallet)
         
-        return queryset.order_by('-created_at')
+        return queryset.order_by('-created_at', 'id')
+    
+    def _int_param(self, request, name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: 'Must be an integer'})
+    
+    async def _wait_for_rows(self, queryset, wait):
+        """
+        Long-poll until `queryset` has rows or `wait` seconds pass.
+        
+        The request sleeps on the event loop between checks, so under the
+        ASGI server a waiting client holds no worker thread.
+        """
+        if not wait:
+            return
+        deadline = time.monotonic() + min(wait, settings.LONG_POLL_MAX_WAIT)
+        while not await queryset.aexists():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(settings.LONG_POLL_INTERVAL, remaining))
+    
+    def _wants_job(self, request):
+        return (
+            request.query_params.get('async') in ('1', 'true')
+            or 'respond-async' in request.headers.get('Prefer', '')
+        )
+    
+    def _wants_stream(self, request):
+        # Under WSGI the answer comes back whole instead
+        return request.query_params.get('stream') in ('1', 'true') and streams.can_stream(request)
+    
+    def _llm_unavailable(self, error):
+        return Response(
+            {'error': str(error)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(max(error.retry_after, 1))}
+        )
+    
+    def _job_accepted(self, request, job):
+        status_url = request.build_absolute_uri(f'/api/jobs/{job.pk}/')
+        return Response(
+            {'job_id': job.pk, 'status': job.status, 'status_url': status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url}
+        )
+    
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request):
+        """
+        Look up many games by contract game id in one request
+        
+        Method: GET or POST
+        Endpoint: /api/games/batch/?ids=1,2,3
+        
+        Request Body (POST, for large sets):
+        {
+            "ids": [1, 2, 3]
+        }
+        
+        Response:
+        {
+            "results": [GameDetail, ...],   // in the order requested
+            "missing": ["3"]                // ids with no indexed game
+        }
+        
+        Errors:
+        - 400: No ids, or more than GAME_BATCH_MAX_IDS (default 500)
+        
+        Games come from a short-lived cache (GAME_BATCH_CACHE_TTL seconds);
+        misses are loaded with their players in two queries however many
+        ids are asked for.
+        """
+        if request.method == 'POST':
+            raw_ids = request.data.get('ids', [])
+        else:
+            raw_ids = request.query_params.get('ids', '').split(',')
+        if not isinstance(raw_ids, list):
+            raise ValidationError({'ids': 'Must be a list of game ids'})
+        
+        ids = list(dict.fromkeys(str(game_id).strip() for game_id in raw_ids if str(game_id).strip()))
+        if not ids:
+            raise ValidationError({'ids': 'Provide at least one game id'})
+        if len(ids) > settings.GAME_BATCH_MAX_IDS:
+            raise ValidationError({'ids': f'At most {settings.GAME_BATCH_MAX_IDS} game ids per request'})
+        
+        keys = {game_id: f'game_batch_{game_id}' for game_id in ids}
+        cached = cache.get_many(keys.values())
+        games = {game_id: cached[key] for game_id, key in keys.items() if key in cached}
+        
+        misses = [game_id for game_id in ids if game_id not in games]
+        if misses:
+            found = Game.objects.filter(game_id__in=misses).prefetch_related('players')
+            loaded = {data['game_id']: data for data in GameDetailSerializer(found, many=True).data}
+            cache.set_many(
+                {keys[game_id]: data for game_id, data in loaded.items()},
+                settings.GAME_BATCH_CACHE_TTL
+            )
+            games.update(loaded)
+        
+        return Response({
+            'results': [games[game_id] for game_id in ids if game_id in games],
+            'missing': [game_id for game_id in ids if game_id not in games],
+        })
     
     @action(detail=True, methods=['get'])
-    def events(self, request, pk=None):
+    async def events(self, request, pk=None):
         """
         Get all events for a specific game
         
         Query Parameters:
         - type: Filter by event type (optional)
+        - since_id: Only events with a larger id (optional)
+        - since_block: Only events after this block height (optional)
+        - wait: With since_id/since_block, wait up to this many seconds
+          for new events before answering (long-poll, max 30)
         
-        Returns: List of game events
+        Returns: List of game events, oldest first
         """
-        game = self.get_object()
-        events = game.events.all()
+        game = await sync_to_async(self.get_object)()
+        events = game.events.all().order_by('id')
         
         event_type = request.query_params.get('type', None)
         if event_type:
             events = events.filter(event_type=event_type)
         
+        since_id = self._int_param(request, 'since_id')
+        since_block = self._int_param(request, 'since_block')
+        if since_id is not None:
+            events = events.filter(id__gt=since_id)
+        if since_block is not None:
+            events = events.filter(block_height__gt=since_block)
+        if since_id is not None or since_block is not None:
+            await self._wait_for_rows(events, self._int_param(request, 'wait'))
+        
         serializer = GameEventSerializer(events, many=True)
-        return Response(serializer.data)
+        return Response(await sync_to_async(lambda: serializer.data)())
     
     @action(detail=True, methods=['post'])
-    def generate_live_commentary(self, request, pk=None):
+    async def generate_live_commentary(self, request, pk=None):
         """
         Generate AI-powered live commentary for current game state
         
         Method: POST
         Endpoint: /api/games/{game_id}/generate_live_commentary/
         
+        Query Parameters:
+        - async: Set to 1 to queue the request and return 202 with a job id;
+          poll /api/jobs/{job_id}/ for the result
+        - stream: Set to 1 to receive the commentary as server-sent events
+          while it is written (see Streaming Response; ASGI server only,
+          ignored under WSGI)
+        
         Request Body: None
         
         Response:
@@ -1465,11 +1610,33 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             "created_at": "2025-10-13T12:00:00Z"
         }
         
+        201 with new commentary, or 200 with the commentary already
+        generated for the same game state within the commentary cache TTL
+        (repeated polls store and push nothing new).
+        
         Errors:
         - 400: Game not active
         - 500: AI generation failed
+        - 503: Model unavailable and no earlier commentary to fall back on
+          (see Retry-After)
+        
+        Streaming Response (?stream=1, text/event-stream):
+            event: delta
+            data: {"text": "The tension"}
+            
+            event: delta
+            data: {"text": " rises as..."}
+            
+            event: commentary
+            data: {...the stored commentary, as above...}
+        
+        Once streaming has begun, a failure ends the stream with
+        `event: error` and data {"error": "...", "status": 500}, or 503 with
+        "retry_after" in seconds (errors found before generating, such as
+        400, are answered as above). The commentary is stored even if the
+        client disconnects early.
         """
-        game = self.get_object()
+        game = await sync_to_async(self.get_object)()
         
         if game.is_completed:
             return Response(
@@ -1477,70 +1644,26 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            players = game.players.all().order_by('joined_at')
-            recent_events = game.events.all().order_by('-block_height')[:5]
-            
-            active_players = players.filter(eliminated=False).count()
-            eliminated_players = players.filter(eliminated=True).count()
-            
-            recent_actions = []
-            for event in recent_events:
-                recent_actions.append({
-                    'type': event.get_event_type_display(),
-                    'round': event.event_data.get('round', '?'),
-                    'player': event.player_address[:8] + '...' if event.player_address else 'N/A'
-                })
-            
-            tension_level = self._calculate_tension_level(game, active_players)
-            
-            game_context = f"""
-                Current Game State:
-                - Game ID: {game.game_id}
-                - Current Round: {game.current_round}
-                - Players Remaining: {active_players} of {players.count()}
-                - Prize Pool: {game.prize_pool} STX
-                - Tension Level: {tension_level}/10
-
-                Recent Actions (last 5):
-                {chr(10).join([f"Round {a['round']}: {a['type']} - {a['player']}" for a in recent_actions])}
-
-                Active Players:
-                {chr(10).join([f"- {p.wallet_address[:12]}... {'(Risk Mode Active)' if p.used_risk_mode else ''}" for p in players.filter(eliminated=False)])}
-                """
-            
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            
-            prompt = f"""You are a live sports commentator for a blockchain Russian Roulette game. 
-                Provide exciting, real-time commentary on the current game state.
-
-                Style: Energetic, suspenseful, focus on the drama of the moment.
-                Keep it to 2-3 punchy sentences about what's happening RIGHT NOW.
-                Make it feel like a live broadcast.
-
-                {game_context}
-
-                Commentary:"""
-            
-            response = model.generate_content(prompt)
-            commentary_text = response.text
-            
-            commentary = GameCommentary.objects.create(
-                game=game,
-                round_number=game.current_round,
-                commentary_text=commentary_text,
-                commentary_type='live',
-                tension_level=tension_level,
-                context_data={
-                    'active_players': active_players,
-                    'recent_events': recent_actions,
-                    'prize_pool': str(game.prize_pool)
-                }
+        if self._wants_job(request):
+            job = await sync_to_async(jobs.enqueue)('generate_live_commentary', game=game)
+            return self._job_accepted(request, job)
+        
+        if self._wants_stream(request):
+            return streams.stream_generation(
+                lambda on_text: services.agenerate_live_commentary(game, on_text),
+                'commentary',
+                lambda result: GameCommentarySerializer(result[0]).data,
+                'Failed to generate commentary',
             )
+        
+        try:
+            commentary, created = await services.agenerate_live_commentary(game)
             
             serializer = GameCommentarySerializer(commentary)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
             
+        except llm.LLMUnavailable as e:
+            return self._llm_unavailable(e)
         except Exception as e:
             return Response(
                 {'error': f'Failed to generate commentary: {str(e)}'},
@@ -1548,7 +1671,7 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             )
     
     @action(detail=True, methods=['get'])
-    def commentaries(self, request, pk=None):
+    async def commentaries(self, request, pk=None):
         """
         Get all AI commentaries for a game
         
@@ -1558,6 +1681,10 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         Query Parameters:
         - type: Filter by commentary type (live, prediction, analysis, highlight)
         - limit: Number of commentaries to return (default: 10)
+        - since_id: Only commentaries with a larger id (optional)
+        - wait: With since_id, wait up to this many seconds for new
+          commentary before answering (long-poll, max 30)
+          (results are then returned oldest first)
         
         Response:
         [
@@ -1572,27 +1699,41 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             ...
         ]
         """
-        game = self.get_object()
+        game = await sync_to_async(self.get_object)()
         commentaries = GameCommentary.objects.filter(game=game)
         
         commentary_type = request.query_params.get('type', None)
         if commentary_type:
             commentaries = commentaries.filter(commentary_type=commentary_type)
         
+        since_id = self._int_param(request, 'since_id')
+        if since_id is not None:
+            commentaries = commentaries.filter(id__gt=since_id)
+            await self._wait_for_rows(commentaries, self._int_param(request, 'wait'))
+        
         limit = int(request.query_params.get('limit', 10))
-        commentaries = commentaries.order_by('-created_at')[:limit]
+        # Deltas come oldest first so the last id can be the next since_id
+        ordering = 'id' if since_id is not None else '-created_at'
+        commentaries = commentaries.order_by(ordering)[:limit]
         
         serializer = GameCommentarySerializer(commentaries, many=True)
-        return Response(serializer.data)
+        return Response(await sync_to_async(lambda: serializer.data)())
     
     @action(detail=True, methods=['post'])
-    def generate_summary(self, request, pk=None):
+    async def generate_summary(self, request, pk=None):
         """
         Generate comprehensive AI summary for completed game
         
         Method: POST
         Endpoint: /api/games/{game_id}/generate_summary/
         
+        Query Parameters:
+        - async: Set to 1 to queue the request and return 202 with a job id;
+          poll /api/jobs/{job_id}/ for the result
+        - stream: Set to 1 to receive the summary as server-sent events
+          while it is written: `delta` events, then `summary` with the
+          stored summary (as for generate_live_commentary)
+        
         Request Body: None
         
         Response:
@@ -1618,8 +1759,12 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         - 400: Game not completed
         - 200: Summary already exists (returns existing)
         - 500: AI generation failed
+        - 503: Model unavailable (see Retry-After)
+        
+        The summary is written by gemini-2.5-pro, or by gemini-2.5-flash when
+        Pro is over its latency budget or failing.
         """
-        game = self.get_object()
+        game = await sync_to_async(self.get_object)()
         
         if not game.is_completed:
             return Response(
@@ -1627,8 +1772,10 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if hasattr(game, 'summary'):
-            serializer = GameSummarySerializer(game.summary)
+        existing = await GameSummary.objects.filter(game=game).afirst()
+        if existing is not None:
+            existing.game = game
+            serializer = GameSummarySerializer(existing)
             return Response(
                 {
                     'message': 'Summary already exists',
@@ -1637,100 +1784,34 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_200_OK
             )
         
-        try:
-            players = game.players.all().order_by('joined_at')
-            events = game.events.all().order_by('block_height')
-            
-            elimination_order = []
-            for player in players.filter(eliminated=True).order_by('eliminated_round'):
-                elimination_order.append({
-                    'address': player.wallet_address,
-                    'round': player.eliminated_round
-                })
-            
-            total_spins = events.filter(
-                event_type__in=['player_survived', 'player_eliminated']
-            ).count()
-            
-            timeline = []
-            for event in events[:50]:  # Limit to first 50 events
-                event_desc = f"Round {event.event_data.get('round', '?')}: {event.get_event_type_display()}"
-                if event.player_address:
-                    event_desc += f" - {event.player_address[:8]}..."
-                timeline.append(event_desc)
-            
-            game_context = f"""
-                Game Summary Data:
-                - Game ID: {game.game_id}
-                - Stake Amount: {game.stake_amount} STX per player
-                - Total Prize Pool: {game.prize_pool} STX
-                - Total Players: {players.count()}
-                - Total Rounds: {game.current_round}
-                - Total Spins: {total_spins}
-                - Winner: {game.winner_address[:10] if game.winner_address else 'N/A'}...
-
-                Players (in join order):
-                {chr(10).join([f'{i+1}. {p.wallet_address[:10]}... {"🏆 WINNER" if p.wallet_address == game.winner_address else f"💀 Eliminated Round {p.eliminated_round}" if p.eliminated else ""}' for i, p in enumerate(players)])}
-
-                Game Timeline:
-                {chr(10).join(timeline)}
-
-                Elimination Order:
-                {chr(10).join([f"{i+1}. {e['address'][:10]}... - Round {e['round']}" for i, e in enumerate(elimination_order)])}
-                """
-            
-            model = genai.GenerativeModel('gemini-2.5-pro')
-            
-            prompt = f"""You are a master storyteller recounting an epic Russian Roulette game on the Stacks blockchain. 
-                    Write a compelling narrative summary that captures the full arc of this game.
-
-                    Structure your response:
-                    1. **The Setup** - Set the stakes and introduce the battle (2-3 sentences)
-                    2. **Rising Action** - Chronicle key eliminations and tense moments (3-4 sentences)
-                    3. **The Climax** - Build to the final showdown (2-3 sentences)
-                    4. **The Resolution** - Winner announcement and reflection (2 sentences)
-                    5. **Strategy Analysis** - Brief tactical insights (2-3 sentences)
-
-                    {game_context}
-
-                    Write in an engaging, dramatic style. Use metaphors from poker, warfare, or gladiatorial combat.
-                    Keep it under 400 words. Make readers feel the tension and excitement."""
-                                
-            response = model.generate_content(prompt)
-            ai_summary = response.text
-            
-            key_moments = self._extract_key_moments(events, players, game)
-            
-            statistics = {
-                'average_spins_per_round': round(total_spins / game.current_round, 2) if game.current_round > 0 else 0,
-                'shield_uses': events.filter(event_type='shield_used').count(),
-                'risk_mode_uses': players.filter(used_risk_mode=True).count(),
-                'survival_rate': round((1 / players.count()) * 100, 2) if players.count() > 0 else 0,
-                'longest_game_duration': game.current_round,
-                'total_prize_pool': str(game.prize_pool)
-            }
-            
-            excitement_rating = self._calculate_excitement_rating(
-                game.current_round,
-                players.count(),
-                key_moments,
-                total_spins
-            )
-            
-            summary = GameSummary.objects.create(
-                game=game,
-                ai_summary=ai_summary,
-                total_rounds=game.current_round,
-                total_spins=total_spins,
-                elimination_order=elimination_order,
-                key_moments=key_moments,
-                statistics=statistics,
-                excitement_rating=excitement_rating
+        if self._wants_job(request):
+            job = await sync_to_async(jobs.enqueue)('generate_summary', game=game)
+            return self._job_accepted(request, job)
+        
+        if self._wants_stream(request):
+            return streams.stream_generation(
+                lambda on_text: services.agenerate_summary_once(game, on_text),
+                'summary',
+                lambda result: GameSummarySerializer(result[0]).data,
+                'Failed to generate summary',
             )
+        
+        try:
+            summary, created = await services.agenerate_summary_once(game)
             
             serializer = GameSummarySerializer(summary)
+            if not created:
+                return Response(
+                    {
+                        'message': 'Summary already exists',
+                        'data': serializer.data
+                    },
+                    status=status.HTTP_200_OK
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
+        except llm.LLMUnavailable as e:
+            return self._llm_unavailable(e)
         except Exception as e:
             return Response(
                 {'error': f'Failed to generate summary: {str(e)}'},
@@ -1747,12 +1828,20 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         
         Response: GameSummary object (see generate_summary for structure)
         
+        Summaries are generated in the background when a game completes. If
+        that job is still queued or running, the response is 202 with the
+        job (poll /api/jobs/{job_id}/), as for generate_summary?async=1.
+        This endpoint never queues work itself.
+        
         Errors:
-        - 404: No summary found
+        - 404: No summary found (game not completed, or no summary job)
         """
         game = self.get_object()
         
         if not hasattr(game, 'summary'):
+            job = jobs.active_job('generate_summary', game) if game.is_completed else None
+            if job is not None:
+                return self._job_accepted(request, job)
             return Response(
                 {'error': 'No summary found. Generate one first using POST /api/games/{id}/generate_summary/'},
                 status=status.HTTP_404_NOT_FOUND
@@ -1762,13 +1851,19 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
-    def predict_outcome(self, request, pk=None):
+    async def predict_outcome(self, request, pk=None):
         """
         AI-powered prediction of game outcome
         
         Method: POST
         Endpoint: /api/games/{game_id}/predict_outcome/
         
+        Query Parameters:
+        - mode: "fast" skips Gemini and returns the modelled odds with short
+          factual reasoning in a few milliseconds
+        - async: Set to 1 to queue the request and return 202 with a job id;
+          poll /api/jobs/{job_id}/ for the result (ignored with mode=fast)
+        
         Request Body: None
         
         Response:
@@ -1786,19 +1881,28 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             "next_elimination": {
                 "player": "SP9M2N...",
                 "likelihood": "High",
+                "probability": 52.1,
                 "reasoning": "Weakest position"
             },
             "rounds_remaining": 3,
-            "confidence_level": "medium"
+            "confidence_level": "high"
         }
         
         Errors:
         - 400: Game already completed
         - 500: Prediction failed
         
+        Probabilities are computed from the contract's elimination rule
+        (game/simulation.py); Gemini only phrases the reasoning, and when it
+        is unavailable the short factual reasoning of mode=fast is used.
+        The rule uses the contract's game-counter, approximated by the one
+        the indexer last recorded: confidence_level is "high" while the
+        indexer is current, "medium" when it lags and "low" before it has
+        indexed a game.
+        
         Note: Results are cached for 5 minutes per round
         """
-        game = self.get_object()
+        game = await sync_to_async(self.get_object)()
         
         if game.is_completed:
             return Response(
@@ -1807,68 +1911,20 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            cache_key = f'game_prediction_{game.game_id}_{game.current_round}'
-            cached_prediction = cache.get(cache_key)
+            fast = request.query_params.get('mode') == 'fast'
+            cache_key = f'game_prediction_{game.game_id}_{game.current_round}_{"fast" if fast else "full"}'
+            cached_prediction = await cache.aget(cache_key)
             
             if cached_prediction:
                 return Response(cached_prediction)
             
-            players = game.players.filter(eliminated=False)
-            events = game.events.all()
-            
-            player_stats = []
-            for player in players:
-                player_events = events.filter(player_address=player.wallet_address)
-                survival_count = player_events.filter(event_type='player_survived').count()
-                
-                player_stats.append({
-                    'address': player.wallet_address[:10] + '...',
-                    'full_address': player.wallet_address,
-                    'survival_count': survival_count,
-                    'risk_mode_active': player.used_risk_mode,
-                    'position': list(players).index(player) + 1
-                })
-            
-            context = f"""
-                Analyze this Russian Roulette game and predict outcomes.
-
-                Current Game State:
-                - Round: {game.current_round}
-                - Players Remaining: {players.count()}
-                - Prize Pool: {game.prize_pool} STX
-
-                Player Statistics:
-                {chr(10).join([f"Player {p['address']}: {p['survival_count']} survivals, Risk Mode: {p['risk_mode_active']}, Position: {p['position']}" for p in player_stats])}
-
-                Provide predictions in JSON format with:
-                1. win_probability for each player (percentages that sum to 100)
-                2. reasoning for each player's chances
-                3. most_likely_next_elimination with player and reasoning
-                4. estimated_rounds_remaining
-                5. confidence_level (low/medium/high)
-                """
-            
-            model = genai.GenerativeModel(
-                'gemini-2.5-flash',
-                generation_config={
-                    "response_mime_type": "application/json"
-                }
-            )
-            
-            response = model.generate_content(context)
-            prediction_json = json.loads(response.text)
+            if self._wants_job(request) and not fast:
+                job = await sync_to_async(jobs.enqueue)('predict_outcome', game=game)
+                return self._job_accepted(request, job)
             
-            prediction_data = {
-                'game_id': game.game_id,
-                'round': game.current_round,
-                'predictions': prediction_json.get('predictions', []),
-                'next_elimination': prediction_json.get('next_elimination', {}),
-                'rounds_remaining': prediction_json.get('rounds_remaining', 0),
-                'confidence_level': prediction_json.get('confidence_level', 'medium'),
-                'generated_at': game.current_round
-            }
+            prediction_data = await services.apredict_outcome_once(game, fast=fast)
             
-            cache.set(cache_key, prediction_data, 300)  
+            await cache.aset(cache_key, prediction_data, 300)
             
             return Response(prediction_data, status=status.HTTP_200_OK)
             
@@ -1879,13 +1935,17 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             )
     
     @action(detail=False, methods=['post'])
-    def compare_strategies(self, request):
+    async def compare_strategies(self, request):
         """
         Compare strategies of multiple players
         
         Method: POST
         Endpoint: /api/games/compare_strategies/
         
+        Query Parameters:
+        - async: Set to 1 to queue the request and return 202 with a job id;
+          poll /api/jobs/{job_id}/ for the result
+        
         Request Body:
         {
             "wallets": ["SP2J6ZY...", "SP1K8DH...", "SP9M2NQ..."]
@@ -1908,11 +1968,21 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
             "head_to_head_prediction": "SP2J6Z... most likely to win"
         }
         
+        Statistics cover completed games and come from the PlayerStats
+        table; at most COMPARE_STRATEGIES_MAX_WALLETS (default 100) wallets
+        are compared.
+        
         Errors:
         - 400: Less than 2 wallets provided
         - 500: Analysis failed
+        - 503: Model unavailable and no stored analysis of these wallets
+          (see Retry-After)
         """
-        wallet_addresses = request.data.get('wallets', [])
+        if hasattr(request.data, 'getlist'):
+            # Form posts repeat the field once per wallet
+            wallet_addresses = request.data.getlist('wallets')
+        else:
+            wallet_addresses = request.data.get('wallets', [])
         
         if not wallet_addresses or len(wallet_addresses) < 2:
             return Response(
@@ -1920,123 +1990,23 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if self._wants_job(request):
+            job = await sync_to_async(jobs.enqueue)('compare_strategies', wallets=wallet_addresses)
+            return self._job_accepted(request, job)
+        
         try:
-            player_analyses = []
-            
-            for wallet in wallet_addresses[:6]:  # Limit to 6 players
-                games = Game.objects.filter(players__wallet_address=wallet)
-                player_data = Player.objects.filter(wallet_address=wallet)
-                
-                total_games = games.count()
-                wins = games.filter(winner_address=wallet).count()
-                
-                analysis = {
-                    'wallet': wallet[:10] + '...',
-                    'full_wallet': wallet,
-                    'games_played': total_games,
-                    'wins': wins,
-                    'win_rate': round((wins / total_games * 100), 2) if total_games > 0 else 0,
-                    'risk_mode_usage': player_data.filter(used_risk_mode=True).count(),
-                    'average_survival_rounds': round(
-                        sum([p.eliminated_round or 0 for p in player_data]) / total_games, 2
-                    ) if total_games > 0 else 0
-                }
-                player_analyses.append(analysis)
-            
-            context = f"""
-                    Compare these Russian Roulette players' performance and strategies:
-
-                    {chr(10).join([f"Player {p['wallet']}:{chr(10)}- Games: {p['games_played']}, Wins: {p['wins']} ({p['win_rate']}%){chr(10)}- Risk Mode Usage: {p['risk_mode_usage']} times{chr(10)}- Avg Survival: {p['average_survival_rounds']} rounds{chr(10)}" for p in player_analyses])}
-
-                    Provide:
-                    1. Strategic assessment of each player
-                    2. Strengths and weaknesses comparison
-                    3. Head-to-head matchup prediction
-                    4. Strategy recommendations
-
-                    Be insightful like a professional analyst.
-                    """
-            
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(context)
-            
-            return Response({
-                'player_stats': player_analyses,
-                'ai_analysis': response.text
-            }, status=status.HTTP_200_OK)
+            return Response(
+                await services.acompare_strategies(wallet_addresses),
+                status=status.HTTP_200_OK
+            )
             
+        except llm.LLMUnavailable as e:
+            return self._llm_unavailable(e)
         except Exception as e:
             return Response(
                 {'error': f'Failed to compare strategies: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _calculate_tension_level(self, game, active_players):
-        """Calculate tension level 1-10"""
-        total_players = game.players.count()
-        rounds = game.current_round
-        
-        player_factor = (1 - (active_players / total_players)) * 5
-        round_factor = min(rounds / 10, 1) * 3
-        
-        recent_eliminations = game.events.filter(
-            event_type='player_eliminated'
-        ).order_by('-block_height')[:2].count()
-        
-        elimination_factor = recent_eliminations * 1
-        
-        return min(round(player_factor + round_factor + elimination_factor), 10)
-    
-    def _extract_key_moments(self, events, players, game):
-        """Extract significant game moments"""
-        key_moments = []
-        
-        for shield_event in events.filter(event_type='shield_used'):
-            key_moments.append({
-                'type': 'shield_used',
-                'round': shield_event.event_data.get('round'),
-                'player': shield_event.player_address[:10] + '...',
-                'impact': 'high'
-            })
-        
-        first_elim = events.filter(event_type='player_eliminated').first()
-        if first_elim:
-            key_moments.append({
-                'type': 'first_blood',
-                'round': first_elim.event_data.get('round'),
-                'player': first_elim.player_address[:10] + '...',
-                'impact': 'medium'
-            })
-        
-        eliminations = list(events.filter(event_type='player_eliminated').order_by('block_height'))
-        for i in range(len(eliminations) - 1):
-            round_diff = eliminations[i+1].event_data.get('round', 0) - eliminations[i].event_data.get('round', 0)
-            if round_diff <= 1:
-                key_moments.append({
-                    'type': 'rapid_eliminations',
-                    'round': eliminations[i].event_data.get('round'),
-                    'impact': 'high'
-                })
-                break
-        
-        return key_moments
-    
-    def _calculate_excitement_rating(self, rounds, player_count, key_moments, total_spins):
-        """Calculate excitement rating 1-10"""
-        base_score = 5
-        
-        if rounds > 10:
-            base_score += 2
-        elif rounds > 5:
-            base_score += 1
-        
-        if player_count > 5:
-            base_score += 1
-        
-        high_impact = len([m for m in key_moments if m.get('impact') == 'high'])
-        base_score += min(high_impact, 2)
-        
-        return min(base_score, 10)
 
 
 class GameSummaryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -2059,6 +2029,228 @@ class GameSummaryViewSet(viewsets.ReadOnlyModelViewSet):
         
         wallet = self.request.query_params.get('wallet', None)
         if wallet:
-            queryset = queryset.filter(game__players__wallet_address=wallet)
+            queryset = queryset.filter(game__participants__player__wallet_address=wallet)
         
-        return queryset.order_by('-generated_at')
\ No newline at end of file
+        return queryset.order_by('-generated_at')
+
+
+class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Ranked leaderboard mirroring the contract's user-stats map
+
+    Endpoints:
+    - GET /api/leaderboard/ - Ranked entries, best first
+    - GET /api/leaderboard/{wallet_address}/ - Single wallet with its rank
+
+    Query Parameters:
+    - page_size: Entries per page (default: 50, max: 500)
+    - cursor: Opaque cursor taken from the previous page's "next" link
+
+    Ranking is by win rate, then total winnings. Pages are fetched with a
+    keyset seek on the (win_rate, total_winnings, id) index, so deep pages
+    cost the same as the first one. A wallet's rank counts the entries
+    before it with a range scan on the same index.
+    """
+    queryset = LeaderboardEntry.objects.all()
+    serializer_class = LeaderboardEntrySerializer
+    pagination_class = LeaderboardPagination
+    permission_classes = [AllowAny]
+    lookup_field = 'wallet_address'
+    lookup_value_regex = '[^/]+'
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        for i, entry in enumerate(page):
+            entry.rank = self.paginator.position + i + 1
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        entry = self.get_object()
+        ordering = self.pagination_class.ordering
+        key = [getattr(entry, field.lstrip('-')) for field in ordering]
+        # Entries ranked above this one: an index range scan up to the entry
+        entry.rank = LeaderboardEntry.objects.filter(keyset_before(ordering, key)).count() + 1
+        serializer = self.get_serializer(entry)
+        return Response(serializer.data)
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Status of queued AI jobs
+
+    Endpoints:
+    - GET /api/jobs/{id}/ - Job status, queue position and, once finished,
+      the same payload the synchronous action would have returned
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [AllowAny]
+
+
+class LLMCacheViewSet(viewsets.ViewSet):
+    """
+    Gemini response cache statistics
+
+    Endpoints:
+    - GET /api/llm-cache/ - Hit/miss counters for this worker process and
+      entry/hit totals for the shared cache table
+    """
+    permission_classes = [AllowAny]
+
+    def list(self, request):
+        return Response(llm.cache_stats())
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Stored cProfile runs of single requests (see game/profiling.py)
+
+    Endpoints:
+    - GET /api/profiles/ - Runs in the ring, newest first, without their
+      function and SQL breakdowns
+    - GET /api/profiles/{id}/ - One run: request, status, duration, the
+      slowest functions and the top SQL statements with their call sites
+    - GET /api/profiles/{id}/download/ - The run's .prof file for pstats
+      or snakeviz
+
+    A request is profiled when it carries PROFILING_TOKEN in an X-Profile
+    header or a ?profile= parameter; its X-Profile-Id response header is
+    the run's id.
+
+    Authentication:
+    - The same token in an X-Profile-Token header (not X-Profile, which
+      would profile the request and rotate older runs out of the ring)
+
+    Errors:
+    - 403: Missing or wrong token
+    - 404: Unknown run, or PROFILING_ENABLED is off
+    """
+    permission_classes = [HasProfilingToken]
+    lookup_value_regex = r'[0-9T]+-[0-9]+-[0-9]+'
+    SUMMARY_FIELDS = ('id', 'created_at', 'method', 'path', 'endpoint', 'status', 'duration_ms', 'queries', 'db_ms')
+
+    def list(self, request):
+        runs = [{field: run.get(field) for field in self.SUMMARY_FIELDS} for run in profiling.entries()]
+        for run in runs:
+            run['url'] = request.build_absolute_uri(f"/api/profiles/{run['id']}/")
+        return Response({'count': len(runs), 'ring_size': settings.PROFILE_RING_SIZE, 'results': runs})
+
+    def retrieve(self, request, pk=None):
+        run = profiling.entry(pk)
+        if run is None:
+            raise Http404
+        run['download_url'] = request.build_absolute_uri(f'/api/profiles/{pk}/download/')
+        return Response(run)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        path = profiling.profile_path(pk)
+        if path is None:
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
+
+
+class ClarityProxyViewSet(viewsets.ViewSet):
+    """
+    Cached proxy for the Breevs contract's read-only functions
+
+    Endpoints:
+    - GET /api/clarity/ - Cache and upstream counters for this process
+    - POST /api/clarity/v2/contracts/call-read/{address}/{contract}/{function}/
+      Same request and response as the node's call-read endpoint, so the
+      frontend can use `${API}/api/clarity` as its network base URL
+    - POST /api/clarity/batch/ - Many calls in one request
+
+    Answers are cached until the chain tip moves; concurrent identical calls
+    share one upstream request and the node never sees more than
+    CLARITY_MAX_CONCURRENCY requests from this process at once.
+    """
+    permission_classes = [AllowAny]
+
+    def list(self, request):
+        return Response(clarity.get_proxy().stats())
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path=r'v2/contracts/call-read/(?P<contract_address>[^/.]+)/(?P<contract_name>[^/.]+)/(?P<function_name>[^/.]+)',
+    )
+    def call_read(self, request, contract_address, contract_name, function_name):
+        """
+        Call one read-only function
+
+        Request Body:
+        {
+            "sender": "ST...",            // ignored; results do not depend on it
+            "arguments": ["0x0100..."]    // hex-serialized Clarity values
+        }
+
+        Response: the node's answer, e.g. {"okay": true, "result": "0x0a0c..."}
+
+        Errors:
+        - 404: Another contract or a function that is not read-only
+        - 502: The node failed
+        """
+        if f'{contract_address}.{contract_name}' != settings.BREEVS_CONTRACT_ID:
+            return Response({'error': 'Unknown contract'}, status=status.HTTP_404_NOT_FOUND)
+        if function_name not in clarity.READ_ONLY_FUNCTIONS:
+            return Response({'error': 'Unknown read-only function'}, status=status.HTTP_404_NOT_FOUND)
+        arguments = request.data.get('arguments', [])
+        if not isinstance(arguments, list):
+            raise ValidationError({'arguments': 'Must be a list of hex-serialized Clarity values'})
+
+        try:
+            return Response(clarity.get_proxy().call(function_name, arguments))
+        except clarity.ClarityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Call many read-only functions at once
+
+        Request Body:
+        {
+            "calls": [
+                {"function": "get-game-info", "arguments": ["0x0100..."]},
+                {"function": "get-total-games", "arguments": []}
+            ]
+        }
+
+        Response:
+        {
+            "tip_height": 123456,
+            "results": [{"okay": true, "result": "0x..."}, {"error": "..."}]
+        }
+
+        Errors:
+        - 400: No calls, more than CLARITY_BATCH_MAX_CALLS, or an unknown function
+        - 502: The chain tip could not be read
+        """
+        calls = request.data.get('calls')
+        if not isinstance(calls, list) or not calls:
+            raise ValidationError({'calls': 'Provide a list of calls'})
+        if len(calls) > settings.CLARITY_BATCH_MAX_CALLS:
+            raise ValidationError({'calls': f'At most {settings.CLARITY_BATCH_MAX_CALLS} calls per request'})
+        try:
+            pairs = [(call['function'], list(call.get('arguments', []))) for call in calls]
+        except (KeyError, TypeError):
+            raise ValidationError({'calls': 'Each call needs a "function" and a list of "arguments"'})
+
+        proxy = clarity.get_proxy()
+        try:
+            answers = proxy.call_many(pairs)
+        except ValueError as e:
+            raise ValidationError({'calls': str(e)})
+        except clarity.ClarityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response({
+            'tip_height': proxy.tip,
+            'results': [
+                {'error': str(answer)} if isinstance(answer, clarity.ClarityError) else answer
+                for answer in answers
+            ],
+        })
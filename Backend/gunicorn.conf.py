@@ -0,0 +1,57 @@
+"""
+Gunicorn profile for the web process (`gunicorn -c gunicorn.conf.py`).
+
+Runs the ASGI application (`api.asgi:application`) on uvicorn workers. The
+LLM-bound GameViewSet actions (`async def`, see game/async_views.py) and
+the SSE streams (game/streams.py) then wait on an event loop instead of
+pinning a thread each, so one worker holds hundreds of pending model
+calls. The remaining DRF views are sync; Django runs each of those
+requests on a thread.
+
+Environment:
+- WEB_CONCURRENCY: worker processes (default: 2)
+- PORT: listen port (default: 8000)
+- GUNICORN_TIMEOUT: seconds a worker may stay silent before it is
+  restarted (default: 120, above the slowest Gemini Pro call)
+- PROMETHEUS_MULTIPROC_DIR: an empty, writable directory where each worker
+  writes its request metrics, so /metrics reports all workers rather than
+  the one that answered the scrape (see game/metrics.py). It is emptied
+  when the server starts.
+
+Without gunicorn, e.g. locally:
+    uvicorn api.asgi:application --workers 2
+
+Gunicorn reads this file from the working directory even without `-c`,
+so a sync profile has to name its worker class, e.g.
+    gunicorn api.wsgi:application -k gthread --threads 8
+The async actions then run on the request's thread, one model call per
+thread.
+"""
+
+import os
+import shutil
+
+wsgi_app = 'api.asgi:application'
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to cap slow leaks, staggered by the jitter
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+def on_starting(server):
+    # Files left by a previous run would be counted again
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)